@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the education cost predictor.
+
+Run them from the project root, e.g. ``python -m benchmarks.dataset_store``.
+"""
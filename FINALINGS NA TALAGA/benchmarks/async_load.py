@@ -0,0 +1,156 @@
+"""
+Load test: dropdown lookups while predictions run, sync WSGI vs async ASGI.
+
+Each mode runs in a fresh interpreter for a fixed duration, with closed-loop
+clients: many lookup clients calling /api/cities/ and a few prediction
+clients posting 100-row batches to /api/predict/batch/.
+
+- wsgi-sync: sync views behind a threaded WSGI server: a FIFO request queue
+  in front of --server-threads threads
+- asgi-sync: sync views under ASGI, which Django runs on a single thread
+- asgi-async: the async views (ASYNC_VIEWS), inference on the bounded executor
+
+Requests go through Django's WSGI/ASGI request handling (the test clients'
+handlers) in process, without a network server, so the numbers compare the
+code paths rather than a production deployment.
+
+Usage: python -m benchmarks.async_load [--duration S] [--lookup-clients N] [--predict-clients N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import PROJECT_DIR
+
+MODES = ['wsgi-sync', 'asgi-sync', 'asgi-async']
+
+RUNNER = r"""
+import asyncio, json, os, statistics, sys, threading, time
+sys.path.insert(0, {project_dir!r})
+from benchmarks.common import login_cookies, setup_django
+setup_django()
+from django.conf import settings
+settings.ALLOWED_HOSTS = ['testserver']
+settings.INFERENCE_CONCURRENCY = {inference_concurrency!r}
+from predictor.dataset import get_dataset
+# Batch predictions are only open to logged-in users
+cookies = login_cookies()
+
+mode, duration = {mode!r}, {duration!r}
+lookup_clients, predict_clients, server_threads = {lookup_clients!r}, {predict_clients!r}, {server_threads!r}
+dataset = get_dataset()
+countries = dataset.countries()
+rows = [{{key.lower(): value for key, value in record.items()}} for record in dataset.records]
+batches = [json.dumps(rows[i:i + 100]) for i in range(0, len(rows) - 100, 100)]
+lookups, predictions, failures = [], [], []
+
+if mode == 'wsgi-sync':
+    from concurrent.futures import ThreadPoolExecutor
+    from django.test import Client
+    # The server: a FIFO queue of requests in front of a fixed number of threads
+    server = ThreadPoolExecutor(server_threads)
+    http = threading.local()
+    deadline = time.perf_counter() + duration
+
+    def handle(method, *args, **kwargs):
+        if not hasattr(http, 'client'):
+            http.client = Client()
+            http.client.cookies.update(cookies)
+        return getattr(http.client, method)(*args, **kwargs)
+
+    def client(i, predicting):
+        n = i
+        while time.perf_counter() < deadline:
+            n += 1
+            start = time.perf_counter()
+            if predicting:
+                response = server.submit(handle, 'post', '/api/predict/batch/', batches[n % len(batches)],
+                                         content_type='application/json').result()
+            else:
+                response = server.submit(handle, 'get', '/api/cities/',
+                                         {{'country': countries[n % len(countries)]}}).result()
+            (predictions if predicting else lookups).append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+    threads = [threading.Thread(target=client, args=(i, i < predict_clients))
+               for i in range(predict_clients + lookup_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+else:
+    from django.test import AsyncClient
+
+    async def client(i, predicting, deadline):
+        http = AsyncClient()
+        http.cookies.update(cookies)
+        n = i
+        while time.perf_counter() < deadline:
+            n += 1
+            start = time.perf_counter()
+            if predicting:
+                response = await http.post('/api/predict/batch/', batches[n % len(batches)], content_type='application/json')
+            else:
+                response = await http.get('/api/cities/', {{'country': countries[n % len(countries)]}})
+            (predictions if predicting else lookups).append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+    async def main():
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client(i, i < predict_clients, deadline)
+                               for i in range(predict_clients + lookup_clients)))
+
+    asyncio.run(main())
+
+lookups.sort()
+print(json.dumps({{
+    'lookups_per_s': len(lookups) / duration,
+    'lookup_p50_ms': statistics.median(lookups) * 1000 if lookups else None,
+    'lookup_p99_ms': lookups[int(len(lookups) * 0.99)] * 1000 if lookups else None,
+    'prediction_rows_per_s': len(predictions) * 100 / duration,
+    'failures': len(failures),
+}}))
+"""
+
+
+def settings_value(name):
+    """Read a setting without configuring Django in this process."""
+    sys.path.insert(0, PROJECT_DIR)
+    from education_cost_predictor import settings
+    return getattr(settings, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--lookup-clients', type=int, default=100)
+    parser.add_argument('--predict-clients', type=int, default=4)
+    parser.add_argument('--server-threads', type=int, default=8, help="Threads of the simulated WSGI server")
+    parser.add_argument('--inference-concurrency', type=int, default=None,
+                        help="INFERENCE_CONCURRENCY for asgi-async (default: the setting)")
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    args = parser.parse_args()
+
+    print(f"{args.lookup_clients} lookup clients + {args.predict_clients} prediction clients, {args.duration:g} s per mode")
+    print(f"{'mode':<14}{'lookups/s':>12}{'lookup p50 ms':>16}{'lookup p99 ms':>16}{'predicted rows/s':>19}{'failures':>10}")
+    for mode in args.modes:
+        env = dict(os.environ, DJANGO_ASYNC_VIEWS='1' if mode == 'asgi-async' else '0', PYTHONWARNINGS='ignore')
+        code = RUNNER.format(project_dir=PROJECT_DIR, mode=mode, duration=args.duration,
+                             lookup_clients=args.lookup_clients, predict_clients=args.predict_clients,
+                             server_threads=args.server_threads,
+                             inference_concurrency=args.inference_concurrency or settings_value('INFERENCE_CONCURRENCY'))
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=PROJECT_DIR, env=env, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        p50, p99 = result['lookup_p50_ms'], result['lookup_p99_ms']
+        print(f"{mode:<14}{result['lookups_per_s']:>12.0f}{p50 or 0:>16.2f}{p99 or 0:>16.2f}"
+              f"{result['prediction_rows_per_s']:>19.0f}{result['failures']:>10}")
+
+
+if __name__ == '__main__':
+    main()
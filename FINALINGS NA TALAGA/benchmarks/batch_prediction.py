@@ -0,0 +1,55 @@
+"""
+Throughput of the batch prediction API compared with one predict() call per row.
+
+Rows are taken from the dataset (repeated as needed) and posted to
+/api/predict/batch/ as a JSON array.
+
+Usage: python -m benchmarks.batch_prediction [--sizes 100 1000 10000]
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import login_cookies, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--loop-rows', type=int, default=200,
+                        help='rows scored one at a time to estimate the per-row baseline')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.test import Client
+    from predictor.dataset import get_dataset
+    from predictor.ml_model import EducationCostPredictor
+
+    settings.ALLOWED_HOSTS = ['testserver']
+    rows = [{key.lower(): value for key, value in record.items() if key != 'Tuition_USD'}
+            for record in get_dataset().records]
+    predictor = EducationCostPredictor()
+
+    start = time.perf_counter()
+    for row in rows[:args.loop_rows]:
+        predictor.predict(dict(row))
+    per_row_ms = (time.perf_counter() - start) * 1000 / args.loop_rows
+    print(f"predict() one row at a time: {per_row_ms:.3f} ms/row")
+
+    client = Client()
+    client.cookies.update(login_cookies())
+    client.post('/api/predict/batch/', json.dumps(rows[:10]), content_type='application/json')
+    print(f"\n{'rows':>8}{'batch ms':>14}{'ms/row':>12}{'loop estimate ms':>20}{'speed-up':>12}")
+    for size in args.sizes:
+        payload = json.dumps((rows * (size // len(rows) + 1))[:size])
+        start = time.perf_counter()
+        response = client.post('/api/predict/batch/', payload, content_type='application/json')
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, response.content[:200]
+        loop_ms = per_row_ms * size
+        print(f"{size:>8}{elapsed_ms:>14.1f}{elapsed_ms / size:>12.4f}{loop_ms:>20.1f}{loop_ms / elapsed_ms:>11.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Build time and query latency of /api/search/budget/ on a dataset grown to --rows rows.
+
+The dataset CSV is grown to --rows rows (each copy of it gets its own
+universities and rents varied by up to 20%) and its compact file is written,
+as benchmarks.compact_dataset does. Every row is then priced with one model
+call (timed, as is reading the persisted predictions back) and indexed with
+BudgetIndex. Budget searches drawn from the dataset's levels, programs and
+countries are timed against a filter-and-sort of every row per request.
+
+Each search's results are checked against that scan, ties in dataset order
+(the script exits with status 1 if they differ).
+
+Usage: python -m benchmarks.budget_search [--rows N] [--limit N] [--repeat N]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def scan(index, max_total, limit, filters):
+    """The rows a search should return, by filtering and sorting every row of the index."""
+    import numpy as np
+    mask = index.total_cost <= max_total
+    for column, value in filters.items():
+        mask &= index._codes[column] == index._lookup[column].get(value, -2)
+    rows = np.flatnonzero(mask)
+    # The index is sorted by total cost, so sorting the positions by cost keeps ties in dataset order
+    return rows[np.argsort(index.total_cost[rows], kind='stable')[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    import numpy as np
+    import pandas as pd
+    from django.conf import settings
+
+    directory = tempfile.mkdtemp(prefix='budget-search-')
+    # Set before predictor.budget is imported, as it reads it at import time
+    settings.DATASET_PREDICTIONS_DIR = directory
+    from predictor.budget import BudgetIndex, dataset_predictions
+    from predictor.compact import CompactDataset, build_compact
+    from predictor.dataset import get_dataset
+    from predictor.ml_model import EducationCostPredictor
+
+    base = get_dataset().df
+    rng = np.random.default_rng(0)
+    copies = []
+    for i in range(args.rows // len(base) + 1):
+        copy = base.copy()
+        if i:
+            copy['University'] = copy['University'] + f' #{i}'
+            copy['Rent_USD'] = (copy['Rent_USD'] * rng.uniform(0.8, 1.2, len(copy))).round().astype(int)
+        copies.append(copy)
+    df = pd.concat(copies, ignore_index=True).head(args.rows)
+    csv_path = os.path.join(directory, 'education_costs.csv')
+    df.to_csv(csv_path, index=False)
+    version, compact_path = build_compact(csv_path, directory)
+    dataset = CompactDataset(compact_path, version)
+
+    predictor = EducationCostPredictor()
+    start = time.perf_counter()
+    tuition, model_version = dataset_predictions(dataset, predictor)
+    scored = time.perf_counter() - start
+    start = time.perf_counter()
+    dataset_predictions(dataset, predictor)
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    index = BudgetIndex(dataset, tuition, model_version)
+    built = time.perf_counter() - start
+    print(f"{len(index):,} rows: priced with one model call in {scored:.2f} s, "
+          f"predictions read back in {loaded * 1000:.0f} ms, indexed in {built:.2f} s")
+
+    levels = df['Level'].unique().tolist()
+    programs = df['Program'].value_counts().index[:10].tolist()
+    countries = df['Country'].value_counts().index[:20].tolist()
+    budgets = np.percentile(index.total_cost, [5, 25, 50, 75]).round().tolist()
+    rng = random.Random(1)
+    searches = {
+        'level + program + country + budget': [
+            (rng.choice(budgets), {'Level': rng.choice(levels), 'Program': rng.choice(programs),
+                                   'Country': rng.choice(countries)}) for _ in range(50)],
+        'level + program + budget': [
+            (rng.choice(budgets), {'Level': rng.choice(levels), 'Program': rng.choice(programs)}) for _ in range(50)],
+        'country, no budget': [(float('inf'), {'Country': country}) for country in countries],
+        'budget only': [(budget, {}) for budget in budgets],
+        'no match': [(budgets[0], {'Level': levels[0], 'Program': programs[0], 'Country': 'Atlantis'}),
+                     (1.0, {'Level': levels[0]})],
+    }
+
+    rows = []
+    for label, cases in searches.items():
+        cycle = itertools.cycle(cases)
+
+        def search():
+            max_total, filters = next(cycle)
+            return index.search(max_total, args.limit, filters)
+
+        def scan_all():
+            max_total, filters = next(cycle)
+            return scan(index, max_total, args.limit, filters)
+
+        rows.append((f"index: {label}", measure(search, repeat=args.repeat)))
+        rows.append((f"scan: {label}", measure(scan_all, repeat=min(args.repeat, 50))))
+    print_table(f"Budget search latency, top {args.limit}", rows)
+
+    mismatches = []
+    for label, cases in searches.items():
+        for max_total, filters in cases:
+            found = [(result['university'], result['total_cost_usd'])
+                     for result in index.search(max_total, args.limit, filters)]
+            expected = [(index._vocabularies['University'][index._codes['University'][row]], index.total_cost[row])
+                        for row in scan(index, max_total, args.limit, filters).tolist()]
+            if found != expected:
+                mismatches.append((label, max_total, filters))
+    print(f"\nIndex vs scan of every row: {'identical' if not mismatches else f'DIFFERENT for {mismatches[:3]}'}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Shared helpers for the benchmark scripts."""
+import os
+import statistics
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    """Configure Django so benchmarks can use the app modules directly."""
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'education_cost_predictor.settings')
+    import django
+    django.setup()
+
+
+def login_cookies():
+    """
+    Log the benchmark user in (creating it the first time) and get its session cookies.
+
+    Set them on a test client (client.cookies.update(...)) to call login-only views.
+    """
+    from django.contrib.auth.models import User
+    from django.test import Client
+    user, created = User.objects.get_or_create(username='benchmark')
+    if created:
+        user.set_unusable_password()
+        user.save()
+    client = Client()
+    client.force_login(user)
+    return client.cookies
+
+
+def measure(func, repeat=200, warmup=5):
+    """
+    Time repeated calls of a function.
+
+    Args:
+        func (callable): Zero-argument function to time
+        repeat (int): Number of timed calls
+        warmup (int): Number of untimed calls made first
+
+    Returns:
+        dict: p50, p95 and mean latency in milliseconds
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': statistics.median(timings),
+        'p95_ms': timings[int(len(timings) * 0.95) - 1],
+        'mean_ms': statistics.fmean(timings),
+    }
+
+
+def print_table(title, rows):
+    """
+    Print benchmark results as an aligned table.
+
+    Args:
+        title (str): Heading printed above the table
+        rows (list): (label, result dict from measure()) pairs
+    """
+    print(f"\n{title}")
+    print(f"{'case':<40}{'p50 ms':>12}{'p95 ms':>12}{'mean ms':>12}")
+    for label, result in rows:
+        print(f"{label:<40}{result['p50_ms']:>12.3f}{result['p95_ms']:>12.3f}{result['mean_ms']:>12.3f}")
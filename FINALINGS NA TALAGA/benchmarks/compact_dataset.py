@@ -0,0 +1,156 @@
+"""
+Memory per pre-forked worker and lookup latency: the in-memory dataset vs the memory-mapped compact file.
+
+The dataset CSV is grown to --rows rows (each copy of it gets its own
+universities, so the hierarchy grows with it), and its snapshot and compact
+files are written. For each DATASET_BACKEND ('memory' and 'compact') a fresh
+interpreter then simulates a pre-forking server, as benchmarks.worker_memory
+does: the master loads the dataset (--mode preload, as wsgi.py does) or
+doesn't (--mode lazy), then forks --workers workers that each serve the
+cascade lookups of --keys dataset rows, the prediction form's choices and
+the dashboard statistics. Their RSS, PSS and private memory are read from
+/proc/<pid>/smaps_rollup.
+
+Each run also times the lookups and computing the dashboard statistics, and
+hashes what it served; both backends must serve the same results (the script
+exits with status 1 otherwise).
+
+Usage: python -m benchmarks.compact_dataset [--rows N] [--workers N] [--keys N] [--mode lazy|preload]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import PROJECT_DIR, print_table, setup_django
+from benchmarks.worker_memory import print_usage
+
+BACKENDS = ['memory', 'compact']
+
+RUNNER = r"""
+import gc, hashlib, json, sys
+sys.path.insert(0, {project_dir!r})
+from benchmarks.common import measure, setup_django
+setup_django()
+from django.conf import settings
+# Set before the app modules are imported, as they read them at import time
+settings.EDUCATION_DATA_CSV = {csv_path!r}
+settings.DATASET_SNAPSHOT_DIR = {directory!r}
+settings.DATASET_STATS_DIR = {stats_dir!r}
+settings.DATASET_BACKEND = {backend!r}
+from benchmarks.worker_memory import fork_workers, read_memory
+from predictor.choices import get_choice_catalog
+from predictor.repository import get_repository
+from predictor.stats import compute_compact_stats, compute_dataset_stats, stats_source, stats_store
+
+def round_floats(value):
+    if isinstance(value, float):
+        return round(value, 9)
+    if isinstance(value, dict):
+        return {{key: round_floats(item) for key, item in value.items()}}
+    if isinstance(value, list):
+        return [round_floats(item) for item in value]
+    return value
+
+def serve():
+    dataset = get_repository()
+    catalog = get_choice_catalog()
+    results = []
+    for country, city, university, program in keys:
+        results.append(dataset.cascade(country, city, university, program))
+        results.append(dataset.distinct('Level', {{'Country': country}}))
+        results.append(list(catalog.university_choices(country, city)))
+        results.append(list(catalog.program_choices(country, city, university)))
+    results.append(list(catalog.column('Country')))
+    # The statistics are computed (the stats directory starts empty) rather than read from a file
+    results.append(round_floats(json.loads(json.dumps(stats_store.get()))))
+    return results
+
+keys = {keys!r}
+gc.collect()
+before = read_memory('self')
+if {mode!r} == 'preload':
+    serve()
+    gc.freeze()
+usage = fork_workers({workers}, serve)
+served = serve()
+dataset = get_repository()
+source = stats_source()
+compute = compute_compact_stats if {backend!r} == 'compact' else lambda d: compute_dataset_stats(d.df)
+key = keys[len(keys) // 2]
+timings = {{
+    'cascade': measure(lambda: dataset.cascade(*key)),
+    'distinct level of country': measure(lambda: dataset.distinct('Level', {{'Country': key[0]}})),
+    'compute dashboard stats': measure(lambda: compute(source), repeat=5, warmup=1),
+}}
+print(json.dumps({{
+    'before': before, 'master': read_memory('self'), 'usage': usage, 'timings': timings,
+    'digest': hashlib.sha256(json.dumps(served, sort_keys=True, default=str).encode()).hexdigest(),
+}}))
+"""
+
+
+def run(backend, csv_path, directory, keys, args):
+    """Simulate a pre-forking server on a backend in a fresh interpreter and return its results."""
+    stats_dir = tempfile.mkdtemp(prefix=f'stats-{backend}-', dir=directory)
+    code = RUNNER.format(project_dir=PROJECT_DIR, csv_path=csv_path, directory=directory, stats_dir=stats_dir,
+                         backend=backend, mode=args.mode, workers=args.workers, keys=keys)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=PROJECT_DIR)
+    if output.returncode:
+        sys.exit(f"The {backend} run failed:\n{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--keys', type=int, default=200)
+    parser.add_argument('--mode', choices=['lazy', 'preload'], default='preload')
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit("This check needs Linux's /proc/<pid>/smaps_rollup")
+    setup_django()
+    import pandas as pd
+    from predictor.compact import HIERARCHY, build_compact
+    from predictor.dataset import get_dataset
+    from predictor.snapshot import snapshot_path, write_snapshot
+
+    base = get_dataset().df
+    copies = []
+    for i in range(args.rows // len(base) + 1):
+        copy = base.copy()
+        if i:
+            copy['University'] = copy['University'] + f' #{i}'
+        copies.append(copy)
+    df = pd.concat(copies, ignore_index=True).head(args.rows)
+    directory = tempfile.mkdtemp(prefix='compact-dataset-')
+    csv_path = os.path.join(directory, 'education_costs.csv')
+    df.to_csv(csv_path, index=False)
+    version, compact_path = build_compact(csv_path, directory)
+    write_snapshot(pd.read_csv(csv_path), snapshot_path(version, directory))
+    print(f"{len(df):,} rows: CSV {os.path.getsize(csv_path) / 2 ** 20:.1f} MB, "
+          f"compact file {os.path.getsize(compact_path) / 2 ** 20:.1f} MB")
+
+    sample = df[HIERARCHY].sample(min(args.keys, len(df)), random_state=0)
+    keys = [tuple(row) for row in sample.itertuples(index=False)]
+    results = {backend: run(backend, csv_path, directory, keys, args) for backend in BACKENDS}
+    for backend in BACKENDS:
+        result = results[backend]
+        print(f"\nDATASET_BACKEND = {backend!r}: master RSS {result['before']['rss']:.1f} MB before loading, "
+              f"{result['master']['rss']:.1f} MB after serving")
+        print_usage(f"{args.mode.capitalize()} loading, {args.workers} workers", result['usage'])
+    print_table("Latency", [(f"{label}: {backend}", results[backend]['timings'][label])
+                            for label in results[BACKENDS[0]]['timings'] for backend in BACKENDS])
+
+    identical = len({result['digest'] for result in results.values()}) == 1
+    print(f"\nCompact vs memory results: {'identical' if identical else 'DIFFERENT'}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Conditional GET of the dataset APIs: check that revalidation does no data access, and time it.
+
+In a fresh interpreter, every dataset API is requested with the current
+ETag in If-None-Match (and then with If-Modified-Since only). Each must be
+answered 304 with the ETag and Cache-Control headers, without
+DatasetStore.get() being called or pandas being imported; a normal request
+must then be answered 200 with the same ETag. The script exits with
+status 1 if any of this fails.
+
+It then compares the latency of full responses and 304 revalidations in
+this process, with the dataset loaded.
+
+Usage: python -m benchmarks.conditional_get [--repeat N]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from benchmarks.common import PROJECT_DIR, measure, print_table, setup_django
+
+URLS = [
+    '/api/education_data/',
+    '/api/education_data/?format=csv&fields=country,city&limit=10',
+    '/api/cascade/?country=USA&city=Cambridge&university=Harvard University&program=Computer Science',
+    '/api/cities/?country=Germany',
+    '/api/universities/?country=Germany&city=Berlin',
+    '/api/programs/?country=Germany&city=Berlin&university=Technical University of Munich',
+    '/api/university_data/?country=USA&city=Cambridge&university=Harvard University',
+    '/api/program_details/?country=USA&city=Cambridge&university=Harvard University&program=Computer Science',
+]
+
+RUNNER = r"""
+import json, sys
+sys.path.insert(0, {project_dir!r})
+from benchmarks.common import setup_django
+setup_django()
+from django.conf import settings
+settings.ALLOWED_HOSTS = ['testserver']
+from django.test import Client
+from predictor.dataset import DatasetStore, get_dataset_stamp
+
+calls = []
+get = DatasetStore.get
+DatasetStore.get = lambda self: calls.append(1) or get(self)
+
+client = Client()
+etag = '"' + get_dataset_stamp()[0] + '"'
+failures = []
+for url in {urls!r}:
+    headers = {{'HTTP_IF_NONE_MATCH': etag, 'HTTP_ACCEPT_ENCODING': 'gzip'}}
+    if 'education_data' in url:
+        headers['HTTP_IF_NONE_MATCH'] = etag[:-1] + '-gzip"'
+    response = client.get(url, **headers)
+    if response.status_code != 304 or not response.has_header('ETag') or not response.has_header('Cache-Control'):
+        failures.append(f"{{url}}: If-None-Match answered {{response.status_code}} {{dict(response.headers)}}")
+    since = client.get(url, HTTP_IF_MODIFIED_SINCE=response.get('Last-Modified', ''))
+    if since.status_code != 304:
+        failures.append(f"{{url}}: If-Modified-Since answered {{since.status_code}}")
+result = {{'data_access': len(calls), 'pandas_imported': 'pandas' in sys.modules}}
+for url in {urls!r}:
+    response = client.get(url)
+    if response.status_code != 200 or response.get('ETag') != etag:
+        failures.append(f"{{url}}: full request answered {{response.status_code}} with ETag {{response.get('ETag')}}")
+result['failures'] = failures
+print(json.dumps(result))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=300)
+    args = parser.parse_args()
+
+    output = subprocess.run([sys.executable, '-c', RUNNER.format(project_dir=PROJECT_DIR, urls=URLS)],
+                            capture_output=True, text=True, cwd=PROJECT_DIR, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    ok = not result['failures'] and not result['data_access'] and not result['pandas_imported']
+    print(f"Revalidation of {len(URLS)} URLs in a fresh process: {'OK' if ok else 'FAILED'}")
+    print(f"  DatasetStore.get() calls during 304s: {result['data_access']}, "
+          f"pandas imported: {result['pandas_imported']}")
+    for failure in result['failures']:
+        print(f"  {failure}")
+
+    setup_django()
+    from django.conf import settings
+    settings.ALLOWED_HOSTS = ['testserver']
+    from django.test import Client
+    client = Client()
+
+    def fetch(url, **headers):
+        response = client.get(url, **headers)
+        # Read streamed bodies too, as a server would
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    rows = []
+    for url in URLS[2:4] + URLS[:1]:
+        etag = client.get(url)['ETag']
+        label = url.split('?')[0]
+        rows.append((f"{label} 200", measure(lambda: fetch(url), repeat=args.repeat)))
+        rows.append((f"{label} 304", measure(lambda: fetch(url, HTTP_IF_NONE_MATCH=etag), repeat=args.repeat)))
+    print_table("Latency with the dataset loaded", rows)
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
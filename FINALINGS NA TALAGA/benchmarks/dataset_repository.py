@@ -0,0 +1,113 @@
+"""
+Latency of dataset lookups on a large dataset: pandas scans, the in-memory snapshot and the database.
+
+The dataset CSV is grown to --rows rows (each copy of it gets its own
+universities, so the hierarchy grows with it) and imported into a temporary
+SQLite database with `manage.py import_education_costs`. The same lookups
+are then timed on:
+
+- pandas: boolean-mask filtering of the DataFrame, as the lookups used to do
+- memory: the EducationDataset snapshot (DATASET_BACKEND = 'memory')
+- database: the DatabaseRepository (DATASET_BACKEND = 'database'), with its
+  query cache cleared before every call, then as cached
+
+The results of the two backends are checked to be the same (the script exits
+with status 1 otherwise), and the query plans are printed to show the index used.
+
+Usage: python -m benchmarks.dataset_repository [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    directory = tempfile.mkdtemp(prefix='dataset-repository-')
+    settings.DATABASES['default']['NAME'] = os.path.join(directory, 'db.sqlite3')
+    import pandas as pd
+    from django.core.management import call_command
+    from django.db import connection
+    from predictor.dataset import EducationDataset, get_dataset
+    from predictor.models import EducationCost
+    from predictor.repository import database_stamp, DatabaseRepository
+
+    base = get_dataset().df
+    copies = []
+    for i in range(args.rows // len(base) + 1):
+        copy = base.copy()
+        if i:
+            copy['University'] = copy['University'] + f' #{i}'
+        copies.append(copy)
+    df = pd.concat(copies, ignore_index=True).head(args.rows)
+    path = os.path.join(directory, 'education_costs.csv')
+    df.to_csv(path, index=False)
+
+    call_command('migrate', verbosity=0)
+    start = time.perf_counter()
+    call_command('import_education_costs', csv=path, stdout=open(os.devnull, 'w'))
+    imported = time.perf_counter() - start
+    start = time.perf_counter()
+    memory = EducationDataset(pd.read_csv(path), 'benchmark')
+    loaded = time.perf_counter() - start
+    database = DatabaseRepository(*database_stamp())
+    print(f"{len(df):,} rows: imported in {imported:.1f} s, parsed and indexed in memory in {loaded:.1f} s")
+
+    record = df.iloc[len(df) // 2]
+    country, city, university, program = record['Country'], record['City'], record['University'], record['Program']
+    lookups = [
+        ('countries', lambda d: d.countries()),
+        ('cities of country', lambda d: d.cities(country)),
+        ('universities of city', lambda d: d.universities(country, city)),
+        ('programs of university', lambda d: d.programs(country, city, university)),
+        ('program records', lambda d: d.program_records(country, city, university, program)),
+        ('cascade', lambda d: d.cascade(country, city, university, program)),
+        ('levels of country', lambda d: d.distinct('Level', {'Country': country})),
+    ]
+    pandas_lookups = {
+        'cities of country': lambda: sorted(df[df['Country'] == country]['City'].unique()),
+        'universities of city': lambda: sorted(
+            df[(df['Country'] == country) & (df['City'] == city)]['University'].unique()),
+        'programs of university': lambda: sorted(df[(df['Country'] == country) & (df['City'] == city)
+                                                      & (df['University'] == university)]['Program'].unique()),
+    }
+
+    def uncached(lookup):
+        DatabaseRepository.cache.clear()
+        return lookup(database)
+
+    mismatches = [label for label, lookup in lookups if lookup(memory) != uncached(lookup)]
+    rows = []
+    for label, lookup in lookups:
+        if label in pandas_lookups:
+            rows.append((f"{label}: pandas", measure(pandas_lookups[label], repeat=max(args.repeat // 10, 5))))
+        rows.append((f"{label}: memory", measure(lambda: lookup(memory), repeat=args.repeat)))
+        rows.append((f"{label}: database query", measure(lambda: uncached(lookup), repeat=args.repeat)))
+        rows.append((f"{label}: database cached", measure(lambda: lookup(database), repeat=args.repeat)))
+    print_table(f"Lookups on {len(df):,} rows", rows)
+
+    print("\nQuery plans")
+    for filters in ({'country': country}, {'country': country, 'city': city, 'university': university}):
+        queryset = EducationCost.objects.filter(**filters).order_by('city').values_list('city', flat=True).distinct()
+        with connection.cursor() as cursor:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            print(f"  {', '.join(filters)}: {'; '.join(row[-1] for row in cursor.fetchall())}")
+
+    print(f"\nDatabase vs memory results: {'identical' if not mismatches else f'DIFFERENT for {mismatches}'}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
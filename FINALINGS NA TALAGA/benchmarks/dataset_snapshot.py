@@ -0,0 +1,112 @@
+"""
+Load time and peak memory of the dataset: pd.read_csv vs the columnar snapshot.
+
+For each --rows size, the dataset CSV is grown to that many synthetic rows
+(each copy of it gets its own universities, so the string dictionaries grow
+too) and its snapshot is written with write_snapshot(). Each loader then runs
+in a fresh interpreter, which reports the peak RSS of its first load (over
+the RSS before it, with pandas already imported) and the median time of
+--repeat loads. The snapshot must load to a DataFrame equal to the CSV's,
+dtypes included (the script exits with status 1 otherwise).
+
+Usage: python -m benchmarks.dataset_snapshot [--rows 1000 100000 1000000] [--repeat N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import PROJECT_DIR, setup_django
+
+RUNNER = r"""
+import json, statistics, sys, time
+sys.path.insert(0, {project_dir!r})
+from benchmarks.common import setup_django
+setup_django()
+from io import BytesIO
+import pandas as pd
+from predictor.snapshot import read_snapshot
+
+def status_kb(field):
+    with open('/proc/self/status') as file:
+        return next(int(line.split()[1]) for line in file if line.startswith(field))
+
+def load():
+    if {loader!r} == 'csv':
+        with open({path!r}, 'rb') as file:
+            return pd.read_csv(BytesIO(file.read()))
+    return read_snapshot({path!r})
+
+# VmHWM, unlike ru_maxrss, isn't inherited from the (much larger) parent process
+before = status_kb('VmRSS:')
+df = load()
+peak = status_kb('VmHWM:')
+del df
+timings = []
+for _ in range({repeat}):
+    start = time.perf_counter()
+    load()
+    timings.append(time.perf_counter() - start)
+print(json.dumps({{'seconds': statistics.median(timings), 'peak_mb': (peak - before) / 1024}}))
+"""
+
+
+def run(loader, path, repeat):
+    """Load a file in a fresh interpreter and return its timing and memory results."""
+    code = RUNNER.format(project_dir=PROJECT_DIR, loader=loader, path=path, repeat=repeat)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=PROJECT_DIR, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    import pandas as pd
+    from predictor.dataset import get_dataset
+    from predictor.snapshot import read_snapshot, write_snapshot
+
+    base = get_dataset().df
+    directory = tempfile.mkdtemp(prefix='dataset-snapshot-')
+    mismatches = []
+    print(f"{'rows':>10}{'loader':>10}{'file MB':>10}{'load s':>10}{'peak RSS MB':>13}{'speedup':>9}")
+    for rows in args.rows:
+        copies = []
+        for i in range(rows // len(base) + 1):
+            copy = base.copy()
+            if i:
+                copy['University'] = copy['University'] + f' #{i}'
+            copies.append(copy)
+        df = pd.concat(copies, ignore_index=True).head(rows)
+        csv_path = os.path.join(directory, f'{rows}.csv')
+        snapshot_path = os.path.join(directory, f'{rows}.npz')
+        df.to_csv(csv_path, index=False)
+        write_snapshot(pd.read_csv(csv_path), snapshot_path)
+        try:
+            pd.testing.assert_frame_equal(pd.read_csv(csv_path), read_snapshot(snapshot_path), check_exact=True)
+        except AssertionError:
+            mismatches.append(rows)
+
+        results = {loader: run(loader, path, args.repeat)
+                   for loader, path in (('csv', csv_path), ('snapshot', snapshot_path))}
+        for loader, path in (('csv', csv_path), ('snapshot', snapshot_path)):
+            result = results[loader]
+            speedup = results['csv']['seconds'] / result['seconds']
+            print(f"{rows:>10,}{loader:>10}{os.path.getsize(path) / 2 ** 20:>10.1f}{result['seconds']:>10.3f}"
+                  f"{result['peak_mb']:>13.1f}{speedup:>8.1f}x")
+        for path in (csv_path, snapshot_path):
+            os.remove(path)
+
+    print(f"\nSnapshot vs CSV DataFrames: {'identical' if not mismatches else f'DIFFERENT at {mismatches} rows'}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
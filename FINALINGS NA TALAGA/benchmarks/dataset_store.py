@@ -0,0 +1,96 @@
+"""
+Per-request latency of the cascade API endpoints, before and after the
+shared dataset store.
+
+"Before" re-implements the original endpoints, which parsed the CSV with
+pd.read_csv and filtered it with boolean masks on every call. "After" calls
+the current views, which answer from the in-memory hierarchical index.
+
+Usage: python -m benchmarks.dataset_store [--repeat N]
+"""
+import argparse
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def legacy_endpoints(csv_path):
+    """The original read_csv + mask implementations, for comparison."""
+    import pandas as pd
+    from django.http import JsonResponse
+
+    def cities(country):
+        df = pd.read_csv(csv_path)
+        return JsonResponse(sorted(df[df['Country'] == country]['City'].unique().tolist()), safe=False)
+
+    def universities(country, city):
+        df = pd.read_csv(csv_path)
+        mask = (df['Country'] == country) & (df['City'] == city)
+        return JsonResponse(sorted(df[mask]['University'].unique().tolist()), safe=False)
+
+    def programs(country, city, university):
+        df = pd.read_csv(csv_path)
+        mask = (df['Country'] == country) & (df['City'] == city) & (df['University'] == university)
+        return JsonResponse(sorted(df[mask]['Program'].unique().tolist()), safe=False)
+
+    def university_data(country, city, university):
+        df = pd.read_csv(csv_path)
+        mask = (df['Country'] == country) & (df['City'] == city) & (df['University'] == university)
+        return JsonResponse(df[mask].to_dict(orient='records'), safe=False)
+
+    def program_details(country, city, university, program):
+        df = pd.read_csv(csv_path)
+        mask = ((df['Country'] == country) & (df['City'] == city) &
+                (df['University'] == university) & (df['Program'] == program))
+        return JsonResponse(df[mask].to_dict(orient='records'), safe=False)
+
+    return cities, universities, programs, university_data, program_details
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import RequestFactory
+    from predictor import views
+    from predictor.dataset import CSV_PATH, get_dataset
+
+    record = get_dataset().records[0]
+    country, city = record['Country'], record['City']
+    university, program = record['University'], record['Program']
+    factory = RequestFactory()
+    prefix = {'country': country, 'city': city, 'university': university}
+
+    cities, universities, programs, university_data, program_details = legacy_endpoints(CSV_PATH)
+    before = [
+        ('cities_api', measure(lambda: cities(country), args.repeat)),
+        ('universities_api', measure(lambda: universities(country, city), args.repeat)),
+        ('programs_api', measure(lambda: programs(country, city, university), args.repeat)),
+        ('university_data_api', measure(lambda: university_data(country, city, university), args.repeat)),
+        ('program_details_api',
+         measure(lambda: program_details(country, city, university, program), args.repeat)),
+    ]
+
+    def call(view, params):
+        return lambda: view(factory.get('/', params))
+
+    after = [
+        ('cities_api', measure(call(views.cities_api, {'country': country}), args.repeat)),
+        ('universities_api',
+         measure(call(views.universities_api, {'country': country, 'city': city}), args.repeat)),
+        ('programs_api', measure(call(views.programs_api, prefix), args.repeat)),
+        ('university_data_api', measure(call(views.university_data_api, prefix), args.repeat)),
+        ('program_details_api',
+         measure(call(views.program_details_api, dict(prefix, program=program)), args.repeat)),
+    ]
+
+    print_table('Before: pd.read_csv + boolean mask per request', before)
+    print_table('After: shared indexed dataset store', after)
+    print('\nSpeed-up (p50):')
+    for (label, old), (_, new) in zip(before, after):
+        print(f"  {label:<38}{old['p50_ms'] / new['p50_ms']:>10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
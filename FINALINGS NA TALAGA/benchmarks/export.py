@@ -0,0 +1,126 @@
+"""
+Time and memory of dataset exports: one JsonResponse vs the streamed export.
+
+The dataset CSV is repeated to --rows rows and each case consumes a whole
+response, measuring its wall time, the peak memory allocated while it is
+built and consumed (tracemalloc, in a second pass on a new dataset version,
+as it slows the code down) and its size on the wire:
+
+- JsonResponse: the old education_data_api, json.dumps of every record
+- streamed json/ndjson/csv, uncompressed and gzip: the first request of a
+  dataset version writes the compressed full export (serialized a chunk at
+  a time), later ones stream it from the file (decompressing it for the
+  uncompressed ones), as every other request does
+- a filtered, projected 1000-row page
+
+Every format, compressed or not, must decode to the dataset's records (the
+JSON export byte for byte as JsonResponse wrote it), and so must the page
+to the records it selects. The script exits with status 1 if a check fails.
+
+Usage: python -m benchmarks.export [--rows N]
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import setup_django
+
+
+def consume(make_response, trace=False):
+    """Build a response and read all of it; return seconds, bytes and peak MB allocated if traced."""
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    response = make_response()
+    size = 0
+    for chunk in (response.streaming_content if response.streaming else [response.content]):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    settings.EXPORT_CACHE_DIR = tempfile.mkdtemp(prefix='export-benchmark-')
+    settings.ALLOWED_HOSTS = ['testserver']
+    import pandas as pd
+    from django.http import JsonResponse
+    from django.test import RequestFactory
+    from predictor.dataset import EducationDataset, get_dataset
+    from predictor.export import export_response
+
+    base = get_dataset().df
+    df = pd.concat([base] * (args.rows // len(base) + 1), ignore_index=True).head(args.rows)
+    factory = RequestFactory()
+
+    def cases(dataset):
+        def streamed(params, compress):
+            headers = {'HTTP_ACCEPT_ENCODING': 'gzip'} if compress else {}
+            return lambda: export_response(factory.get('/api/education_data/', params, **headers), dataset)
+
+        yield 'JsonResponse (before)', lambda: JsonResponse(dataset.records, safe=False)
+        for fmt in ('json', 'ndjson', 'csv'):
+            yield f'{fmt}, first request', streamed({'format': fmt}, False)
+            yield f'{fmt}', streamed({'format': fmt}, False)
+            yield f'{fmt} gzip, first request', streamed({'format': fmt}, True)
+            yield f'{fmt} gzip', streamed({'format': fmt}, True)
+        yield 'ndjson page: filtered, 3 fields, 1000 rows', streamed(
+            {'format': 'ndjson', 'level': 'Master', 'fields': 'country,city,tuition_usd', 'limit': '1000'}, True)
+
+    timed = [(label, consume(make_response)) for label, make_response in
+             cases(EducationDataset(df, f'benchmark-{args.rows}'))]
+    traced = [consume(make_response, trace=True)[2] for _, make_response in
+              cases(EducationDataset(df, f'benchmark-{args.rows}-traced'))]
+
+    print(f"{len(df):,} rows")
+    print(f"{'case':<46}{'seconds':>9}{'peak MB':>10}{'KB sent':>10}")
+    for (label, (elapsed, size, _)), peak in zip(timed, traced):
+        print(f"{label:<46}{elapsed:>9.3f}{peak:>10.1f}{size / 1024:>10.0f}")
+
+    dataset = EducationDataset(df, f'benchmark-{args.rows}')
+    streamed = dict(cases(dataset))
+    problems = []
+    # The streamed JSON must be the same document as before
+    legacy = JsonResponse(dataset.records, safe=False).content
+    records = json.loads(legacy)
+    as_text = {column: str for column in df.columns if df[column].dtype.kind not in 'iuf'}
+    for fmt in ('json', 'ndjson', 'csv'):
+        plain = b''.join(streamed[fmt]().streaming_content)
+        if gzip.decompress(b''.join(streamed[f'{fmt} gzip']().streaming_content)) != plain:
+            problems.append(f"{fmt}: gzip and uncompressed exports differ")
+        if fmt == 'json':
+            same = plain == legacy
+        elif fmt == 'ndjson':
+            same = [json.loads(line) for line in plain.decode().splitlines()] == records
+        else:
+            same = [{key: as_text.get(key, float)(value) for key, value in row.items()}
+                    for row in csv.DictReader(io.StringIO(plain.decode(), newline=''))] == records
+        if not same:
+            problems.append(f"{fmt}: the export doesn't decode to the dataset's records")
+    page = b''.join(streamed['ndjson page: filtered, 3 fields, 1000 rows']().streaming_content)
+    expected = [{'Country': record['Country'], 'City': record['City'], 'Tuition_USD': record['Tuition_USD']}
+                for record in records if record['Level'] == 'Master'][:1000]
+    if [json.loads(line) for line in gzip.decompress(page).decode().splitlines()] != expected:
+        problems.append("the filtered page doesn't match the dataset")
+    print(f"\nStreamed exports vs JsonResponse and the dataset: {'; '.join(problems) if problems else 'OK'}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Equivalence check and single-row latency of the fast path predictor.
+
+Every row of the dataset is scored by the sklearn Pipeline and by the fast
+path (row by row and as one batch); the outputs must be bit-for-bit
+identical or the script exits with status 1. It then compares the p50
+latency of a single prediction through the pandas/Pipeline path and through
+the fast path, with the result cache bypassed.
+
+Usage: python -m benchmarks.fast_path [--repeat N]
+"""
+import argparse
+import sys
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    import pickle
+    import numpy as np
+    from predictor.cache import make_cache_key
+    from predictor.dataset import get_dataset
+    from predictor.fast_path import FastPathPredictor
+    from predictor.ml_model import FEATURE_COLUMNS, MODEL_PATH, EducationCostPredictor, LoadedModel
+    from predictor.precomputed import PrecomputedPredictions
+
+    # Always compare against the pickled Pipeline, even if the app loads a native artifact
+    with open(MODEL_PATH, 'rb') as file:
+        pipeline = pickle.load(file)
+    fast_path = FastPathPredictor.from_pipeline(pipeline, FEATURE_COLUMNS)
+    active = LoadedModel(pipeline, 'benchmark', fast_path)
+    # A predictor that doesn't load the app's model, without micro-batching, the
+    # inference pool or the precomputed table, so only the model call is timed
+    predictor = object.__new__(EducationCostPredictor)
+    predictor.batcher = None
+    predictor.pool = None
+    predictor.precomputed = PrecomputedPredictions(enabled=False)
+    dataset = get_dataset()
+
+    rows = [{key.lower(): value for key, value in record.items()} for record in dataset.records]
+    features = [make_cache_key(row) for row in rows]
+    expected = pipeline.predict(dataset.df[FEATURE_COLUMNS])
+    batch = fast_path.predict(features)
+    single = np.array([fast_path.predict_one(row) for row in features], dtype=expected.dtype)
+
+    mismatches = int((batch != expected).sum() + (single != expected).sum())
+    print(f"Equivalence over {len(rows)} dataset rows: "
+          f"{'identical' if not mismatches else f'{mismatches} MISMATCHES'} "
+          f"(max abs diff {float(np.abs(batch - expected).max()):.6g})")
+
+    def checked(predict):
+        """Fail on an error result, which would otherwise be timed as a (very fast) prediction."""
+        def call():
+            result = predict()
+            assert 'error' not in result, result['error']
+        return call
+
+    row, key = rows[0], features[0]
+    results = [
+        ('Pipeline (pandas + ColumnTransformer)',
+         measure(checked(lambda: predictor._predict(dict(row), active)), args.repeat)),
+        ('predictor fast path (with cost math)',
+         measure(checked(lambda: predictor._predict_fast(key, active)), args.repeat)),
+        ('FastPathPredictor.predict_one only', measure(lambda: fast_path.predict_one(key), args.repeat)),
+    ]
+    print_table('Single-row prediction latency', results)
+    print(f"\np50 speed-up: {results[0][1]['p50_ms'] / results[1][1]['p50_ms']:.1f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Check model hot reload: new versions are swapped in without stalling requests.
+
+Works on a copy of trained_model.pkl in a temporary directory. While threads
+keep predicting, the copy is replaced four times: by a re-serialized (so
+differently hashed) pickle, which must be swapped in; by a corrupt file,
+which must be rejected while the previous version keeps serving; by the
+pickle again plus a native artifact exported from it, which must be swapped
+in; and by a retrained (here, re-serialized again) pickle, which makes the
+artifact stale, so the pickle must be swapped in. The request latency
+during the reloads is reported. Exits with status 1 if a check fails.
+
+Usage: python -m benchmarks.hot_reload [--threads N]
+"""
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import PROJECT_DIR, setup_django
+
+ROW = {
+    'country': 'USA', 'city': 'Cambridge', 'university': 'Harvard University',
+    'program': 'Computer Science', 'level': 'Master', 'duration_years': '2.0',
+    'living_cost_index': '83.5', 'rent_usd': '2200', 'visa_fee_usd': '160',
+    'insurance_usd': '1500', 'exchange_rate': '1.0',
+}
+INTERVAL = 0.2
+
+
+def wait_for(predictor, condition, timeout=10):
+    """Keep predicting (which triggers the checks) until condition(result) holds."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = predictor.predict(dict(ROW))
+        if condition(result):
+            return result
+        time.sleep(INTERVAL / 2)
+    return predictor.predict(dict(ROW))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        model_path = os.path.join(directory, 'trained_model.pkl')
+        shutil.copy(os.path.join(PROJECT_DIR, 'trained_model.pkl'), model_path)
+
+        setup_django()
+        from django.conf import settings
+        settings.MODEL_PATH = model_path
+        settings.MODEL_ARTIFACT_DIR = os.path.join(directory, 'model_artifact')
+        settings.MODEL_RELOAD_INTERVAL = INTERVAL
+        from predictor.artifact import export_artifact
+        from predictor.ml_model import FEATURE_COLUMNS, EducationCostPredictor
+
+        predictor = EducationCostPredictor()
+        first = predictor.predict(dict(ROW))
+        with open(model_path, 'rb') as file:
+            pipeline = pickle.load(file)
+
+        latencies, stop = [], threading.Event()
+
+        def client():
+            while not stop.is_set():
+                start = time.perf_counter()
+                predictor.predict(dict(ROW))
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        clients = [threading.Thread(target=client) for _ in range(args.threads)]
+        for thread in clients:
+            thread.start()
+
+        failures = []
+        with open(model_path, 'wb') as file:
+            file.write(pickle.dumps(pipeline, protocol=4))
+        second = wait_for(predictor, lambda result: result['model_version'] != first['model_version'])
+        if second['model_version'] == first['model_version']:
+            failures.append("re-serialized pickle was not swapped in")
+        if second['total_cost_usd'] != first['total_cost_usd']:
+            failures.append("swapped-in model predicts differently")
+
+        with open(model_path, 'wb') as file:
+            file.write(b'not a pickle')
+        time.sleep(INTERVAL * 5)
+        if predictor.predict(dict(ROW))['model_version'] != second['model_version']:
+            failures.append("corrupt model file was not rejected")
+
+        with open(model_path, 'wb') as file:
+            file.write(pickle.dumps(pipeline, protocol=4))
+        manifest = export_artifact(pipeline, settings.MODEL_ARTIFACT_DIR, FEATURE_COLUMNS, source_path=model_path)
+        third = wait_for(predictor, lambda result: result['model_version'] == manifest['version'])
+        if third['model_version'] != manifest['version'] or predictor.get_model_info()['model_version'] != manifest['version']:
+            failures.append("exported artifact was not swapped in")
+
+        with open(model_path, 'wb') as file:
+            file.write(pickle.dumps(pipeline, protocol=3))
+        fourth = wait_for(predictor, lambda result: result['model_version'] not in (
+            manifest['version'], second['model_version']))
+        if fourth['model_version'] in (manifest['version'], second['model_version']) or predictor.active.source[0] != 'pickle':
+            failures.append("retrained pickle was not swapped in over the stale artifact")
+
+        stop.set()
+        for thread in clients:
+            thread.join()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    latencies.sort()
+    print(f"\nVersions served: {first['model_version']} -> {second['model_version']} -> {third['model_version']} -> {fourth['model_version']}")
+    print(f"{len(latencies)} predictions from {args.threads} threads during the reloads: "
+          f"p50 {latencies[len(latencies) // 2]:.3f} ms, p99 {latencies[int(len(latencies) * 0.99)]:.3f} ms, "
+          f"max {latencies[-1]:.1f} ms")
+    if failures:
+        print("FAILED: " + '; '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Throughput of threaded inference in-process vs on the inference pool.
+
+Client threads call EducationCostPredictor.predict_batch() in a loop, with
+--rows dataset rows per call, for a fixed time: first with inference in the
+server process, then with an inference pool of each --sizes worker count
+(default 1 up to the number of cores), with twice as many clients as
+workers. The pool's predictions are also checked to be identical to the
+in-process ones (the script exits with status 1 otherwise).
+
+Throughput can only scale up to the number of cores of the machine the
+benchmark runs on; the core count is printed with the results.
+
+Usage: python -m benchmarks.inference_pool [--sizes 1 2 4] [--rows N] [--duration S]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+from benchmarks.common import setup_django
+
+
+def run(predictor, batches, clients, duration):
+    """Run closed-loop clients for `duration` seconds and return the predicted rows per second."""
+    counts = [0] * clients
+    barrier = threading.Barrier(clients + 1)
+    deadline = [0.0]
+
+    def client(i):
+        n = i
+        barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            n += 1
+            batch = batches[n % len(batches)]
+            predictor.predict_batch(batch)
+            counts[i] += len(batch)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration
+
+
+def wait_ready(pool, size, timeout=300):
+    start = time.perf_counter()
+    while pool.stats()['ready'] < size:
+        if time.perf_counter() - start > timeout:
+            raise RuntimeError(f"the pool didn't start: {pool.stats()}")
+        time.sleep(0.05)
+    return time.perf_counter() - start
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=sorted({1, 2, 4, cores} & set(range(1, cores + 1))))
+    parser.add_argument('--rows', type=int, default=64, help="Rows per predict_batch() call")
+    parser.add_argument('--duration', type=float, default=3.0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    settings.MODEL_RELOAD_INTERVAL = 0
+    from predictor.dataset import get_dataset
+    from predictor.inference_pool import InferencePool
+    from predictor.ml_model import EducationCostPredictor
+
+    predictor = EducationCostPredictor()
+    predictor.batcher = None
+    predictor.pool = None
+    rows = [{key.lower(): value for key, value in record.items()} for record in get_dataset().records]
+    batches = [rows[i:i + args.rows] for i in range(0, len(rows) - args.rows + 1, args.rows)]
+    expected = predictor.predict_batch(rows)['results']
+
+    print(f"{cores} core(s), {args.rows} rows per call, {args.duration:g} s per case, model {predictor.model_version}")
+    print(f"{'backend':<16}{'clients':>8}{'rows/s':>10}{'vs in-process':>15}{'start s':>9}")
+    baseline = {}
+    mismatches = 0
+    for size in args.sizes:
+        clients = 2 * size
+        if clients not in baseline:
+            predictor.pool = None
+            baseline[clients] = run(predictor, batches, clients, args.duration)
+            print(f"{'in-process':<16}{clients:>8}{baseline[clients]:>10.0f}{'':>15}{'':>9}")
+
+        pool = InferencePool(size, health_interval=0)
+        predictor.pool = pool
+        try:
+            # The first call starts the workers (and is scored in-process meanwhile)
+            predictor.predict_batch(batches[0])
+            started = wait_ready(pool, size)
+            mismatches += predictor.predict_batch(rows)['results'] != expected
+            per_s = run(predictor, batches, clients, args.duration)
+            stats = pool.stats()
+        finally:
+            pool.close()
+        print(f"{f'pool of {size}':<16}{clients:>8}{per_s:>10.0f}{per_s / baseline[clients]:>14.2f}x{started:>9.1f}"
+              + (f"  ({stats['fallbacks']} calls in-process)" if stats['fallbacks'] > 1 else ''))
+
+    print(f"\nPool vs in-process predictions on {len(rows)} rows: "
+          f"{'identical' if not mismatches else 'MISMATCHES'}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
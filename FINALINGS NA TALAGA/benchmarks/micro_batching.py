@@ -0,0 +1,121 @@
+"""
+Throughput of single-row predictions from many concurrent clients, with and
+without micro-batching.
+
+Each client is a thread calling EducationCostPredictor.predict() in a loop
+on dataset rows, with the result cache disabled, for a fixed time. This is
+done for the fast path and for the sklearn Pipeline path, at each client
+count, with batching off and on. Batched and unbatched predictions are also
+checked to be identical (the script exits with status 1 otherwise).
+
+Usage: python -m benchmarks.micro_batching [--clients 1 50 200 500] [--duration S]
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.common import setup_django
+
+
+def run(predictor, rows, clients, duration):
+    """Run closed-loop clients for `duration` seconds and return throughput and latency."""
+    latencies = [[] for _ in range(clients)]
+    barrier = threading.Barrier(clients + 1)
+    deadline = [0.0]
+
+    def client(i):
+        own = latencies[i]
+        n = i * 7
+        barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            n += 1
+            start = time.perf_counter()
+            predictor.predict(dict(rows[n % len(rows)]))
+            own.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    timings = sorted(t for own in latencies for t in own)
+    return {
+        'per_s': len(timings) / duration,
+        'p50_ms': statistics.median(timings) * 1000,
+        'p99_ms': timings[int(len(timings) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 50, 200, 500])
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    settings.PREDICTION_CACHE_SIZE = 0
+    settings.MODEL_RELOAD_INTERVAL = 0
+    import pickle
+    from predictor.batching import MicroBatcher
+    from predictor.dataset import get_dataset
+    from predictor.fast_path import FastPathPredictor
+    from predictor.ml_model import FEATURE_COLUMNS, MODEL_PATH, EducationCostPredictor, LoadedModel, predict_rows
+
+    with open(MODEL_PATH, 'rb') as file:
+        pipeline = pickle.load(file)
+    paths = {
+        'fast path': LoadedModel(pipeline, 'benchmark', FastPathPredictor.from_pipeline(pipeline, FEATURE_COLUMNS)),
+        'Pipeline': LoadedModel(pipeline, 'benchmark', None),
+    }
+    rows = [{key.lower(): value for key, value in record.items()} for record in get_dataset().records]
+    predictor = EducationCostPredictor()
+
+    def batcher():
+        return MicroBatcher(predict_rows, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000)
+
+    # Batching must not change any prediction
+    mismatches = 0
+    for active in paths.values():
+        predictor.active = active
+        predictor.batcher = None
+        expected = [predictor.predict(dict(row)) for row in rows[:200]]
+        predictor.batcher = batcher()
+        results = [None] * 200
+        threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, predictor.predict(dict(rows[i]))))
+                   for i in range(200)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        mismatches += sum(a != b for a, b in zip(expected, results))
+    print(f"Batched vs unbatched predictions on 200 rows per path: "
+          f"{'identical' if not mismatches else f'{mismatches} MISMATCHES'}")
+
+    print(f"\nmax batch size {args.max_batch_size}, max wait {args.max_wait_ms:g} ms, {args.duration:g} s per case")
+    print(f"{'path':<11}{'clients':>8}{'unbatched/s':>13}{'p99 ms':>9}{'batched/s':>12}{'p99 ms':>9}"
+          f"{'avg batch':>11}{'speed-up':>10}")
+    for name, active in paths.items():
+        predictor.active = active
+        for clients in args.clients:
+            predictor.batcher = None
+            plain = run(predictor, rows, clients, args.duration)
+            predictor.batcher = batcher()
+            batched = run(predictor, rows, clients, args.duration)
+            stats = predictor.batcher.stats()
+            print(f"{name:<11}{clients:>8}{plain['per_s']:>13.0f}{plain['p99_ms']:>9.1f}{batched['per_s']:>12.0f}"
+                  f"{batched['p99_ms']:>9.1f}{stats['avg_batch_size']:>11.1f}{batched['per_s'] / plain['per_s']:>9.1f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Cold-start cost of the two model loaders, each measured in a fresh interpreter.
+
+"pickle" unpickles trained_model.pkl and makes one prediction. "native"
+reads the exported artifact's manifest, loads the memory-mapped booster and
+makes the same prediction. Importing xgboost (which pulls in pandas and
+sklearn) is timed separately, since both loaders pay for it. Export the
+artifact first with ``python manage.py convert_model_artifact``.
+
+Usage: python -m benchmarks.model_loading [--runs N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import PROJECT_DIR
+
+PICKLE_LOADER = """
+import time
+start = time.perf_counter()
+import pickle
+import pandas as pd
+import xgboost
+imported = time.perf_counter()
+with open({model_path!r}, 'rb') as file:
+    model = pickle.load(file)
+loaded = time.perf_counter()
+model.predict(pd.DataFrame([{row!r}]))
+print((imported - start) * 1000, (loaded - imported) * 1000, (time.perf_counter() - loaded) * 1000)
+"""
+
+NATIVE_LOADER = """
+import time
+start = time.perf_counter()
+import os, sys
+sys.path.insert(0, {project_dir!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'education_cost_predictor.settings')
+import xgboost
+from predictor.artifact import NativeModel
+imported = time.perf_counter()
+model = NativeModel({artifact_dir!r})
+model.fast_path
+loaded = time.perf_counter()
+model.predict_one({features!r})
+print((imported - start) * 1000, (loaded - imported) * 1000, (time.perf_counter() - loaded) * 1000)
+"""
+
+
+def run(code, runs):
+    """Run a loader script in fresh interpreters and return the median timings."""
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=PROJECT_DIR, check=True).stdout.split()
+        timings.append([float(value) for value in output[-3:]])
+    return [statistics.median(column) for column in zip(*timings)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    model_path = os.path.join(PROJECT_DIR, 'trained_model.pkl')
+    artifact_dir = os.path.join(PROJECT_DIR, 'model_artifact')
+    if not os.path.isfile(os.path.join(artifact_dir, 'manifest.json')):
+        sys.exit("No model artifact found, run 'python manage.py convert_model_artifact' first")
+
+    row = {
+        'Country': 'USA', 'City': 'Cambridge', 'University': 'Harvard University',
+        'Program': 'Computer Science', 'Level': 'Master', 'Duration_Years': 2.0,
+        'Living_Cost_Index': 83.5, 'Rent_USD': 2200.0, 'Visa_Fee_USD': 160.0,
+        'Insurance_USD': 1500.0, 'Exchange_Rate': 1.0,
+    }
+    with open(os.path.join(artifact_dir, 'manifest.json')) as file:
+        features = tuple(row[column] for column in json.load(file)['feature_columns'])
+
+    results = {
+        'pickle': run(PICKLE_LOADER.format(model_path=model_path, row=row), args.runs),
+        'native': run(NATIVE_LOADER.format(project_dir=PROJECT_DIR, artifact_dir=artifact_dir,
+                                           features=features), args.runs),
+    }
+    print(f"Median of {args.runs} cold starts (ms)")
+    print(f"{'loader':<10}{'imports':>12}{'load model':>14}{'first prediction':>20}")
+    for name, (import_ms, load_ms, first_ms) in results.items():
+        print(f"{name:<10}{import_ms:>12.1f}{load_ms:>14.1f}{first_ms:>20.1f}")
+    print(f"\nnative model load is {results['pickle'][1] / results['native'][1]:.1f}x faster, "
+          f"load + first prediction {sum(results['pickle'][1:]) / sum(results['native'][1:]):.1f}x faster")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Latency of predict() answered from the precomputed prediction table vs running the model.
+
+The table of the dataset is built with `manage.py precompute_predictions`
+(in a temporary DATASET_PREDICTIONS_DIR), and every dataset row is predicted
+with the result cache disabled: from the table, and through the model (the
+fast path). The answers must be identical (the script exits with status 1
+otherwise). An input that isn't in the table (a changed rent, as a manual
+value would be) shows the cost of the lookup before falling back to the model.
+
+A table of --rows synthetic keys is then written and looked up, to show the
+lookup time doesn't grow with the table.
+
+Usage: python -m benchmarks.precomputed_predictions [--rows N] [--repeat N]
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    import numpy as np
+    from django.conf import settings
+    from django.core.management import call_command
+
+    directory = tempfile.mkdtemp(prefix='precomputed-predictions-')
+    # Set before the app modules are imported, as they read it at import time
+    settings.DATASET_PREDICTIONS_DIR = directory
+    from predictor.dataset import get_dataset
+    from predictor.ml_model import EducationCostPredictor
+    from predictor.precomputed import PredictionTable, write_table
+
+    call_command('precompute_predictions', stdout=open(os.devnull, 'w'))
+    predictor = EducationCostPredictor()
+    predictor.cache.maxsize = 0
+    rows = [{key.lower(): value for key, value in record.items() if key != 'Tuition_USD'}
+            for record in get_dataset().records]
+
+    predictor.precomputed.enabled = True
+    from_table = [predictor.predict(dict(row)) for row in rows]
+    hits = predictor.precomputed.hits
+    predictor.precomputed.enabled = False
+    from_model = [predictor.predict(dict(row)) for row in rows]
+
+    def timed(enabled, data):
+        predictor.precomputed.enabled = enabled
+        cycle = itertools.cycle(data)
+        return measure(lambda: predictor.predict(dict(next(cycle))), repeat=args.repeat)
+
+    unseen = [dict(row, rent_usd=row['rent_usd'] + 1) for row in rows]
+    print_table(f"predict() latency, {len(rows)} dataset rows, result cache disabled", [
+        ('table: dataset combination', timed(True, rows)),
+        ('model: dataset combination', timed(False, rows)),
+        ('table miss, then model: unseen input', timed(True, unseen)),
+    ])
+
+    keys = [(f'Country {i % 100}', f'City {i % 5000}', f'University {i}', 'Computer Science', 'Master',
+             2.0, 70.0, float(i % 3000), 160.0, 1500.0, 1.0) for i in range(args.rows)]
+    path = os.path.join(directory, 'synthetic.table.npy')
+    start = time.perf_counter()
+    write_table(keys, np.arange(args.rows, dtype=np.float64), path)
+    written = time.perf_counter() - start
+    table = PredictionTable(path, None)
+    cycle = itertools.cycle(keys[::max(1, args.rows // 1000)])
+    print_table(f"Table of {args.rows:,} keys ({os.path.getsize(path) / 2 ** 20:.1f} MB, written in {written:.1f} s)", [
+        ('PredictionTable.get', measure(lambda: table.get(next(cycle)), repeat=args.repeat)),
+    ])
+
+    identical = from_table == from_model and hits == len(rows)
+    print(f"\nTable vs model answers for {len(rows)} dataset rows ({hits} from the table): "
+          f"{'identical' if identical else 'DIFFERENT'}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Latency of a what-if sweep through /api/predict/sweep/ compared with one submission of the predict form.
+
+A dataset row is the base scenario. The form is posted to the predict view
+with a new manually entered rent each time, so each submission is a result
+cache miss, as when a user edits one field and resubmits. The sweep API then prices
+--grid N x N combinations of rent and duration (and a rent-only sweep of N
+values) in one request. The loop estimate is what the grid would take as
+one form submission per point.
+
+The sweep's surfaces are checked against predict_batch() on the same
+scenarios (the script exits with status 1 if they differ).
+
+Usage: python -m benchmarks.predict_sweep [--grid N] [--repeat N]
+"""
+import argparse
+import itertools
+import json
+import sys
+
+from benchmarks.common import measure, print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--grid', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+    import numpy as np
+    from django.contrib.auth.models import User
+    from django.test import RequestFactory
+    from predictor import views
+    from predictor.dataset import get_dataset
+    from predictor.ml_model import EducationCostPredictor
+
+    base = {key.lower(): value for key, value in get_dataset().records[0].items() if key != 'Tuition_USD'}
+    factory = RequestFactory()
+    user = User(username='benchmark')
+    rents = itertools.count(1000)
+
+    manual = {f'{field}_manual': base[field]
+              for field in ('living_cost_index', 'visa_fee_usd', 'insurance_usd', 'exchange_rate')}
+
+    def submit_form():
+        data = dict(base, **manual, use_manual_values='on', rent_usd_manual=next(rents))
+        request = factory.post('/predict/', data)
+        request.user = user
+        response = views.predict(request)
+        assert response.status_code == 200 and b'Prediction Results' in response.content
+
+    def sweep(axes):
+        body = json.dumps({'base': base, 'axes': axes})
+        request = factory.post('/api/predict/sweep/', body, content_type='application/json')
+        request.user = user
+        response = views.predict_sweep_api(request)
+        assert response.status_code == 200, response.content[:200]
+        return json.loads(response.content)
+
+    rent_values = np.linspace(500, 3000, args.grid).round(2).tolist()
+    duration_values = np.linspace(1, 6, args.grid).round(2).tolist()
+    grid_axes = [{'field': 'rent_usd', 'values': rent_values}, {'field': 'duration_years', 'values': duration_values}]
+    rent_axes = grid_axes[:1]
+
+    form = measure(submit_form, repeat=args.repeat)
+    rows = [
+        ('predict form, one scenario', form),
+        (f'sweep API, {args.grid} rents', measure(lambda: sweep(rent_axes), repeat=args.repeat)),
+        (f'sweep API, {args.grid}x{args.grid} grid', measure(lambda: sweep(grid_axes), repeat=args.repeat)),
+    ]
+    print_table("Latency", rows)
+    points = args.grid * args.grid
+    print(f"\nOne form submission per grid point: ~{form['p50_ms'] * points:.0f} ms for {points:,} points")
+
+    result = sweep(grid_axes)
+    scenarios = [dict(base, rent_usd=rent, duration_years=duration)
+                 for rent in rent_values for duration in duration_values]
+    batch = EducationCostPredictor().predict_batch(scenarios)['results']
+    identical = all(
+        np.array_equal(np.asarray(result[key]).ravel(), [row[key] for row in batch])
+        for key in ('estimated_tuition_usd', 'living_expenses_usd', 'total_cost_usd'))
+    print(f"Sweep surfaces vs predict_batch(): {'identical' if identical else 'DIFFERENT'}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Cost of explaining predictions (predict(explain=True), /api/predict/batch/?explain=1) compared with plain predictions.
+
+Dataset rows are predicted with the result cache and the precomputed table
+disabled, one at a time through predict() and as batches through
+predict_batch(), with and without explanations: the approximate per-leaf
+contributions (the default) and the exact TreeSHAP values
+(PREDICTION_EXPLAIN_EXACT). The default explanations must cost less than
+--max-overhead times the plain prediction.
+
+Every dataset row is checked too: explained predictions must be identical to
+plain ones, the base value and contributions must add up to the tuition, the
+leaves found by walking the trees (small batches) must be the booster's
+(pred_leaf, large batches), and the approximate contributions must match the
+booster's own (booster.predict(..., pred_contribs=True, approx_contribs=True)).
+The script exits with status 1 if a check fails.
+
+Usage: python -m benchmarks.prediction_explanations [--max-overhead X] [--repeat N]
+"""
+import argparse
+import itertools
+import sys
+
+from benchmarks.common import measure, print_table, setup_django
+
+BATCH_SIZES = (64, 907)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-overhead', type=float, default=2.0)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    import numpy as np
+    import xgboost
+    from predictor import ml_model
+    from predictor.dataset import get_dataset
+    from predictor.ml_model import EducationCostPredictor, explainer
+
+    predictor = EducationCostPredictor()
+    predictor.cache.maxsize = 0
+    predictor.precomputed.enabled = False
+    rows = [{key.lower(): value for key, value in record.items() if key != 'Tuition_USD'}
+            for record in get_dataset().records]
+    batches = {size: [rows[i % len(rows)] for i in range(size)] for size in BATCH_SIZES}
+
+    def timed_predict(explain):
+        cycle = itertools.cycle(rows)
+        return measure(lambda: predictor.predict(dict(next(cycle)), explain=explain), repeat=args.repeat)
+
+    def timed_batch(size, explain):
+        return measure(lambda: predictor.predict_batch(batches[size], explain=explain),
+                       repeat=max(10, args.repeat // size * 4))
+
+    plain = {'predict': timed_predict(False)}
+    explained = {'predict': timed_predict(True)}
+    ml_model.PREDICTION_EXPLAIN_EXACT = True
+    exact = {'predict': timed_predict(True)}
+    for size in BATCH_SIZES:
+        exact[size] = timed_batch(size, True)
+    ml_model.PREDICTION_EXPLAIN_EXACT = False
+    for size in BATCH_SIZES:
+        plain[size] = timed_batch(size, False)
+        explained[size] = timed_batch(size, True)
+
+    table = []
+    for case in ['predict'] + list(BATCH_SIZES):
+        label = 'predict(), one row' if case == 'predict' else f'predict_batch(), {case} rows'
+        table += [(f'{label}: plain', plain[case]), (f'{label}: explained', explained[case]),
+                  (f'{label}: exact TreeSHAP', exact[case])]
+    print_table("Latency, result cache and precomputed table disabled", table)
+    overheads = {case: explained[case]['p50_ms'] / plain[case]['p50_ms'] for case in plain}
+    print("\nExplained / plain (p50): " + ', '.join(
+        f"{'predict()' if case == 'predict' else f'{case} rows'} {ratio:.2f}x" for case, ratio in overheads.items()))
+
+    problems = []
+    if max(overheads.values()) > args.max_overhead:
+        problems.append(f"explanations cost more than {args.max_overhead}x the plain prediction")
+    plain_results = predictor.predict_batch(rows)['results']
+    explained_results = predictor.predict_batch(rows, explain=True)['results']
+    if [{key: value for key, value in result.items() if key != 'explanation'}
+            for result in explained_results] != plain_results:
+        problems.append("explained predictions differ from plain ones")
+    gaps = [abs(result['explanation']['base_value'] + sum(result['explanation']['contributions'].values())
+                - result['estimated_tuition_usd']) for result in explained_results]
+    # Each of the 12 rounded terms is off by up to half a cent, plus float32 rounding
+    if max(gaps) > 0.1:
+        problems.append(f"contributions are up to {max(gaps):.2f} USD off the tuition")
+
+    fast_path = explainer(predictor.active)
+    categories, numerics = fast_path.codes_frame(ml_model.prepare_features(
+        ml_model.pd.DataFrame.from_records(rows))[0])
+    _, contributions, base_value = fast_path.explain_codes(categories, numerics)
+    native = fast_path.booster.predict(
+        xgboost.DMatrix(fast_path.encode_codes(categories, numerics), missing=np.nan),
+        pred_contribs=True, approx_contribs=True, iteration_range=fast_path.iteration_range)
+    leaves = fast_path.booster.predict(
+        xgboost.DMatrix(fast_path.encode_codes(categories, numerics), missing=np.nan),
+        pred_leaf=True, iteration_range=fast_path.iteration_range).astype(np.intp)
+    trees = fast_path.tree_contributions()
+    if not np.array_equal(trees.leaves(fast_path.encode_codes(categories, numerics)), leaves + trees.offsets):
+        problems.append("walking the trees reaches different leaves than the booster")
+    by_feature = native[:, :-1].astype(np.float64) @ np.eye(len(fast_path.feature_columns))[fast_path.column_features]
+    # The booster computes them in float32
+    difference = max(np.abs(contributions - by_feature).max(), np.abs(base_value - native[:, -1]).max())
+    if difference > 0.05:
+        problems.append(f"contributions differ from the booster's approx_contribs by up to {difference:.3f}")
+
+    print(f"Largest gap between base value + contributions and the tuition: {max(gaps):.3f} USD")
+    print(f"Largest difference from the booster's approx_contribs: {difference:.4f} USD")
+    print(f"Checks for {len(rows)} dataset rows: {'; '.join(problems) if problems else 'OK'}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Build time, memory and query latency of the /api/search/ index on a synthetic vocabulary.
+
+--universities synthetic university names (built from generated place names,
+surnames and common words like "Technical University of ...") are spread
+over generated cities and countries, and indexed with SearchIndex together
+with those cities and the dataset's programs. Typical type-ahead queries are
+then timed, by kind: one and three letter prefixes, whole words, several
+word prefixes, misspelt words and queries matching nothing.
+
+The prefix results are checked against a linear scan of the ranked entries
+(the script exits with status 1 if they differ), and the share of misspelt
+words whose first result has the word they were misspelt from is reported.
+
+Usage: python -m benchmarks.search_index [--universities N] [--limit N] [--repeat N]
+"""
+import argparse
+import gc
+import itertools
+import random
+import sys
+import time
+
+from benchmarks.common import measure, print_table, setup_django
+
+SYLLABLES = [
+    'ka', 'lo', 'mi', 'ber', 'gen', 'ton', 'ville', 'stad', 'burg', 'ham', 'ford', 'ley', 'ria', 'no', 'sa',
+    'ta', 'vi', 'ro', 'mar', 'del', 'san', 'port', 'wick', 'dor', 'el', 'ar', 'in', 'os', 'us', 'ka', 'ze',
+    'lin', 'shi', 'ma', 'ra', 'ko', 'pe', 'qu', 'ji', 'bo',
+]
+KINDS = [
+    'University', 'State University', 'Institute of Technology', 'Polytechnic', 'College', 'Medical School',
+    'Business School', 'University of Applied Sciences', 'Conservatory', 'Academy of Arts', 'School of Economics',
+]
+ADJECTIVES = [
+    'Technical', 'National', 'Royal', 'Central', 'Northern', 'Southern', 'Eastern', 'Western', 'Catholic',
+    'Open', 'Free', 'Metropolitan', 'International', 'Federal', 'Pacific', 'Atlantic',
+]
+
+
+def place_names(rng, count):
+    """Distinct made-up place names, capitalized."""
+    names = set()
+    while len(names) < count:
+        names.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(names)
+
+
+def synthetic_entries(universities, programs, seed=0):
+    """Search entries of `universities` synthetic universities, their cities and the programs."""
+    rng = random.Random(seed)
+    countries = place_names(rng, 150)
+    cities = [(rng.choice(countries), city) for city in place_names(rng, max(universities // 20, 10))]
+    surnames = place_names(rng, max(universities // 10, 10))
+    names = set()
+    entries = []
+    while len(entries) < universities:
+        country, city = rng.choice(cities)
+        pattern = rng.randrange(4)
+        if pattern == 0:
+            name = f"University of {city}"
+        elif pattern == 1:
+            name = f"{city} {rng.choice(KINDS)}"
+        elif pattern == 2:
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(KINDS)} of {city}"
+        else:
+            name = f"{rng.choice(surnames)} {rng.choice(KINDS)}"
+        if (name, city) not in names:
+            names.add((name, city))
+            entries.append(('university', name, country, city))
+    entries.extend(('city', city, country, None) for country, city in cities)
+    entries.extend(('program', program, None, None) for program in programs)
+    return entries
+
+
+def misspell(rng, word):
+    """A word with one letter dropped, doubled or swapped with the next."""
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.randrange(3)
+    if edit == 0:
+        return word[:i] + word[i + 1:]
+    if edit == 1:
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def linear_search(index, entry_words, query, limit):
+    """The prefix matches of a query, by scanning every entry (and its words) in rank order."""
+    from predictor.search import words_of
+    terms = words_of(query)
+    found = []
+    for entry, words in zip(index.entries, entry_words):
+        if terms and all(any(word.startswith(term) for word in words) for term in terms):
+            found.append(entry)
+            if len(found) == limit:
+                break
+    return found
+
+
+def rss_mb():
+    with open('/proc/self/status') as file:
+        return next(int(line.split()[1]) for line in file if line.startswith('VmRSS:')) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--universities', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from predictor.dataset import get_dataset
+    from predictor.search import SearchIndex, words_of
+
+    entries = synthetic_entries(args.universities, get_dataset().programs())
+    gc.collect()
+    before = rss_mb()
+    start = time.perf_counter()
+    index = SearchIndex(entries, 'benchmark')
+    built = time.perf_counter() - start
+    gc.collect()
+    print(f"{len(index):,} entries ({args.universities:,} universities): indexed in {built:.2f} s, "
+          f"{rss_mb() - before:.0f} MB")
+
+    rng = random.Random(1)
+    universities = [entry for entry in index.entries if entry[0] == 'university']
+    sample = rng.sample(universities, 200)
+    rare_words = [max(words_of(name), key=len) for _, name, _, _ in sample]
+    typos = [(misspell(rng, word), word) for word in rare_words if len(word) >= 5]
+    queries = {
+        'one letter': list('abcdefghijklmnoprstuvw'),
+        'three letters': [word[:3] for word in rare_words],
+        'whole word': rare_words,
+        'several word prefixes': [' '.join(word[:4] for word in words_of(name)[:3]) for _, name, _, _ in sample],
+        'misspelt word': [typo for typo, _ in typos],
+        'no match': ['qqxz', 'zzyzx', 'xqj'],
+    }
+
+    rows = []
+    for label, texts in queries.items():
+        cycle = itertools.cycle(texts)
+        rows.append((label, measure(lambda: index.search(next(cycle), args.limit), repeat=args.repeat)))
+    print_table(f"Search latency, top {args.limit}", rows)
+
+    mismatches = []
+    entry_words = [words_of(name) for _, name, _, _ in index.entries]
+    for label in ('one letter', 'three letters', 'whole word', 'several word prefixes'):
+        for text in queries[label]:
+            prefix = [(result['type'], result['name'], result['country'], result['city'])
+                      for result in index.search(text, args.limit) if result['match'] == 'prefix']
+            if prefix != linear_search(index, entry_words, text, args.limit):
+                mismatches.append(text)
+    corrected = 0
+    for typo, word in typos:
+        results = index.search(typo, args.limit)
+        corrected += bool(results) and word in words_of(results[0]['name'])
+    print(f"\nMisspelt words whose first result has the intended word: {corrected}/{len(typos)}")
+    print(f"Prefix results vs a linear scan: {'identical' if not mismatches else f'DIFFERENT for {mismatches[:5]}'}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Worker start-up cost: import time and first-request latency in fresh interpreters.
+
+"startup" sets Django up and imports the URLconf (and so every view module),
+which is what a WSGI worker and every manage.py command pay. It is profiled
+with ``python -X importtime`` to report the total import time and the heavy
+libraries (pandas, numpy, matplotlib, sklearn, xgboost) that were imported.
+The first-request cases time one request from interpreter start.
+
+Light pages must not import any heavy library; if they do, the script exits
+with status 1, so it can be used to catch regressions.
+
+Usage: python -m benchmarks.startup [--runs N]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import PROJECT_DIR
+
+HEAVY_MODULES = ['pandas', 'numpy', 'matplotlib', 'sklearn', 'xgboost']
+
+STARTUP = """
+import os, sys
+sys.path.insert(0, {project_dir!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'education_cost_predictor.settings')
+import django
+django.setup()
+import education_cost_predictor.urls
+"""
+
+FIRST_REQUEST = """
+import time
+start = time.perf_counter()
+import os, sys
+sys.path.insert(0, {project_dir!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'education_cost_predictor.settings')
+import django
+django.setup()
+from django.conf import settings
+from django.test import Client
+settings.ALLOWED_HOSTS = ['testserver']
+status = Client().get({url!r}).status_code
+print((time.perf_counter() - start) * 1000, status, *[m for m in {heavy!r} if m in sys.modules])
+"""
+
+# (label, URL, whether the page must stay free of heavy imports)
+REQUESTS = [
+    ('GET /login/', '/login/', True),
+    ('GET / (home)', '/', True),
+    ('GET /api/cities/ (loads the dataset)', '/api/cities/?country=USA', False),
+]
+
+
+def profile_imports(runs):
+    """Run the start-up script with -X importtime and summarize its imports."""
+    totals, heavy = [], {}
+    for _ in range(runs):
+        stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP.format(project_dir=PROJECT_DIR)],
+                                capture_output=True, text=True, cwd=PROJECT_DIR, check=True).stderr
+        total = 0
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if not name.startswith('  '):
+                # Top-level import: its cumulative time includes everything it imported
+                total += int(cumulative)
+            if name.strip() in HEAVY_MODULES:
+                heavy.setdefault(name.strip(), []).append(int(cumulative) / 1000)
+        totals.append(total / 1000)
+    return statistics.median(totals), {name: statistics.median(times) for name, times in heavy.items()}
+
+
+def first_request(url, runs):
+    """Time a first request in fresh interpreters and report the heavy modules it imported."""
+    timings, status, heavy = [], None, []
+    code = FIRST_REQUEST.format(project_dir=PROJECT_DIR, url=url, heavy=HEAVY_MODULES)
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=PROJECT_DIR, check=True).stdout.splitlines()[-1].split()
+        timings.append(float(output[0]))
+        status, heavy = output[1], output[2:]
+    return statistics.median(timings), status, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    total_ms, heavy = profile_imports(args.runs)
+    print(f"Start-up imports (django.setup() + URLconf), median of {args.runs} runs: {total_ms:.1f} ms")
+    for name in HEAVY_MODULES:
+        if name in heavy:
+            print(f"  {name:<12}{heavy[name]:>10.1f} ms")
+    if not heavy:
+        print("  no heavy libraries imported")
+
+    regressions = [f"start-up imports {', '.join(heavy)}"] if heavy else []
+    print(f"\nFirst request from interpreter start, median of {args.runs} runs")
+    print(f"{'request':<40}{'ms':>10}{'status':>8}   heavy imports")
+    for label, url, light in REQUESTS:
+        ms, status, imported = first_request(url, args.runs)
+        print(f"{label:<40}{ms:>10.1f}{status:>8}   {', '.join(imported) or '-'}")
+        if light and imported:
+            regressions.append(f"{label} imports {', '.join(imported)}")
+
+    if regressions:
+        print("\nREGRESSION: " + '; '.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Hammer a cold process's first requests from many threads at once.
+
+All threads are released together against a fresh process (nothing loaded
+yet): half of them POST a row to the batch prediction API, half call
+EducationCostPredictor().predict() directly. Loading is slowed down
+artificially to widen the race window. The model and the dataset must each
+be loaded exactly once, every thread must get the same predictor and the same
+prediction; otherwise the script exits with status 1.
+
+Usage: python -m benchmarks.thread_safety [--threads N] [--rounds N]
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+
+from benchmarks.common import login_cookies, setup_django
+
+ROW = {
+    'country': 'USA', 'city': 'Cambridge', 'university': 'Harvard University',
+    'program': 'Computer Science', 'level': 'Master', 'duration_years': '2.0',
+    'living_cost_index': '83.5', 'rent_usd': '2200', 'visa_fee_usd': '160',
+    'insurance_usd': '1500', 'exchange_rate': '1.0',
+}
+
+
+def counted(counter, name, method, delay):
+    """Wrap a loader method so that calls are counted and take at least `delay` seconds."""
+    def wrapper(*args, **kwargs):
+        counter[name] += 1
+        time.sleep(delay)
+        return method(*args, **kwargs)
+    return wrapper
+
+
+def hammer(threads, delay):
+    """Run one round against freshly reset singletons and return a list of failures."""
+    from django.test import Client
+    from predictor import choices
+    from predictor.dataset import DatasetStore
+    from predictor.ml_model import EducationCostPredictor
+
+    # Forget everything a previous round loaded
+    EducationCostPredictor._instance = None
+    DatasetStore._instance = None
+    choices._catalog = None
+
+    loads = Counter()
+    original_model_load = EducationCostPredictor._load_model
+    original_dataset_load = DatasetStore._load
+    EducationCostPredictor._load_model = counted(loads, 'model', original_model_load, delay)
+    DatasetStore._load = counted(loads, 'dataset', original_dataset_load, delay)
+
+    barrier = threading.Barrier(threads)
+    instances, results, errors = [], [], []
+    body = json.dumps([ROW])
+    cookies = login_cookies()
+
+    def worker(i):
+        try:
+            barrier.wait()
+            if i % 2:
+                instances.append(EducationCostPredictor())
+                results.append(instances[-1].predict(dict(ROW))['total_cost_usd'])
+            else:
+                client = Client()
+                client.cookies.update(cookies)
+                response = client.post('/api/predict/batch/', body, content_type='application/json')
+                results.append(json.loads(response.content)['results'][0]['total_cost_usd'])
+                Client().get('/api/cities/', {'country': ROW['country']})
+        except Exception as e:
+            errors.append(repr(e))
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    try:
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    finally:
+        EducationCostPredictor._load_model = original_model_load
+        DatasetStore._load = original_dataset_load
+
+    failures = [f"thread error: {error}" for error in errors[:3]]
+    failures += [f"{name} loaded {loads[name]} times" for name in ('model', 'dataset') if loads[name] != 1]
+    if len({id(instance) for instance in instances} | {id(EducationCostPredictor._instance)}) != 1:
+        failures.append("threads got different predictor instances")
+    if len(set(results)) != 1:
+        failures.append(f"threads got different predictions: {sorted(set(results))[:5]}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--delay', type=float, default=0.05, help="Extra seconds each load takes")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    settings.ALLOWED_HOSTS = ['testserver']
+
+    failed = 0
+    for round_number in range(1, args.rounds + 1):
+        failures = hammer(args.threads, args.delay)
+        print(f"round {round_number}: {args.threads} threads, {'OK' if not failures else '; '.join(failures)}")
+        failed += bool(failures)
+
+    if failed:
+        print(f"\nFAILED: {failed} of {args.rounds} rounds")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Memory shared between pre-forked workers, with and without preloading (Linux only).
+
+Simulates a pre-forking server: the parent process sets Django up, optionally
+runs PredictorConfig.preload() (as wsgi.py does), then forks N workers that
+each serve a prediction and a dataset lookup. Each worker's RSS, PSS (its
+proportional share of the pages it uses), shared and private memory are read
+from /proc/<pid>/smaps_rollup. The sum of the workers' PSS is what they
+really cost together.
+
+To check a running server instead, pass its worker PIDs, e.g.
+``python -m benchmarks.worker_memory --pids $(pgrep -f 'gunicorn: worker')``.
+
+Usage: python -m benchmarks.worker_memory [--workers N] [--pids PID ...]
+"""
+import argparse
+import os
+import sys
+
+from benchmarks.common import setup_django
+
+ROW = {
+    'country': 'USA', 'city': 'Cambridge', 'university': 'Harvard University',
+    'program': 'Computer Science', 'level': 'Master', 'duration_years': '2.0',
+    'living_cost_index': '83.5', 'rent_usd': '2200', 'visa_fee_usd': '160',
+    'insurance_usd': '1500', 'exchange_rate': '1.0',
+}
+
+
+def read_memory(pid):
+    """Read a process's memory summary (in MB) from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'shared': fields['Shared_Clean'] + fields['Shared_Dirty'],
+        'private': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def serve():
+    """What a worker does for its first requests."""
+    from predictor.choices import get_choice_catalog
+    from predictor.ml_model import EducationCostPredictor
+
+    EducationCostPredictor().predict(dict(ROW))
+    get_choice_catalog().city_choices(ROW['country'])
+
+
+def fork_workers(count, serve=serve):
+    """Fork workers that call serve() and then wait, and read their memory while they wait."""
+    pids, ready_pipes, release_pipes = [], [], []
+    for _ in range(count):
+        ready_read, ready_write = os.pipe()
+        release_read, release_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                os.close(ready_read)
+                os.close(release_write)
+                sys.stdout = open(os.devnull, 'w')
+                serve()
+                os.write(ready_write, b'1')
+                os.read(release_read, 1)
+                status = 0
+            finally:
+                os._exit(status)
+        os.close(ready_write)
+        os.close(release_read)
+        pids.append(pid)
+        ready_pipes.append(ready_read)
+        release_pipes.append(release_write)
+
+    for pid, pipe in zip(pids, ready_pipes):
+        if not os.read(pipe, 1):
+            sys.exit(f"Worker {pid} failed before serving its requests")
+    usage = [read_memory(pid) for pid in pids]
+    for pipe in release_pipes:
+        os.close(pipe)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    return usage
+
+
+def print_usage(title, usage):
+    print(f"\n{title}")
+    print(f"{'worker':<10}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>12}{'private MB':>12}")
+    for i, row in enumerate(usage):
+        print(f"{i:<10}{row['rss']:>10.1f}{row['pss']:>10.1f}{row['shared']:>12.1f}{row['private']:>12.1f}")
+    print(f"{'total':<10}{sum(row['rss'] for row in usage):>10.1f}{sum(row['pss'] for row in usage):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--pids', type=int, nargs='+', help="Inspect these running processes instead")
+    parser.add_argument('--mode', choices=['both', 'lazy', 'preload'], default='both')
+    args = parser.parse_args()
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit("This check needs Linux's /proc/<pid>/smaps_rollup")
+    if args.pids:
+        print_usage('Running processes', [read_memory(pid) for pid in args.pids])
+        return
+
+    setup_django()
+    if args.mode in ('both', 'lazy'):
+        # Each worker loads its own copy on its first request
+        print_usage(f"Lazy loading, {args.workers} workers", fork_workers(args.workers))
+    if args.mode in ('both', 'preload'):
+        from predictor.apps import PredictorConfig
+        PredictorConfig.preload()
+        print_usage(f"Preloaded before fork, {args.workers} workers", fork_workers(args.workers))
+
+
+if __name__ == '__main__':
+    main()
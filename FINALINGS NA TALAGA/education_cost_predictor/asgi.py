@@ -12,5 +12,14 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'education_cost_predictor.settings')
+# Route the dropdown APIs, predictions and charts to the async views
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', '1')
 
-application = get_asgi_application() 
\ No newline at end of file
+application = get_asgi_application()
+
+# Load the model up front, so a pre-forking server shares it between its workers
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'PRELOAD_MODEL', True):
+    from predictor.apps import PredictorConfig  # noqa: E402
+    PredictorConfig.preload()
@@ -118,4 +118,106 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 # Authentication Settings
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'home'
-LOGIN_URL = 'login' 
\ No newline at end of file
+LOGIN_URL = 'login'
+
+# Batch prediction API limits
+BATCH_PREDICTION_MAX_ROWS = 10000
+BATCH_PREDICTION_MAX_BYTES = 16 * 1024 * 1024
+
+# Most grid points (combinations of the swept values) the what-if sweep API prices per request
+SWEEP_MAX_POINTS = 10000
+
+# Prediction result cache (entries, seconds); a size of 0 disables it
+PREDICTION_CACHE_SIZE = 1024
+PREDICTION_CACHE_TTL = 3600
+
+# Predict single rows with the native booster instead of the sklearn pipeline
+PREDICTION_FAST_PATH = True
+
+# Explain predictions (predict page, /api/predict/batch/?explain=1) with the booster's exact
+# TreeSHAP values instead of its approximate per-leaf contributions, several times slower
+PREDICTION_EXPLAIN_EXACT = False
+
+# A changed model file is detected within this many seconds (0 disables it), validated on
+# this many dataset rows and swapped in by a background thread, without restarting workers
+MODEL_RELOAD_INTERVAL = 10
+MODEL_CANARY_ROWS = 50
+
+# Serve the dropdown APIs, predictions and charts with async views (asgi.py turns this on)
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
+# Threads for model inference and chart rendering in the async views, and how many
+# calls may wait for one before requests are turned away with a 503
+INFERENCE_CONCURRENCY = min(4, os.cpu_count() or 1)
+INFERENCE_QUEUE_LIMIT = 256
+
+# Coalesce concurrent single predictions into batched model calls, flushed when this many
+# rows are queued or the oldest has waited this many seconds; at most MAX_QUEUE rows wait.
+# Worth it with many concurrent requests per process (threaded WSGI or ASGI workers)
+PREDICTION_BATCHING = False
+PREDICTION_BATCH_MAX_SIZE = 64
+PREDICTION_BATCH_MAX_WAIT = 0.002
+PREDICTION_BATCH_MAX_QUEUE = 1024
+
+# Score predictions in this many model-holding worker processes per server process (0 runs
+# inference in the server process). Rows go through shared buffers of SLOT_ROWS rows; a worker
+# that doesn't answer within TIMEOUT seconds is replaced, idle workers are pinged every
+# HEALTH_INTERVAL seconds, and requests are scored in-process while no worker is free
+INFERENCE_POOL_SIZE = 0
+INFERENCE_POOL_SLOT_ROWS = 1024
+INFERENCE_POOL_TIMEOUT = 5.0
+INFERENCE_POOL_HEALTH_INTERVAL = 5.0
+
+# Load the model when wsgi.py/asgi.py is imported, i.e. before a pre-forking server forks its workers
+PRELOAD_MODEL = True
+
+# Where the dropdown APIs and the prediction form look the dataset up: 'memory' (the CSV,
+# parsed once per process), 'compact' (its dictionary-encoded file, memory-mapped so every
+# worker shares one copy) or 'database' (indexed queries on the EducationCost table, loaded
+# with `manage.py import_education_costs`; for datasets too large to hold in every worker).
+# The database's lookup results are cached (entries) per process, and a new import is
+# picked up within CHECK_INTERVAL seconds
+DATASET_BACKEND = 'memory'
+DATASET_QUERY_CACHE_SIZE = 4096
+DATASET_VERSION_CHECK_INTERVAL = 1.0
+
+# The dataset CSV is parsed once per version into a typed columnar snapshot stored here, which
+# every process then loads instead (`manage.py build_dataset_snapshot` writes it ahead of time)
+DATASET_SNAPSHOT_DIR = os.path.join(BASE_DIR, 'cache', 'datasets')
+
+# Dashboard charts are rendered once per dataset version and stored here
+CHART_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'charts')
+
+# Cache-Control of the dataset APIs (patch_cache_control() arguments). They all send an ETag
+# (the dataset version) and Last-Modified, so by default clients revalidate every time and
+# get a cheap 304 until the CSV changes; use e.g. {'public': True, 'max_age': 300} to let
+# browsers and proxies reuse responses without asking
+DATASET_CACHE_CONTROL = {'public': True, 'no_cache': True}
+
+# Dataset exports (/api/education_data/): full exports are gzip-compressed once per dataset
+# version and stored here; responses are streamed CHUNK_ROWS rows at a time, and a page
+# (?limit=) has at most MAX_PAGE_SIZE rows
+EXPORT_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'exports')
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_MAX_PAGE_SIZE = 10000
+
+# Type-ahead search (/api/search/) of universities, cities and programs: results per request
+# by default and at most, and how similar (0-1, trigram Dice coefficient) a misspelt word
+# must be to a dataset word to match it
+SEARCH_DEFAULT_RESULTS = 10
+SEARCH_MAX_RESULTS = 50
+SEARCH_FUZZY_THRESHOLD = 0.5
+
+# Budget search (/api/search/budget/): results per request by default and at most, and where the
+# predicted tuition of every dataset row is kept, per dataset and model version
+BUDGET_DEFAULT_RESULTS = 10
+BUDGET_MAX_RESULTS = 100
+DATASET_PREDICTIONS_DIR = os.path.join(BASE_DIR, 'cache', 'predictions')
+
+# Answer predictions of dataset combinations from the table `manage.py precompute_predictions`
+# saves in DATASET_PREDICTIONS_DIR, and how often (seconds) to look for the table of a new
+# dataset or model version
+PRECOMPUTED_PREDICTIONS = True
+PRECOMPUTED_CHECK_INTERVAL = 10
+
+CHART_CACHE_MAX_AGE = 365 * 24 * 60 * 60 
\ No newline at end of file
@@ -13,4 +13,11 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'education_cost_predictor.settings')
 
-application = get_wsgi_application() 
\ No newline at end of file
+application = get_wsgi_application()
+
+# Load the model up front, so a pre-forking server shares it between its workers
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'PRELOAD_MODEL', True):
+    from predictor.apps import PredictorConfig  # noqa: E402
+    PredictorConfig.preload()
@@ -0,0 +1,36 @@
+import gc
+
+from django.apps import AppConfig
+
+
+class PredictorConfig(AppConfig):
+    name = 'predictor'
+
+    @staticmethod
+    def preload():
+        """
+        Load the model, the prediction form's dataset, the search index and the budget
+        search's predicted costs before serving requests.
+
+        Called from wsgi.py/asgi.py (see PRELOAD_MODEL). With a pre-forking
+        server that imports the application in its master process (gunicorn
+        --preload, uWSGI without lazy-apps) the workers then share these
+        objects copy-on-write instead of each loading its own copy.
+
+        It isn't done in ready(), which also runs for every manage.py command.
+        """
+        from .budget import get_budget_index
+        from .choices import get_choice_catalog
+        from .ml_model import EducationCostPredictor
+        from .search import get_search_index
+
+        EducationCostPredictor.preload()
+        get_choice_catalog()
+        get_search_index()
+        try:
+            get_budget_index()
+        except ValueError as e:
+            print(f"Budget search not preloaded: {str(e)}")
+        # Keep the loaded objects out of the garbage collector's generations, so
+        # collections in the workers don't write to (and so copy) their pages
+        gc.freeze()
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+
+from .fast_path import FastPathPredictor
+
+# Version of the on-disk layout written by export_artifact()
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+BOOSTER_NAME = 'booster.ubj'
+
+
+def has_artifact(directory):
+    """Whether a directory contains an exported model artifact."""
+    return os.path.isfile(os.path.join(directory, MANIFEST_NAME))
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def _file_sha256(path):
+    with open(path, 'rb') as file:
+        return hashlib.file_digest(file, 'sha256').hexdigest()
+
+
+def describe_source(path):
+    """
+    Identify the pickled Pipeline an artifact is exported from, for its manifest.
+
+    Returns:
+        dict: The pickle's file name, SHA-256, size and modification time (ns)
+    """
+    stat = os.stat(path)
+    return {'file': os.path.basename(path), 'sha256': _file_sha256(path),
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def matches_source(manifest, path):
+    """
+    Whether an artifact is still the export of the pickled Pipeline at a path.
+
+    The pickle's size and modification time are compared with the manifest's
+    record of it, and its SHA-256 only when they differ (e.g. a copy of the same file).
+
+    Args:
+        manifest (dict): The artifact's manifest
+        path (str): The pickled Pipeline the app would otherwise load
+
+    Returns:
+        bool: True if it is, or if there is no pickle (an artifact deployed on its own);
+              False if the pickle changed since the export, or the manifest doesn't say
+              which pickle it was exported from
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return True
+    source = manifest.get('source')
+    if source is None or stat.st_size != source['size']:
+        return False
+    return stat.st_mtime_ns == source['mtime_ns'] or _file_sha256(path) == source['sha256']
+
+
+def replace_artifact(staging, directory):
+    """
+    Move a complete artifact written to a staging directory into place, replacing
+    any artifact there.
+
+    A directory can't be renamed over another, so the old artifact is moved aside
+    first: for that instant there is no artifact and a loader uses the pickle.
+
+    Args:
+        staging (str): Directory the new artifact was exported to (on the same file system)
+        directory (str): The artifact directory the app loads
+    """
+    old = f"{directory}.{os.getpid()}.old"
+    if os.path.isdir(directory):
+        os.replace(directory, old)
+    os.replace(staging, directory)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def export_artifact(pipeline, directory, feature_columns, source_path=None):
+    """
+    Export a fitted Pipeline to the native, pickle-free artifact format.
+
+    The artifact is the XGBoost booster in its native UBJSON format plus a
+    small manifest holding the feature order, the one-hot vocabularies, the
+    estimator parameters, the booster's SHA-256, the pickle it was exported
+    from (see matches_source()) and a content version.
+
+    Args:
+        pipeline (Pipeline): The fitted Pipeline(preprocessor, model)
+        directory (str): Directory to write the artifact to
+        feature_columns (list): Order of the features in prediction rows
+        source_path (str): The pickle the Pipeline was loaded from, if any
+
+    Returns:
+        dict: The manifest that was written
+    """
+    fast_path = FastPathPredictor.from_pipeline(pipeline, feature_columns)
+    preprocessor = pipeline.named_steps['preprocessor']
+    estimator = pipeline.named_steps['model']
+    transformers = {name: list(columns) for name, _, columns in preprocessor.transformers_}
+    encoder = preprocessor.named_transformers_['cat']
+
+    raw = bytes(fast_path.booster.save_raw(raw_format='ubj'))
+    params = estimator.get_params()
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'feature_columns': list(feature_columns),
+        'numeric_features': transformers['num'],
+        'categorical_features': transformers['cat'],
+        'categories': [[str(value) for value in values] for values in encoder.categories_],
+        'sparse_output': bool(fast_path.sparse_output),
+        'iteration_range': list(fast_path.iteration_range),
+        'estimator': type(estimator).__name__,
+        'parameters': {name: params.get(name) for name in ('n_estimators', 'learning_rate', 'max_depth')},
+        'booster_file': BOOSTER_NAME,
+        'booster_sha256': hashlib.sha256(raw).hexdigest(),
+        'source': describe_source(source_path) if source_path else None,
+    }
+    manifest['version'] = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:16]
+
+    os.makedirs(directory, exist_ok=True)
+    # The manifest is written last, so a half-written artifact is never picked up
+    _write_atomic(os.path.join(directory, BOOSTER_NAME), raw)
+    _write_atomic(os.path.join(directory, MANIFEST_NAME), json.dumps(manifest, indent=2).encode())
+    return manifest
+
+
+class NativeModel:
+    """
+    A model loaded from the native artifact format.
+
+    Only the manifest is read when the model is created. The booster file is
+    memory-mapped, checked against the manifest's SHA-256 and parsed by
+    XGBoost on first use. predict() accepts the same DataFrame as the
+    Pipeline it was exported from, so it can stand in for it.
+    """
+
+    def __init__(self, directory):
+        """
+        Read an artifact's manifest.
+
+        Args:
+            directory (str): Directory written by export_artifact()
+
+        Raises:
+            ValueError: If the artifact's format version isn't supported
+        """
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME)) as file:
+            self.manifest = json.load(file)
+        if self.manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model artifact format: {self.manifest.get('format_version')}")
+        self.version = self.manifest['version']
+        self._fast_path = None
+        self._lock = threading.Lock()
+
+    @property
+    def fast_path(self):
+        """The FastPathPredictor, loading the booster on first access."""
+        if self._fast_path is None:
+            with self._lock:
+                if self._fast_path is None:
+                    self._fast_path = self._load()
+        return self._fast_path
+
+    def _load(self):
+        import xgboost
+
+        manifest = self.manifest
+        path = os.path.join(self.directory, manifest['booster_file'])
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if hashlib.sha256(data).hexdigest() != manifest['booster_sha256']:
+                raise ValueError(f"Model artifact is corrupt: checksum mismatch for {path}")
+            booster = xgboost.Booster()
+            booster.load_model(bytearray(data))
+
+        return FastPathPredictor(
+            booster, manifest['feature_columns'], manifest['numeric_features'],
+            manifest['categorical_features'], manifest['categories'],
+            manifest['sparse_output'], tuple(manifest['iteration_range']))
+
+    def predict(self, X):
+        """Predict tuition for a DataFrame of model features (like Pipeline.predict)."""
+        return self.fast_path.predict_frame(X)
+
+    def predict_one(self, features):
+        """Predict tuition for a single tuple of features."""
+        return self.fast_path.predict_one(features)
+
+    def matches_source(self, path):
+        """Whether the artifact is still the export of the pickle at path (see matches_source())."""
+        return matches_source(self.manifest, path)
+
+    def describe(self):
+        """
+        Describe the model for EducationCostPredictor.get_model_info().
+
+        Returns:
+            dict: Model type, features and key parameters
+        """
+        manifest = self.manifest
+        return {
+            "model_type": type(self).__name__,
+            "estimator_type": manifest['estimator'],
+            "feature_info": {
+                'numerical_features': manifest['numeric_features'],
+                'categorical_features': manifest['categorical_features'],
+            },
+            "parameters": {name: 'N/A' if value is None else value
+                           for name, value in manifest['parameters'].items()},
+        }
@@ -0,0 +1,153 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.views.decorators.http import condition, require_POST
+
+from . import views
+from .executor import ExecutorBusy, inference_executor
+from .choices import choice_catalog_is_current
+from .forms import EducationCostPredictionForm
+from .repository import DATASET_BACKEND, repository_is_current
+
+# Async versions of the dropdown APIs, the dataset export, budget search, the predict page, dashboard
+# charts and batch and sweep predictions, routed to when ASYNC_VIEWS is set (asgi.py sets it). Under
+# ASGI, Django runs sync views one at a time on a single thread, so a prediction or chart render
+# would hold up every dropdown lookup behind it. Here the lookups, which only read the
+# in-memory dataset snapshot, run on the event loop, while model inference and chart
+# rendering go to the bounded inference executor. A lookup only runs on the loop while the
+# current dataset version is already loaded (and, for search, indexed): the first request
+# after a start-up or a CSV change parses or builds it, which Django runs on its sync
+# thread instead, as it does every lookup with DATASET_BACKEND = 'database' (queries).
+
+
+def _search_index_is_current():
+    """search.search_index_is_current(), imported here so that loading this module doesn't import numpy."""
+    from .search import search_index_is_current
+    return search_index_is_current()
+
+
+def _lookup(view, is_current=repository_is_current):
+    """
+    Make an async view from a sync dropdown API view, for the configured DATASET_BACKEND.
+
+    Args:
+        view (callable): Sync view that only looks the dataset up
+        is_current (callable): Whether everything the view reads is already in memory
+    """
+    if DATASET_BACKEND == 'database':
+        return sync_to_async(view)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if is_current():
+            return view(request, *args, **kwargs)
+        return await sync_to_async(view)(request, *args, **kwargs)
+    return wrapper
+
+
+cascade_api = _lookup(views.cascade_api)
+cities_api = _lookup(views.cities_api)
+universities_api = _lookup(views.universities_api)
+university_data_api = _lookup(views.university_data_api)
+programs_api = _lookup(views.programs_api)
+program_details_api = _lookup(views.program_details_api)
+search_api = _lookup(views.search_api, is_current=_search_index_is_current)
+
+
+@views.dataset_api(etag_func=views.export_etag)
+async def education_data_api(request):
+    """Dataset export (see views.education_data_api), prepared on the inference executor and streamed from the event loop."""
+    try:
+        # The first export of a dataset version serializes (and compresses) it, which mustn't block the loop
+        return await inference_executor.run(views.education_data_response, request, asynchronous=True)
+    except ExecutorBusy as e:
+        return JsonResponse({'error': str(e)}, status=503)
+
+
+async def _prediction_form(*args):
+    """Build the prediction form, off the event loop unless its choice catalog is already built."""
+    if choice_catalog_is_current():
+        return EducationCostPredictionForm(*args)
+    return await sync_to_async(EducationCostPredictionForm)(*args)
+
+
+@login_required
+async def predict(request):
+    """Prediction view (see views.predict), with the model run on the inference executor."""
+    prediction_result = None
+
+    if request.method == 'POST':
+        form = await _prediction_form(request.POST.copy())
+
+        if form.is_valid():
+            data = views.apply_manual_values(form.cleaned_data)
+
+            from .ml_model import EducationCostPredictor
+            try:
+                # Creating the predictor loads the model the first time, so it runs on the executor too
+                predictor = await inference_executor.run(EducationCostPredictor)
+                prediction_result = await inference_executor.run(predictor.predict, data, explain=True)
+            except ExecutorBusy as e:
+                prediction_result = {'error': str(e)}
+
+            if 'error' in prediction_result:
+                messages.error(request, f"Prediction Error: {prediction_result['error']}")
+                prediction_result = None
+        else:
+            print(f"Form errors: {form.errors}")
+    else:
+        form = await _prediction_form()
+
+    # Rendering may load the session and user from the database, which must not happen on the event loop
+    return await sync_to_async(render)(request, 'predictor/predict.html', {
+        'form': form,
+        'prediction_result': prediction_result
+    })
+
+
+@login_required
+@condition(etag_func=views.chart_etag)
+async def dashboard_chart(request, name):
+    """Serve one dashboard chart (see views.dashboard_chart), rendering it on the inference executor."""
+    from .charts import CHARTS, chart_cache
+
+    if name not in CHARTS:
+        raise Http404("Unknown chart")
+    try:
+        png = await inference_executor.run(chart_cache.get, name)
+    except ExecutorBusy as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    return views.chart_response(png)
+
+
+@views.dataset_api(etag_func=views.budget_etag, last_modified_func=None)
+async def budget_search_api(request):
+    """Budget search API (see views.budget_search_api), run on the inference executor: its first call prices the dataset."""
+    try:
+        return await inference_executor.run(views.budget_search_response, request)
+    except ExecutorBusy as e:
+        return JsonResponse({'error': str(e)}, status=503)
+
+
+@login_required
+@require_POST
+async def predict_batch_api(request):
+    """Batch prediction API (see views.predict_batch_api), parsed and scored on the inference executor."""
+    try:
+        return await inference_executor.run(views.predict_batch_response, request)
+    except ExecutorBusy as e:
+        return JsonResponse({'error': str(e)}, status=503)
+
+
+@login_required
+@require_POST
+async def predict_sweep_api(request):
+    """What-if sweep API (see views.predict_sweep_api), scored on the inference executor."""
+    try:
+        return await inference_executor.run(views.predict_sweep_response, request)
+    except ExecutorBusy as e:
+        return JsonResponse({'error': str(e)}, status=503)
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class QueueFull(Exception):
+    """Raised when the micro-batcher's queue is at its limit."""
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into batched model calls.
+
+    Callers submit one row each and wait for their own result. A background
+    thread takes the queued rows and scores them with one model call as soon
+    as max_batch_size rows are waiting or the oldest row has waited max_wait
+    seconds, so N concurrent requests pay the fixed per-call overhead of the
+    model about once instead of N times. When requests arrive one at a time
+    (the previous batch had a single row) a row is scored without waiting.
+
+    Rows are grouped by the model they were submitted with, so a hot reload
+    in the middle of a batch doesn't mix versions.
+    """
+
+    def __init__(self, predict_rows, max_batch_size=64, max_wait=0.002, max_queue=1024):
+        """
+        Args:
+            predict_rows (callable): predict_rows(model, rows) returning one prediction per row
+            max_batch_size (int): Most rows scored by one model call
+            max_wait (float): Seconds the oldest queued row may wait for more rows, 0 to never wait
+            max_queue (int): Most rows that may be queued, 0 for no limit
+        """
+        self.predict_rows = predict_rows
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._last_size = 0
+        self.batches = 0
+        self.rows = 0
+        self.full_flushes = 0
+        self.largest_batch = 0
+        self.max_depth = 0
+        self.rejected = 0
+        self.wait_time = 0.0
+
+    def submit(self, row, model):
+        """
+        Queue one row for prediction.
+
+        Args:
+            row (tuple): Features in the order predict_rows expects
+            model: The model to score it with (passed back to predict_rows)
+
+        Returns:
+            Future: Resolves to the row's prediction
+
+        Raises:
+            QueueFull: If max_queue rows are already waiting
+        """
+        future = Future()
+        with self._condition:
+            if self.max_queue and len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull("Too many predictions are queued, please retry")
+            self._ensure_thread()
+            self._queue.append((row, model, future, time.monotonic()))
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._condition.notify()
+        return future
+
+    def predict(self, row, model):
+        """Submit a row and wait for its prediction (see submit())."""
+        return self.submit(row, model).result()
+
+    def _ensure_thread(self):
+        # Started on first use, and again in a forked child, which doesn't inherit threads
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+            self._thread.start()
+
+    def _take_batch(self):
+        """Wait for a batch to be ready and remove it from the queue."""
+        with self._condition:
+            while not self._queue:
+                self._condition.wait()
+            # Only wait for more rows while requests are arriving concurrently, so that
+            # a lone request isn't delayed by max_wait for nothing
+            wait = self.max_wait if self._last_size > 1 or len(self._queue) > 1 else 0
+            deadline = self._queue[0][3] + wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            size = min(len(self._queue), self.max_batch_size)
+            batch = [self._queue.popleft() for _ in range(size)]
+            now = time.monotonic()
+            self.batches += 1
+            self.rows += size
+            self.largest_batch = max(self.largest_batch, size)
+            self.full_flushes += size == self.max_batch_size
+            self._last_size = size
+            self.wait_time += sum(now - queued_at for _, _, _, queued_at in batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            # Score consecutive rows for the same model together
+            i = 0
+            while i < len(batch):
+                model = batch[i][1]
+                j = i
+                while j < len(batch) and batch[j][1] is model:
+                    j += 1
+                group = batch[i:j]
+                try:
+                    predictions = self.predict_rows(model, [row for row, _, _, _ in group])
+                    for (_, _, future, _), prediction in zip(group, predictions):
+                        future.set_result(prediction)
+                except Exception as e:
+                    for _, _, future, _ in group:
+                        future.set_exception(e)
+                i = j
+
+    def stats(self):
+        """
+        Get the batching tunables and counters.
+
+        Returns:
+            dict: Limits, queue depth, batch counts and sizes, average queueing time (ms)
+        """
+        with self._condition:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'max_queue': self.max_queue,
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self.max_depth,
+                'batches': self.batches,
+                'rows': self.rows,
+                'avg_batch_size': round(self.rows / self.batches, 1) if self.batches else 0.0,
+                'largest_batch': self.largest_batch,
+                'full_flushes': self.full_flushes,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(1000 * self.wait_time / self.rows, 3) if self.rows else 0.0,
+            }
@@ -0,0 +1,279 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .compact import CompactDataset
+from .dataset import get_dataset_stamp
+from .ml_model import FEATURE_COLUMNS, EducationCostPredictor, compute_costs
+from .precomputed import PREDICTIONS_DIR
+from .stats import stats_source
+
+# Number of /api/search/budget/ results by default, and at most
+BUDGET_DEFAULT_RESULTS = getattr(settings, 'BUDGET_DEFAULT_RESULTS', 10)
+BUDGET_MAX_RESULTS = getattr(settings, 'BUDGET_MAX_RESULTS', 100)
+
+# Columns a budget search can be narrowed by (query parameter -> dataset column)
+FILTERS = {'country': 'Country', 'program': 'Program', 'level': 'Level'}
+
+# Columns of each result
+RESULT_COLUMNS = ['Country', 'City', 'University', 'Program', 'Level']
+
+# Rows checked against the filters at a time, in cost order, until enough match
+SCAN_ROWS = 65536
+
+
+def _column_codes(dataset, column):
+    """A string column of a dataset as (codes of its rows, -1 for missing, sorted vocabulary)."""
+    if isinstance(dataset, CompactDataset):
+        return np.asarray(dataset.codes(column)), dataset.vocabulary(column)
+    codes, vocabulary = pd.factorize(dataset.df[column], sort=True)
+    return codes, vocabulary.tolist()
+
+
+def _column_values(dataset, column):
+    """A numeric column of a dataset as float64."""
+    if isinstance(dataset, CompactDataset):
+        return dataset.values(column).astype(np.float64)
+    return dataset.df[column].to_numpy(dtype=np.float64)
+
+
+def dataset_features(dataset):
+    """
+    The model features of every row of a dataset.
+
+    Args:
+        dataset (EducationDataset or CompactDataset): The dataset version
+
+    Returns:
+        DataFrame: The FEATURE_COLUMNS of its rows, in dataset order
+    """
+    if not isinstance(dataset, CompactDataset):
+        return dataset.df[FEATURE_COLUMNS]
+    columns = {}
+    for column in FEATURE_COLUMNS:
+        if dataset.types[column] == 'str':
+            codes, vocabulary = _column_codes(dataset, column)
+            columns[column] = pd.Categorical.from_codes(codes, vocabulary)
+        else:
+            columns[column] = _column_values(dataset, column)
+    return pd.DataFrame(columns)
+
+
+def predictions_path(dataset_version, model_version):
+    """File the predicted tuition of a dataset version's rows by a model version is persisted in."""
+    return os.path.join(PREDICTIONS_DIR, f"{dataset_version}.{model_version}.npy")
+
+
+def dataset_predictions(dataset, predictor):
+    """
+    Predict the tuition of every row of a dataset version.
+
+    The predictions are read from the file of the dataset and model versions,
+    or made with one vectorized model call and persisted there, so other
+    workers and restarts read them instead of scoring the dataset again.
+
+    Args:
+        dataset (EducationDataset or CompactDataset): The dataset version
+        predictor (EducationCostPredictor): The predictor of the current model
+
+    Returns:
+        tuple: (float32 ndarray with one prediction per row, model version)
+
+    Raises:
+        ValueError: If the model isn't loaded or fails to predict
+    """
+    model_version = predictor.model_version
+    try:
+        tuition = np.load(predictions_path(dataset.version, model_version))
+        if tuition.shape == (len(dataset),):
+            return tuition, model_version
+    except (OSError, ValueError):
+        pass
+
+    result = predictor.predict_frame(dataset_features(dataset))
+    if 'error' in result:
+        raise ValueError(result['error'])
+    tuition = result['tuition'].astype(np.float32)
+    path = predictions_path(dataset.version, result['model_version'])
+    try:
+        os.makedirs(PREDICTIONS_DIR, exist_ok=True)
+        # Write then rename, so other workers never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as file:
+            np.save(file, tuition)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error saving dataset predictions: {str(e)}")
+    return tuition, result['model_version']
+
+
+class BudgetIndex:
+    """
+    The predicted costs of every row of a dataset version, cheapest total first.
+
+    The living expenses and total cost of each row are computed once, with the
+    formula of EducationCostPredictor.predict applied to whole columns, and
+    the rows are sorted by total cost. A search takes the rows within its
+    budget (a binary search of the sorted totals) and scans them a chunk at a
+    time for rows passing its filters, which are integer code comparisons:
+    the first matches are the cheapest, so the top k need no per-request sort,
+    heap or partition, and a search stops as soon as it has them.
+
+    The index is built once per dataset and model version and never modified,
+    so every thread can search it without locking.
+    """
+
+    def __init__(self, dataset, tuition, model_version):
+        """
+        Index the predicted costs of a dataset version.
+
+        Args:
+            dataset (EducationDataset or CompactDataset): The dataset version
+            tuition (ndarray): Predicted tuition of each of its rows (see dataset_predictions)
+            model_version (str): Version of the model that predicted it
+        """
+        self.version = (dataset.version, model_version)
+        tuition, living_expenses, total_cost = compute_costs(
+            tuition, _column_values(dataset, 'Rent_USD'), _column_values(dataset, 'Insurance_USD'),
+            _column_values(dataset, 'Visa_Fee_USD'), _column_values(dataset, 'Duration_Years'))
+        # Ties stay in dataset order; rows with a missing value sort last and are never returned
+        order = np.argsort(total_cost, kind='stable')
+        self.total_cost = total_cost[order]
+        self.tuition = tuition[order]
+        self.living_expenses = living_expenses[order]
+        self.duration_years = _column_values(dataset, 'Duration_Years')[order]
+        self._priced = int(np.isfinite(self.total_cost).sum())
+
+        self._codes = {}
+        self._vocabularies = {}
+        self._lookup = {}
+        for column in RESULT_COLUMNS:
+            codes, vocabulary = _column_codes(dataset, column)
+            dtype = np.int16 if len(vocabulary) < 2 ** 15 else np.int32
+            self._codes[column] = codes[order].astype(dtype)
+            self._vocabularies[column] = vocabulary
+            self._lookup[column] = {value: code for code, value in enumerate(vocabulary)}
+
+    def __len__(self):
+        return len(self.total_cost)
+
+    def search(self, max_total=None, limit=BUDGET_DEFAULT_RESULTS, filters=None):
+        """
+        Find the cheapest rows within a budget.
+
+        Args:
+            max_total (float): Highest total cost, or None for any
+            limit (int): Number of results
+            filters (dict): Required value of any of the FILTERS columns, e.g. {'Level': 'Master'}
+
+        Returns:
+            list: The matching rows, cheapest total cost first: dicts with the country,
+                  city, university, program, level, duration and predicted costs
+        """
+        end = self._priced
+        if max_total is not None:
+            end = min(end, int(np.searchsorted(self.total_cost, max_total, side='right')))
+        required = []
+        for column, value in (filters or {}).items():
+            code = self._lookup[column].get(value)
+            if code is None:
+                return []
+            required.append((self._codes[column], code))
+
+        if not required:
+            rows = np.arange(min(limit, end))
+        else:
+            found = []
+            needed = limit
+            for start in range(0, end, SCAN_ROWS):
+                stop = min(start + SCAN_ROWS, end)
+                codes, code = required[0]
+                mask = codes[start:stop] == code
+                for codes, code in required[1:]:
+                    mask &= codes[start:stop] == code
+                hits = np.flatnonzero(mask)[:needed]
+                found.append(hits + start)
+                needed -= len(hits)
+                if not needed:
+                    break
+            rows = np.concatenate(found) if found else np.arange(0)
+        return [self._result(row) for row in rows.tolist()]
+
+    def _result(self, row):
+        result = {}
+        for column in RESULT_COLUMNS:
+            code = self._codes[column][row]
+            result[column.lower()] = self._vocabularies[column][code] if code >= 0 else None
+        result.update({
+            'duration_years': float(self.duration_years[row]),
+            'estimated_tuition_usd': float(self.tuition[row]),
+            'living_expenses_usd': float(self.living_expenses[row]),
+            'total_cost_usd': float(self.total_cost[row]),
+        })
+        return result
+
+
+def parse_budget_params(params):
+    """
+    Read the parameters of a budget search request.
+
+    Args:
+        params (QueryDict): max_total, limit and any of the FILTERS, all optional
+
+    Returns:
+        tuple: (max_total or None, limit, filters by dataset column)
+
+    Raises:
+        ValueError: If max_total or limit is invalid
+    """
+    max_total = None
+    if params.get('max_total'):
+        try:
+            max_total = float(params['max_total'])
+        except ValueError:
+            raise ValueError(f"Invalid max_total: {params['max_total']}")
+        if not np.isfinite(max_total):
+            raise ValueError(f"Invalid max_total: {params['max_total']}")
+
+    limit = BUDGET_DEFAULT_RESULTS
+    if params.get('limit'):
+        try:
+            limit = int(params['limit'])
+        except ValueError:
+            raise ValueError(f"Invalid limit: {params['limit']}")
+        if not 1 <= limit <= BUDGET_MAX_RESULTS:
+            raise ValueError(f"limit must be between 1 and {BUDGET_MAX_RESULTS}")
+
+    filters = {column: params[name].strip() for name, column in FILTERS.items() if params.get(name, '').strip()}
+    return max_total, limit, filters
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_budget_index():
+    """
+    Get the budget index of the current dataset version and model.
+
+    Returns:
+        BudgetIndex: The shared index, rebuilt only when the dataset or the model changes
+
+    Raises:
+        ValueError: If the model isn't loaded or fails to predict
+    """
+    global _index
+    predictor = EducationCostPredictor()
+    predictor.check_for_update()
+    version = (get_dataset_stamp()[0], predictor.model_version)
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                dataset = stats_source()
+                _index = BudgetIndex(dataset, *dataset_predictions(dataset, predictor))
+            index = _index
+    return index
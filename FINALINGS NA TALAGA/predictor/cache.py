@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Model inputs (form field names) that make up a prediction cache key
+CATEGORICAL_FIELDS = ['country', 'city', 'university', 'program', 'level']
+NUMERIC_FIELDS = ['duration_years', 'living_cost_index', 'rent_usd', 'visa_fee_usd', 'insurance_usd', 'exchange_rate']
+
+
+def make_cache_key(data):
+    """
+    Build a canonical key from the 11 model features of a prediction request.
+
+    The key lists the features in ml_model.FEATURE_COLUMNS order, so it can
+    also be fed to the fast path predictor directly.
+
+    Numbers are normalized to floats so that "2", 2 and 2.0 give the same key,
+    and an 'Other' program is replaced by the program the user typed in.
+
+    Args:
+        data (dict): Prediction input keyed by the form field names
+
+    Returns:
+        tuple: The key, or None if the input can't be normalized (and so is not cached)
+    """
+    try:
+        values = [str(data[field]).strip() for field in CATEGORICAL_FIELDS]
+        if values[3] == 'Other' and data.get('other_program'):
+            values[3] = str(data['other_program']).strip()
+        values.extend(float(str(data[field]).strip()) for field in NUMERIC_FIELDS)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return tuple(values)
+
+
+class PredictionCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+
+    Every entry is tagged with the version of the model that produced it.
+    Looking up a key with a different model version clears the cache, so
+    results from a replaced model artifact are never served.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        """
+        Args:
+            maxsize (int): Maximum number of entries, 0 disables the cache
+            ttl (float): Seconds an entry stays valid, 0 or None for no expiry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key, version):
+        """
+        Look up a cached value.
+
+        Args:
+            key (tuple): Key from make_cache_key()
+            version (str): Version of the model currently in use
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        if not self.maxsize:
+            return None
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, version):
+        """Store a value, evicting the least recently used entries beyond maxsize."""
+        if not self.maxsize:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (the counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            dict: Size, limits, hit/miss counters and hit rate (percent)
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(100 * self.hits / lookups, 1) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,262 @@
+import os
+import threading
+from io import BytesIO
+
+import numpy as np
+from django.conf import settings
+from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+from .dataset import get_dataset, get_dataset_stamp
+from .stats import get_dataset_stats
+
+# Where rendered charts are stored, one PNG per (dataset version, chart)
+CHART_CACHE_DIR = getattr(settings, 'CHART_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'charts'))
+
+
+def _to_png(fig):
+    """Render a figure to PNG bytes."""
+    fig.tight_layout()
+    buf = BytesIO()
+    FigureCanvas(fig).print_png(buf)
+    return buf.getvalue()
+
+
+def render_countries_chart(stats, df):
+    """Top Countries Bar Chart."""
+    countries_data = stats.get('countries_distribution', {})
+    if not countries_data:
+        return None
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot(111)
+    countries = list(countries_data.keys())[:8]  # Top 8 countries
+    counts = [countries_data[country] for country in countries]
+    ax.bar(countries, counts, color='skyblue')
+    ax.set_title('Most Common Countries in Dataset')
+    ax.set_ylabel('Number of Programs')
+    ax.tick_params(axis='x', rotation=45)
+    return _to_png(fig)
+
+
+def render_levels_chart(stats, df):
+    """Education Levels Pie Chart."""
+    levels_data = stats.get('levels_distribution', {})
+    if not levels_data:
+        return None
+    fig = Figure(figsize=(8, 8))
+    ax = fig.add_subplot(111)
+    labels = list(levels_data.keys())
+    sizes = list(levels_data.values())
+    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90,
+           shadow=True, explode=[0.1 if l == max(labels, key=levels_data.get) else 0 for l in labels])
+    ax.axis('equal')
+    ax.set_title('Distribution of Education Levels')
+    return _to_png(fig)
+
+
+def render_tuition_chart(stats, df):
+    """Tuition by Level Bar Chart."""
+    tuition_data = stats.get('tuition_by_level', {})
+    if not tuition_data:
+        return None
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot(111)
+    levels = list(tuition_data.keys())
+    tuitions = [tuition_data[level] for level in levels]
+    ax.bar(levels, tuitions, color='lightgreen')
+    ax.set_title('Average Tuition by Education Level')
+    ax.set_ylabel('Average Tuition (USD)')
+    ax.tick_params(axis='x', rotation=45)
+
+    # Add data labels on bars
+    for i, v in enumerate(tuitions):
+        ax.text(i, v + 500, f"${v:,.0f}", ha='center')
+    return _to_png(fig)
+
+
+def render_cost_factors_chart(stats, df):
+    """Average Cost Components Pie Chart."""
+    # Calculate average costs by component
+    avg_tuition = df['Tuition_USD'].mean()
+    avg_rent = df['Rent_USD'].mean() * 12 * df['Duration_Years'].mean()  # Annual rent for average duration
+    avg_insurance = df['Insurance_USD'].mean() * df['Duration_Years'].mean()  # Insurance for average duration
+    avg_visa = df['Visa_Fee_USD'].mean()
+
+    fig = Figure(figsize=(8, 8))
+    ax = fig.add_subplot(111)
+    components = ['Tuition', 'Rent', 'Insurance', 'Visa Fee']
+    values = [avg_tuition, avg_rent, avg_insurance, avg_visa]
+    colors = ['#4e73df', '#1cc88a', '#36b9cc', '#f6c23e']
+
+    # Filter out components with very small values
+    total = sum(values)
+    labels = []
+    filtered_values = []
+    filtered_colors = []
+
+    for comp, val, color in zip(components, values, colors):
+        percentage = (val / total) * 100
+        if percentage >= 1.0:  # Only include components that are at least 1% of total
+            labels.append(f"{comp} (${val:,.0f})")
+            filtered_values.append(val)
+            filtered_colors.append(color)
+
+    wedges, texts, autotexts = ax.pie(
+        filtered_values,
+        labels=None,  # We'll add custom legend instead
+        autopct='%1.1f%%',
+        startangle=90,
+        colors=filtered_colors,
+        shadow=False,
+        wedgeprops={'edgecolor': 'white', 'linewidth': 1.5},
+        textprops={'fontsize': 12, 'fontweight': 'bold', 'color': 'white'}
+    )
+
+    # Add a legend
+    ax.legend(
+        wedges,
+        labels,
+        title="Cost Components",
+        loc="center left",
+        bbox_to_anchor=(0.85, 0, 0.5, 1)
+    )
+
+    ax.axis('equal')
+    ax.set_title('Average Education Cost Breakdown', fontsize=16, pad=20)
+    return _to_png(fig)
+
+
+def render_cost_index_tuition_chart(stats, df):
+    """Living Cost Index vs. Tuition Scatter Plot."""
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot(111)
+
+    # Filter out outliers for better visualization
+    q_low = df['Tuition_USD'].quantile(0.01)
+    q_high = df['Tuition_USD'].quantile(0.99)
+    filtered_df = df[(df['Tuition_USD'] >= q_low) & (df['Tuition_USD'] <= q_high)]
+
+    scatter = ax.scatter(
+        filtered_df['Living_Cost_Index'],
+        filtered_df['Tuition_USD'],
+        alpha=0.6,
+        c=filtered_df['Living_Cost_Index'],
+        cmap='viridis',
+        s=50
+    )
+
+    # Add a color bar using the figure's colorbar method
+    cbar = fig.colorbar(scatter, ax=ax)
+    cbar.set_label('Living Cost Index')
+
+    # Add a trend line
+    z = np.polyfit(filtered_df['Living_Cost_Index'], filtered_df['Tuition_USD'], 1)
+    p = np.poly1d(z)
+    x_range = np.linspace(filtered_df['Living_Cost_Index'].min(), filtered_df['Living_Cost_Index'].max(), 100)
+    ax.plot(x_range, p(x_range), "r--", linewidth=2)
+
+    ax.set_title('Relationship Between Living Cost Index and Tuition', fontsize=16)
+    ax.set_xlabel('Living Cost Index', fontsize=12)
+    ax.set_ylabel('Tuition (USD)', fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.7)
+
+    # Format y-axis with dollar signs
+    ax.yaxis.set_major_formatter(FuncFormatter(lambda x, pos: '${:,.0f}'.format(x)))
+    return _to_png(fig)
+
+
+# Dashboard charts by URL name
+CHARTS = {
+    'countries': render_countries_chart,
+    'levels': render_levels_chart,
+    'tuition': render_tuition_chart,
+    'cost_factors': render_cost_factors_chart,
+    'cost_index_tuition': render_cost_index_tuition_chart,
+}
+
+
+class ChartCache:
+    """
+    Rendered dashboard charts, one PNG per chart and dataset version.
+
+    Charts are kept in memory and in CHART_CACHE_DIR, so they are rendered
+    once per dataset version and shared by every worker. Rendering is
+    single-flight: concurrent first requests for the same chart wait for
+    one render instead of each running matplotlib.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._charts = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _forget_other_versions(self, version):
+        with self._guard:
+            for key in [key for key in self._charts if key[0] != version]:
+                del self._charts[key]
+            for key in [key for key in self._locks if key[0] != version]:
+                del self._locks[key]
+
+    def path(self, version, name):
+        """File the chart is stored in."""
+        return os.path.join(self.directory, f"{version}-{name}.png")
+
+    def get(self, name, dataset=None):
+        """
+        Get a rendered chart, rendering it at most once per dataset version.
+
+        Args:
+            name (str): One of CHARTS
+            dataset (EducationDataset): Snapshot to chart, defaults to the current one
+
+        Returns:
+            bytes: The PNG, or None if there is no data to chart
+        """
+        # Charts already rendered are found by the file's version, without loading the dataset
+        version = dataset.version if dataset is not None else get_dataset_stamp()[0]
+        key = (version, name)
+        if key in self._charts:
+            return self._charts[key]
+
+        with self._lock_for(key):
+            if key in self._charts:
+                return self._charts[key]
+            path = self.path(*key)
+            try:
+                with open(path, 'rb') as file:
+                    png = file.read()
+            except FileNotFoundError:
+                png = self._render(name, dataset or get_dataset())
+                if png is not None:
+                    self._write(path, png)
+            self._forget_other_versions(version)
+            self._charts[key] = png
+        return png
+
+    def _render(self, name, dataset):
+        stats = get_dataset_stats(dataset)
+        try:
+            return CHARTS[name](stats, dataset.df)
+        except Exception as e:
+            print(f"Error generating {name} chart: {str(e)}")
+            return None
+
+    def _write(self, path, png):
+        # Write then rename, so other workers never read a partial file
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as file:
+                file.write(png)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error saving chart {path}: {str(e)}")
+
+
+chart_cache = ChartCache(CHART_CACHE_DIR)
@@ -0,0 +1,219 @@
+import threading
+from types import MappingProxyType
+
+from django.utils.choices import BaseChoiceIterator
+
+from .repository import DATASET_BACKEND, get_repository, repository_is_current
+
+# Dataset columns offered as plain dropdowns on the prediction form
+CHOICE_COLUMNS = [
+    'Country', 'City', 'University', 'Program', 'Level', 'Duration_Years',
+    'Living_Cost_Index', 'Rent_USD', 'Visa_Fee_USD', 'Insurance_USD', 'Exchange_Rate',
+]
+
+# Cost columns whose dropdowns start with an "auto-filled" placeholder
+AUTO_FILLED_COLUMNS = ['Living_Cost_Index', 'Rent_USD', 'Visa_Fee_USD', 'Insurance_USD', 'Exchange_Rate']
+
+
+class CatalogChoices(BaseChoiceIterator):
+    """
+    An immutable list of (value, label) choices with a hashed set of its values.
+
+    Django keeps BaseChoiceIterator instances as they are when they are assigned
+    to a field or widget, so one instance can be attached to any number of forms
+    by reference.
+    """
+
+    def __init__(self, choices):
+        self.choices = tuple(choices)
+        self.values = frozenset(value for value, _ in self.choices)
+
+    def __iter__(self):
+        return iter(self.choices)
+
+    def __len__(self):
+        return len(self.choices)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def prepend(self, *choices):
+        """Return a new CatalogChoices with extra choices in front of these."""
+        return CatalogChoices(choices + self.choices)
+
+
+EMPTY_CHOICES = CatalogChoices(())
+SELECT_COUNTRY_FIRST = CatalogChoices([('', '-- Select Country First --')])
+SELECT_CITY_FIRST = CatalogChoices([('', '-- Select City First --')])
+
+
+def _as_choices(values):
+    """Convert sorted values to choice tuples (value, label)."""
+    return CatalogChoices((str(val), str(val)) for val in values)
+
+
+class ChoiceCatalog:
+    """
+    Every dropdown choice list of the prediction form for one dataset version.
+
+    The catalog is built once per dataset version and never modified, so forms
+    can attach its lists directly and validate against its membership sets.
+    """
+
+    def __init__(self, dataset):
+        """
+        Build all choice lists from a dataset snapshot.
+
+        Args:
+            dataset (EducationDataset): The snapshot to build the catalog from
+        """
+        self._build_columns(dataset)
+
+        cities = {}
+        universities = {}
+        programs = {}
+        for country in dataset.countries():
+            cities[country] = _as_choices(dataset.cities(country))
+            for city in dataset.cities(country):
+                universities[(country, city)] = _as_choices(dataset.universities(country, city))
+                for university in dataset.universities(country, city):
+                    key = (country, city, university)
+                    programs[key] = _as_choices(dataset.programs(*key))
+        self.cities = MappingProxyType(cities)
+        self.universities = MappingProxyType(universities)
+        self.programs = MappingProxyType(programs)
+
+    def _build_columns(self, dataset):
+        """Build the choices of every dropdown column."""
+        self.version = dataset.version
+        columns = {column: _as_choices(dataset.distinct(column)) for column in CHOICE_COLUMNS}
+        self.columns = MappingProxyType(columns)
+        self.auto_filled = MappingProxyType({
+            column: columns[column].prepend(('', '-- Auto-filled --')) for column in AUTO_FILLED_COLUMNS
+        })
+
+    def column(self, column, auto_filled=False):
+        """Choices for every unique value of a dataset column."""
+        if auto_filled:
+            return self.auto_filled[column]
+        return self.columns[column]
+
+    def city_choices(self, country):
+        """Choices of cities in a country."""
+        return self.cities.get(country, EMPTY_CHOICES)
+
+    def university_choices(self, country, city):
+        """Choices of universities in a city."""
+        return self.universities.get((country, city), EMPTY_CHOICES)
+
+    def program_choices(self, country, city, university):
+        """Choices of programs offered by a university."""
+        return self.programs.get((country, city, university), EMPTY_CHOICES)
+
+    def filtered(self, field_name, filters):
+        """
+        Look up the pre-filtered choices for one of the cascade keys.
+
+        Args:
+            field_name (str): Column to get choices for
+            filters (dict): Column -> value filters
+
+        Returns:
+            CatalogChoices: The choices, or None if the filters are not a cascade key
+        """
+        filters = {key: value for key, value in (filters or {}).items() if value}
+        keys = set(filters)
+        if not keys:
+            return self.columns.get(field_name)
+        if field_name == 'City' and keys == {'Country'}:
+            return self.city_choices(filters['Country'])
+        if field_name == 'University' and keys == {'Country', 'City'}:
+            return self.university_choices(filters['Country'], filters['City'])
+        if field_name == 'Program' and keys == {'Country', 'City', 'University'}:
+            return self.program_choices(filters['Country'], filters['City'], filters['University'])
+        return None
+
+
+class LazyChoiceCatalog(ChoiceCatalog):
+    """
+    The choice catalog of a DatabaseRepository or CompactDataset.
+
+    The column choices are built up front, like ChoiceCatalog's, but the
+    cascade choices (a country's cities, ...) are looked up when first asked
+    for and then kept, instead of walking the whole hierarchy of a dataset
+    that may have millions of rows.
+    """
+
+    def __init__(self, repository):
+        """
+        Build the column choice lists of a dataset version.
+
+        Args:
+            repository (DatabaseRepository or CompactDataset): The dataset to build the catalog from
+        """
+        self._build_columns(repository)
+        self.repository = repository
+        self.cities = {}
+        self.universities = {}
+        self.programs = {}
+
+    def _cached(self, cache, key, query):
+        """Choices from the cache, or from the query, kept if it found any."""
+        choices = cache.get(key)
+        if choices is None:
+            choices = _as_choices(query())
+            # Unknown (e.g. user submitted) keys aren't kept, so the cache only grows with the data
+            if choices:
+                cache[key] = choices
+        return choices
+
+    def city_choices(self, country):
+        """Choices of cities in a country."""
+        if not country:
+            return EMPTY_CHOICES
+        return self._cached(self.cities, country, lambda: self.repository.cities(country))
+
+    def university_choices(self, country, city):
+        """Choices of universities in a city."""
+        if not (country and city):
+            return EMPTY_CHOICES
+        return self._cached(self.universities, (country, city),
+                            lambda: self.repository.universities(country, city))
+
+    def program_choices(self, country, city, university):
+        """Choices of programs offered by a university."""
+        if not (country and city and university):
+            return EMPTY_CHOICES
+        key = (country, city, university)
+        return self._cached(self.programs, key, lambda: self.repository.programs(*key))
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def choice_catalog_is_current():
+    """Whether get_choice_catalog() would return without loading or building anything."""
+    catalog = _catalog
+    return repository_is_current() and catalog is not None and catalog.version == get_repository().version
+
+
+def get_choice_catalog():
+    """
+    Get the choice catalog for the current dataset version of the DATASET_BACKEND.
+
+    Returns:
+        ChoiceCatalog: The shared catalog, rebuilt only when the dataset changes
+    """
+    global _catalog
+    dataset = get_repository()
+    catalog = _catalog
+    if catalog is None or catalog.version != dataset.version:
+        with _catalog_lock:
+            if _catalog is None or _catalog.version != dataset.version:
+                _catalog = ChoiceCatalog(dataset) if DATASET_BACKEND == 'memory' else LazyChoiceCatalog(dataset)
+            catalog = _catalog
+    return catalog
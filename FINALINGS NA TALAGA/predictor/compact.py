@@ -0,0 +1,472 @@
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from .dataset import DatasetLookups, DatasetStore, get_dataset_stamp
+
+# Compact files are stored next to the dataset snapshots (snapshot.py isn't imported, as it needs pandas)
+COMPACT_DIR = getattr(settings, 'DATASET_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'cache', 'datasets'))
+
+# Columns of the hierarchical index, in key order
+HIERARCHY = ['Country', 'City', 'University', 'Program']
+
+# Strings pd.read_csv reads as missing values by default
+NA_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+}
+
+MAGIC = b'EDUCOMPACT'
+COMPACT_FORMAT = 1
+# Arrays start on cache line boundaries
+ALIGNMENT = 64
+
+
+def compact_path(version, directory=None):
+    """File the compact form of a dataset version is stored in."""
+    return os.path.join(directory or COMPACT_DIR, f"dataset.{version}.compact")
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def read_columns(raw):
+    """
+    Parse dataset CSV bytes into typed columns, without pandas.
+
+    Types are inferred as pd.read_csv infers them for clean data: a column of
+    integers is int64, a column of numbers (or integers with missing values)
+    is float64 with NaN for missing values, anything else is strings with
+    None for missing values.
+
+    Args:
+        raw (bytes): The CSV
+
+    Returns:
+        dict: Column name -> int64/float64 array or list of str
+    """
+    reader = csv.reader(io.StringIO(raw.decode('utf-8')))
+    header = next(reader, [])
+    values = list(zip(*reader)) or [()] * len(header)
+    columns = {}
+    for name, column in zip(header, values):
+        missing = [value in NA_VALUES for value in column]
+        try:
+            if any(missing):
+                raise ValueError
+            columns[name] = np.array([int(value) for value in column], dtype=np.int64)
+            continue
+        except ValueError:
+            pass
+        try:
+            columns[name] = np.array([np.nan if na else float(value) for value, na in zip(column, missing)],
+                                     dtype=np.float64)
+        except ValueError:
+            columns[name] = [None if na else value for value, na in zip(column, missing)]
+    return columns
+
+
+def _narrow(values):
+    """The smallest numeric type that holds every value exactly (as its shortest repr for floats)."""
+    if values.dtype.kind == 'i':
+        if not len(values) or (values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max):
+            return values.astype(np.int32)
+        return values
+    narrow = values.astype(np.float32)
+    if np.array_equal(narrow.astype(str).astype(np.float64), values, equal_nan=True):
+        return narrow
+    return values
+
+
+def _widen(values):
+    """float32 values as the float64 they were narrowed from, through their shortest repr."""
+    # Each distinct value is formatted once; a column has far fewer of them than rows
+    uniques, inverse = np.unique(values, return_inverse=True)
+    return uniques.astype(str).astype(np.float64)[inverse]
+
+
+def write_compact(columns, path):
+    """
+    Save a dataset in the compact, memory-mappable form CompactDataset reads.
+
+    The file holds a JSON header and aligned arrays:
+
+    - string columns: the sorted unique values (the vocabulary) in one UTF-8
+      buffer with their byte offsets, and every row as the smallest signed
+      integer code into it (-1 for a missing value); a code's order is its
+      string's order
+    - numeric columns: int32 or float32 when every value fits exactly, else
+      int64/float64
+    - the hierarchical index: every row's (country, city, university, program)
+      codes packed into one int64 key, sorted (stable, so each key's rows stay
+      in file order), with the row number of each key
+
+    Args:
+        columns (dict): Column name -> values, as read_columns() returns them
+        path (str): File to write; it is replaced atomically
+    """
+    rows = len(next(iter(columns.values()), ()))
+    arrays = {}
+    header = {'format': COMPACT_FORMAT, 'rows': rows, 'columns': [], 'arrays': {}, 'index': {}}
+    codes = {}
+    for name, values in columns.items():
+        if isinstance(values, np.ndarray):
+            header['columns'].append({'name': name, 'type': 'int' if values.dtype.kind == 'i' else 'float'})
+            arrays[f'values.{name}'] = _narrow(values)
+            continue
+        vocabulary = sorted({value for value in values if value is not None})
+        lookup = {value: code for code, value in enumerate(vocabulary)}
+        dtype = np.min_scalar_type(-max(len(vocabulary), 1))
+        codes[name] = np.array([lookup.get(value, -1) for value in values], dtype=dtype)
+        encoded = [value.encode('utf-8') for value in vocabulary]
+        header['columns'].append({'name': name, 'type': 'str'})
+        arrays[f'codes.{name}'] = codes[name]
+        arrays[f'offsets.{name}'] = np.cumsum([0] + [len(value) for value in encoded], dtype=np.int64)
+        arrays[f'text.{name}'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+    # Pack the hierarchy codes (+1, so missing values are 0) into one key, country in the highest bits
+    bits = [(len(arrays[f'offsets.{name}'])).bit_length() for name in HIERARCHY]
+    if sum(bits) > 63:
+        raise ValueError(f"the hierarchy has too many values to index ({sum(bits)} bits)")
+    shifts = [sum(bits[i + 1:]) for i in range(len(HIERARCHY))]
+    keys = np.zeros(rows, dtype=np.int64)
+    for name, shift in zip(HIERARCHY, shifts):
+        keys |= (codes[name].astype(np.int64) + 1) << shift
+    order = np.argsort(keys, kind='stable')
+    arrays['index.keys'] = keys[order]
+    arrays['index.rows'] = order.astype(np.min_scalar_type(max(rows - 1, 0)))
+    header['index'] = {'bits': bits, 'shifts': shifts}
+
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        header['arrays'][name] = [offset, array.dtype.str, len(array)]
+        offset += array.nbytes
+    encoded_header = json.dumps(header).encode('utf-8')
+    prefix = MAGIC + len(encoded_header).to_bytes(8, 'little') + encoded_header
+    start = _aligned(len(prefix))
+
+    # Write then rename, so other workers never map a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(prefix.ljust(start, b'\0'))
+        for name, array in arrays.items():
+            file.seek(start + header['arrays'][name][0])
+            file.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+class CompactDataset(DatasetLookups):
+    """
+    A dataset version as a read-only memory map of its compact file (see write_compact).
+
+    Every worker process maps the same file, so its pages are in memory once
+    (in the page cache) however many workers there are, and a worker only
+    holds the Python objects of the values it returns. Lookups run on the
+    integer codes: a cascade level is a binary search of the sorted keys for
+    its prefix, whose sorted codes give the (sorted) next level.
+    """
+
+    def __init__(self, path, version, mtime=None):
+        """
+        Map a compact dataset file.
+
+        Args:
+            path (str): The file
+            version (str): Content hash of the CSV it was built from
+            mtime (int): Modification time (ns) of that CSV
+
+        Raises:
+            OSError: If the file can't be read
+            ValueError: If it isn't a compact dataset of the current format
+        """
+        self.path = path
+        self.version = version
+        self.mtime = mtime
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compact dataset")
+        size = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 8], 'little')
+        header = json.loads(self._map[len(MAGIC) + 8:len(MAGIC) + 8 + size])
+        if header.get('format') != COMPACT_FORMAT:
+            raise ValueError(f"{path} is not a format {COMPACT_FORMAT} compact dataset")
+        start = _aligned(len(MAGIC) + 8 + size)
+        self._arrays = {
+            name: np.frombuffer(self._map, dtype=np.dtype(dtype), count=count, offset=start + offset)
+            for name, (offset, dtype, count) in header['arrays'].items()
+        }
+        self.rows = header['rows']
+        self.columns = [column['name'] for column in header['columns']]
+        self.types = {column['name']: column['type'] for column in header['columns']}
+        self._bits = dict(zip(HIERARCHY, header['index']['bits']))
+        self._shifts = dict(zip(HIERARCHY, header['index']['shifts']))
+        self._keys = self._arrays['index.keys']
+        self._rows = self._arrays['index.rows']
+        # Indexing memoryviews of the vocabularies gives plain ints and bytes, much faster than NumPy scalars
+        self._offsets = {name: memoryview(self._arrays[f'offsets.{name}'])
+                         for name, kind in self.types.items() if kind == 'str'}
+        self._text = {name: memoryview(self._arrays[f'text.{name}'])
+                      for name, kind in self.types.items() if kind == 'str'}
+
+    def __len__(self):
+        return self.rows
+
+    # Column access
+
+    def codes(self, column):
+        """Codes of a string column's rows, into its vocabulary (-1 for missing values)."""
+        return self._arrays[f'codes.{column}']
+
+    def vocabulary_size(self, column):
+        """Number of unique values of a string column."""
+        return len(self._arrays[f'offsets.{column}']) - 1
+
+    def decode(self, column, codes):
+        """The strings of codes of a string column, as a list."""
+        offsets = self._offsets[column]
+        text = self._text[column]
+        return [str(text[offsets[code]:offsets[code + 1]], 'utf-8') if code >= 0 else np.nan
+                for code in np.asarray(codes).tolist()]
+
+    def vocabulary(self, column):
+        """Every unique value of a string column, sorted."""
+        return self.decode(column, range(self.vocabulary_size(column)))
+
+    def encode(self, column, value):
+        """
+        Code of a string column's value.
+
+        Returns:
+            int: The code, or None if the column doesn't have the value
+        """
+        offsets = self._offsets[column]
+        text = self._text[column]
+        target = str(value).encode('utf-8')
+        low, high = 0, len(offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(text[offsets[middle]:offsets[middle + 1]]) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(offsets) - 1 and text[offsets[low]:offsets[low + 1]] == target:
+            return low
+        return None
+
+    def values(self, column):
+        """
+        A numeric column's values as int64/float64, equal to the CSV's.
+
+        float32 columns are widened through their shortest decimal repr, which
+        is what the CSV had when they were narrowed.
+        """
+        values = self._arrays[f'values.{column}']
+        if values.dtype == np.float32:
+            return _widen(values)
+        return values.astype(np.int64 if self.types[column] == 'int' else np.float64)
+
+    # Hierarchy lookups
+
+    def _range(self, *prefix):
+        """Start and end, in the sorted index, of the rows matching a prefix of the hierarchy."""
+        key = 0
+        for name, value in zip(HIERARCHY, prefix):
+            code = self.encode(name, value)
+            if code is None:
+                return 0, 0
+            key |= (code + 1) << self._shifts[name]
+        end = key + (1 << self._shifts[HIERARCHY[len(prefix) - 1]])
+        return int(np.searchsorted(self._keys, key)), int(np.searchsorted(self._keys, end))
+
+    def _level(self, name, start, end):
+        """Codes of a hierarchy level in an index range."""
+        mask = (1 << self._bits[name]) - 1
+        return ((self._keys[start:end] >> self._shifts[name]) & mask) - 1
+
+    def _next_level(self, name, *prefix):
+        """Sorted values of the level after a prefix, which are sorted in the index too."""
+        codes = self._level(name, *self._range(*prefix))
+        if len(codes):
+            codes = codes[np.concatenate(([True], codes[1:] != codes[:-1]))]
+        return self.decode(name, codes[codes >= 0])
+
+    def countries(self):
+        """Sorted list of all countries."""
+        return self.vocabulary('Country')
+
+    def cities(self, country=None):
+        """Sorted cities of a country, or of the whole dataset if no country is given."""
+        if country:
+            return self._next_level('City', country)
+        return self.vocabulary('City')
+
+    def universities(self, country=None, city=None):
+        """Sorted universities for a country and city, a country, or the whole dataset."""
+        if country and city:
+            return self._next_level('University', country, city)
+        if country:
+            codes = np.unique(self._level('University', *self._range(country)))
+            return self.decode('University', codes[codes >= 0])
+        return self.vocabulary('University')
+
+    def programs(self, country=None, city=None, university=None):
+        """Sorted programs offered by a university, or of the whole dataset."""
+        if country and city and university:
+            return self._next_level('Program', country, city, university)
+        return self.vocabulary('Program')
+
+    def university_records(self, country, city, university):
+        """All dataset records for one university, in file order."""
+        start, end = self._range(country, city, university)
+        return self.records(np.sort(self._rows[start:end]))
+
+    def program_records(self, country, city, university, program):
+        """All dataset records for one program at a university, in file order."""
+        start, end = self._range(country, city, university, program)
+        return self.records(self._rows[start:end])
+
+    def records(self, rows):
+        """
+        Rows as dictionaries keyed by dataset column, like EducationDataset.records.
+
+        Args:
+            rows (array): Row numbers
+
+        Returns:
+            list: The records
+        """
+        columns = []
+        for name in self.columns:
+            if self.types[name] == 'str':
+                columns.append(self.decode(name, self.codes(name)[rows]))
+            else:
+                values = self._arrays[f'values.{name}'][rows]
+                if values.dtype == np.float32:
+                    columns.append([float(value) for value in values.astype(str)])
+                else:
+                    columns.append(values.tolist())
+        return [dict(zip(self.columns, values)) for values in zip(*columns)]
+
+    def distinct(self, column, filters=None):
+        """
+        Sorted unique values of a column among the records matching some filters.
+
+        Args:
+            column (str): Dataset column to get the values of
+            filters (dict): Column -> value equality filters; empty values are ignored
+
+        Returns:
+            list: The values
+        """
+        mask = None
+        for name, value in (filters or {}).items():
+            if not value:
+                continue
+            if self.types[name] == 'str':
+                code = self.encode(name, value)
+                if code is None:
+                    return []
+                matches = self.codes(name) == code
+            else:
+                matches = self.values(name) == float(value)
+            mask = matches if mask is None else mask & matches
+
+        if self.types[column] == 'str':
+            if mask is None:
+                return self.vocabulary(column)
+            codes = np.unique(self.codes(column)[mask])
+            return self.decode(column, codes[codes >= 0])
+        # Narrowing keeps the order of the values, so only the distinct ones are widened
+        values = self._arrays[f'values.{column}']
+        uniques = np.unique(values if mask is None else values[mask])
+        return (_widen(uniques) if uniques.dtype == np.float32 else uniques).tolist()
+
+
+class CompactStore:
+    """
+    Process-wide store mapping the compact form of the current dataset version.
+
+    The version is read from DatasetStore.stamp(), which hashes the CSV
+    without parsing it. The first process to need a version builds its
+    compact file (with the csv module, not pandas); every other one, and
+    every later start-up, maps it.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(CompactStore, cls).__new__(cls)
+                    instance._compact = None
+                    instance._load_lock = threading.Lock()
+                    cls._instance = instance
+        return cls._instance
+
+    def get(self):
+        """
+        Get the compact dataset of the current CSV, mapping (and building) it if it changed.
+
+        Returns:
+            CompactDataset: The current version
+        """
+        version, mtime = get_dataset_stamp()
+        compact = self._compact
+        if compact is None or compact.version != version:
+            with self._load_lock:
+                if self._compact is None or self._compact.version != version:
+                    self._compact = self._open(version, mtime)
+                compact = self._compact
+        return compact
+
+    def is_current(self):
+        """Whether get() would return the mapped version without reading or building anything."""
+        stamp = DatasetStore().cached_stamp()
+        compact = self._compact
+        return stamp is not None and compact is not None and compact.version == stamp[0]
+
+    def _open(self, version, mtime):
+        path = compact_path(version)
+        try:
+            return CompactDataset(path, version, mtime)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error reading compact dataset {path}, rebuilding it: {str(e)}")
+        version, path = build_compact()
+        return CompactDataset(path, version, mtime)
+
+
+def build_compact(csv_path=None, directory=None):
+    """
+    Write the compact file of a dataset CSV.
+
+    Args:
+        csv_path (str): The CSV, defaults to the app's dataset
+        directory (str): Where to write it, defaults to COMPACT_DIR
+
+    Returns:
+        tuple: (version of the CSV, file written)
+    """
+    with open(csv_path or DatasetStore().path, 'rb') as file:
+        raw = file.read()
+    version = hashlib.sha256(raw).hexdigest()[:16]
+    path = compact_path(version, directory)
+    write_compact(read_columns(raw), path)
+    return version, path
+
+
+def get_compact_dataset():
+    """Shortcut for the current version of the shared compact dataset store."""
+    return CompactStore().get()
@@ -0,0 +1,293 @@
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+
+# Default location of the education costs dataset used by the web app
+CSV_PATH = getattr(
+    settings,
+    'EDUCATION_DATA_CSV',
+    os.path.join(settings.BASE_DIR, 'model and data', 'International_Education_Costs.csv'),
+)
+
+
+# Dataset columns the prediction form is filled in with when a university, then a program, is selected
+UNIVERSITY_DEFAULTS = ['Living_Cost_Index', 'Rent_USD', 'Visa_Fee_USD', 'Insurance_USD', 'Exchange_Rate']
+PROGRAM_DEFAULTS = ['Level', 'Duration_Years']
+
+
+class DatasetLookups:
+    """
+    Lookups common to the in-memory snapshot and the database repository.
+
+    Subclasses provide countries(), cities(), universities(), programs(),
+    university_records() and program_records().
+    """
+
+    def locations(self):
+        """Sorted (country, city, university) of every university in the dataset."""
+        return [(country, city, university)
+                for country in self.countries()
+                for city in self.cities(country)
+                for university in self.universities(country, city)]
+
+    def cascade(self, country=None, city=None, university=None, program=None):
+        """
+        Everything the prediction form needs for a selection, in one lookup.
+
+        Args:
+            country, city, university, program (str): A prefix of the selection;
+                values after the first missing one are ignored
+
+        Returns:
+            dict: The options of the level after the selection ('countries', 'cities',
+                'universities' or 'programs'); once a university is selected, also its
+                form values under 'defaults' (living_cost_index, rent_usd, visa_fee_usd,
+                insurance_usd, exchange_rate) plus, with a program, its level and duration_years
+        """
+        if not country:
+            return {'countries': self.countries()}
+        if not city:
+            return {'cities': self.cities(country)}
+        if not university:
+            return {'universities': self.universities(country, city)}
+
+        result = {'programs': self.programs(country, city, university)}
+        records = self.university_records(country, city, university)
+        if records:
+            result['defaults'] = {field.lower(): records[0][field] for field in UNIVERSITY_DEFAULTS}
+            records = self.program_records(country, city, university, program) if program else []
+            if records:
+                result['defaults'].update((field.lower(), records[0][field]) for field in PROGRAM_DEFAULTS)
+        return result
+
+
+class EducationDataset(DatasetLookups):
+    """
+    An immutable, indexed snapshot of one version of the education costs CSV.
+
+    The Country -> City -> University -> Program hierarchy is indexed once when
+    the snapshot is built, so the cascade lookups used by the dropdown APIs are
+    plain dictionary reads returning pre-sorted lists.
+    """
+
+    def __init__(self, df, version, mtime=None):
+        """
+        Build the snapshot and its hierarchical index.
+
+        Args:
+            df (DataFrame): The parsed dataset
+            version (str): Content hash identifying this dataset version
+            mtime (int): Modification time (ns) of the file it was read from
+        """
+        self.df = df
+        self.version = version
+        self.mtime = mtime
+        self.records = df.to_dict(orient='records')
+        self._build_index()
+
+    def _build_index(self):
+        """Index the records by every prefix of (country, city, university, program)."""
+        hierarchy = {}
+        by_country = {}
+        self._university_records = {}
+        for record in self.records:
+            country, city = record['Country'], record['City']
+            university, program = record['University'], record['Program']
+            universities = hierarchy.setdefault(country, {}).setdefault(city, {})
+            universities.setdefault(university, {}).setdefault(program, []).append(record)
+            by_country.setdefault(country, set()).add(university)
+            self._university_records.setdefault((country, city, university), []).append(record)
+
+        self.hierarchy = hierarchy
+        self._countries = sorted(hierarchy)
+        self._all_cities = sorted(self.df['City'].unique().tolist())
+        self._all_universities = sorted(self.df['University'].unique().tolist())
+        self._all_programs = sorted(self.df['Program'].unique().tolist())
+
+        self._cities = {}
+        self._universities = {}
+        self._programs = {}
+        for country, cities in hierarchy.items():
+            self._cities[country] = sorted(cities)
+            self._universities[(country,)] = sorted(by_country[country])
+            for city, universities in cities.items():
+                self._universities[(country, city)] = sorted(universities)
+                for university, programs in universities.items():
+                    self._programs[(country, city, university)] = sorted(programs)
+
+    def __len__(self):
+        return len(self.records)
+
+    def countries(self):
+        """Sorted list of all countries."""
+        return self._countries
+
+    def cities(self, country=None):
+        """Sorted cities of a country, or of the whole dataset if no country is given."""
+        if country:
+            return self._cities.get(country, [])
+        return self._all_cities
+
+    def universities(self, country=None, city=None):
+        """Sorted universities for a country and city, a country, or the whole dataset."""
+        if country and city:
+            return self._universities.get((country, city), [])
+        if country:
+            return self._universities.get((country,), [])
+        return self._all_universities
+
+    def programs(self, country=None, city=None, university=None):
+        """Sorted programs offered by a university, or of the whole dataset."""
+        if country and city and university:
+            return self._programs.get((country, city, university), [])
+        return self._all_programs
+
+    def university_records(self, country, city, university):
+        """All dataset records for one university, in file order."""
+        return self._university_records.get((country, city, university), [])
+
+    def program_records(self, country, city, university, program):
+        """All dataset records for one program at a university, in file order."""
+        try:
+            return self.hierarchy[country][city][university][program]
+        except KeyError:
+            return []
+
+    def distinct(self, column, filters=None):
+        """
+        Sorted unique values of a column among the records matching some filters.
+
+        Args:
+            column (str): Dataset column to get the values of
+            filters (dict): Column -> value equality filters; empty values are ignored
+
+        Returns:
+            list: The values
+        """
+        df = self.df
+        for key, value in (filters or {}).items():
+            if value:
+                df = df[df[key] == value]
+        return sorted(df[column].unique().tolist())
+
+
+class DatasetStore:
+    """
+    Process-wide store holding the parsed education dataset.
+
+    The CSV is parsed once and shared by every request. Each access does a
+    single os.stat() and the snapshot is rebuilt only when the file's mtime
+    changes (and its content actually differs). It is loaded from the typed
+    columnar snapshot of its content (see snapshot.py), so only the first
+    process to load a new version of the file parses it.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(DatasetStore, cls).__new__(cls)
+                    instance.path = CSV_PATH
+                    instance._dataset = None
+                    instance._mtime = None
+                    instance._stamp = None
+                    instance._load_lock = threading.Lock()
+                    cls._instance = instance
+        return cls._instance
+
+    def get(self):
+        """
+        Get the current dataset snapshot, reloading it if the file changed.
+
+        Returns:
+            EducationDataset: The current snapshot
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            if self._dataset is not None:
+                # Keep serving the last good snapshot if the file disappears
+                return self._dataset
+            raise
+
+        if self._dataset is None or mtime != self._mtime:
+            with self._load_lock:
+                if self._dataset is None or mtime != self._mtime:
+                    self._load(mtime)
+        return self._dataset
+
+    def is_current(self):
+        """Whether get() would return the loaded snapshot without reading the file (one os.stat())."""
+        try:
+            return self._dataset is not None and os.stat(self.path).st_mtime_ns == self._mtime
+        except OSError:
+            return self._dataset is not None
+
+    def cached_stamp(self):
+        """
+        Get what stamp() would return, if that's known without reading the file.
+
+        Returns:
+            tuple: (version, mtime in ns), or None if the file changed since it was last hashed
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return (self._dataset.version, self._mtime) if self._dataset is not None else None
+        dataset = self._dataset
+        if dataset is not None and mtime == self._mtime:
+            return (dataset.version, mtime)
+        stamp = self._stamp
+        return stamp if stamp is not None and stamp[1] == mtime else None
+
+    def stamp(self):
+        """
+        Get the version and modification time of the current file, without parsing it.
+
+        This is what conditional requests are answered from: it is the loaded
+        snapshot's version when the file hasn't changed, else the file is
+        hashed (once per modification), but never read with pandas.
+
+        Returns:
+            tuple: (version, mtime in ns)
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            if self._dataset is not None:
+                return (self._dataset.version, self._mtime)
+            raise
+
+        dataset = self._dataset
+        if dataset is not None and mtime == self._mtime:
+            return (dataset.version, mtime)
+        stamp = self._stamp
+        if stamp is None or stamp[1] != mtime:
+            with open(self.path, 'rb') as file:
+                stamp = self._stamp = (hashlib.sha256(file.read()).hexdigest()[:16], mtime)
+        return stamp
+
+    def _load(self, mtime):
+        """Read the file and swap in a new snapshot if its content changed."""
+        with open(self.path, 'rb') as file:
+            raw = file.read()
+        version = hashlib.sha256(raw).hexdigest()[:16]
+        if self._dataset is None or version != self._dataset.version:
+            # Imported here so that importing this module (e.g. via forms.py) stays cheap
+            from .snapshot import load_dataset_frame
+            self._dataset = EducationDataset(load_dataset_frame(raw, version), version, mtime)
+        self._mtime = mtime
+
+
+def get_dataset():
+    """Shortcut for the current snapshot of the shared dataset store."""
+    return DatasetStore().get()
+
+
+def get_dataset_stamp():
+    """Shortcut for the (version, mtime) of the shared dataset store's file."""
+    return DatasetStore().stamp()
@@ -0,0 +1,88 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+# Threads running model inference and chart rendering for the async views
+INFERENCE_CONCURRENCY = getattr(settings, 'INFERENCE_CONCURRENCY', min(4, os.cpu_count() or 1))
+# Calls allowed to wait for a free thread before new ones are turned away (0 for no limit)
+INFERENCE_QUEUE_LIMIT = getattr(settings, 'INFERENCE_QUEUE_LIMIT', 256)
+
+
+class ExecutorBusy(Exception):
+    """Raised when the executor's queue is full."""
+
+
+class BoundedExecutor:
+    """
+    A thread pool for the CPU-bound work of the async views.
+
+    At most max_workers calls run at once, so inference can't take over every
+    core, and at most queue_limit more wait for a thread; beyond that, run()
+    fails fast with ExecutorBusy instead of queueing without bound. The event
+    loop stays free for cheap requests (like the dropdown lookups) meanwhile.
+    """
+
+    def __init__(self, max_workers, queue_limit=0):
+        """
+        Args:
+            max_workers (int): Number of threads
+            queue_limit (int): Number of calls that may wait for a thread, 0 for no limit
+        """
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        # Created on first use, so a process that forks after importing this has no threads to lose
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='inference')
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a function on the pool and wait for its result without blocking the event loop.
+
+        Raises:
+            ExecutorBusy: If max_workers calls are running and queue_limit more are waiting
+        """
+        with self._lock:
+            if self.queue_limit and self.pending >= self.max_workers + self.queue_limit:
+                self.rejected += 1
+                raise ExecutorBusy("Too many requests are waiting for inference, please retry")
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self):
+        """
+        Get the executor counters.
+
+        Returns:
+            dict: Limits, calls in flight, completed and rejected calls
+        """
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'queue_limit': self.queue_limit,
+                'pending': self.pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+
+inference_executor = BoundedExecutor(INFERENCE_CONCURRENCY, INFERENCE_QUEUE_LIMIT)
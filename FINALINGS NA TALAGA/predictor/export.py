@@ -0,0 +1,403 @@
+import base64
+import json
+import os
+import threading
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .dataset import get_dataset
+
+# Full exports are compressed once per dataset version and stored here
+EXPORT_CACHE_DIR = getattr(settings, 'EXPORT_CACHE_DIR', os.path.join(settings.BASE_DIR, 'cache', 'exports'))
+# Rows serialized (and compressed) per chunk of a streamed response
+EXPORT_CHUNK_ROWS = getattr(settings, 'EXPORT_CHUNK_ROWS', 1000)
+# Largest page a client may ask for with ?limit=
+EXPORT_MAX_PAGE_SIZE = getattr(settings, 'EXPORT_MAX_PAGE_SIZE', 10000)
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Query parameters that aren't filters
+RESERVED_PARAMETERS = {'format', 'fields', 'cursor', 'limit'}
+
+
+class StaleCursor(ValueError):
+    """Raised for a cursor issued for another version of the dataset."""
+
+
+def _json_values(series):
+    """Serialize a column's values exactly as json.dumps would, with a fast path per dtype."""
+    values = series.tolist()
+    if series.dtype.kind in 'iub':
+        return [json.dumps(value) for value in values] if series.dtype.kind == 'b' else list(map(str, values))
+    if series.dtype.kind == 'f' and not series.isna().any():
+        # json.dumps writes finite floats with float.__repr__
+        return list(map(float.__repr__, values))
+    if all(type(value) is str for value in values):
+        return list(map(json.encoder.encode_basestring_ascii, values))
+    return [json.dumps(value) for value in values]
+
+
+def _csv_value(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    text = value if isinstance(value, str) else repr(value)
+    if any(c in text for c in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def _csv_values(series):
+    """Serialize a column's values for CSV, with a fast path for integers and floats."""
+    values = series.tolist()
+    if series.dtype.kind in 'iu':
+        return list(map(str, values))
+    if series.dtype.kind == 'f' and not series.isna().any():
+        return list(map(float.__repr__, values))
+    return list(map(_csv_value, values))
+
+
+class ExportQuery:
+    """A parsed export request: format, projected fields, filters and page."""
+
+    def __init__(self, fmt='json', fields=None, filters=(), after=None, limit=None):
+        """
+        Args:
+            fmt (str): One of CONTENT_TYPES
+            fields (list): Dataset columns to include, in order (all when None)
+            filters (list): (column, operator, value) triples: '=' with a list of accepted
+                values, or '>=' / '<=' with a bound
+            after (int): Only rows after this row number (from a cursor)
+            limit (int): Most rows to return, None for all
+        """
+        self.format = fmt
+        self.fields = fields
+        self.filters = list(filters)
+        self.after = after
+        self.limit = limit
+
+    @property
+    def is_full_export(self):
+        return self.fields is None and not self.filters and self.after is None and self.limit is None
+
+    @classmethod
+    def from_params(cls, params, dataset):
+        """
+        Parse the query string of an export request.
+
+        Args:
+            params (QueryDict): request.GET
+            dataset (EducationDataset): The snapshot being exported
+
+        Raises:
+            StaleCursor: If the cursor was issued for another dataset version
+            ValueError: If a parameter is invalid
+        """
+        df = dataset.df
+        columns = {column.lower(): column for column in df.columns}
+
+        fmt = params.get('format', 'json').lower()
+        if fmt not in CONTENT_TYPES:
+            raise ValueError(f"Unknown format: {fmt} (use {', '.join(CONTENT_TYPES)})")
+
+        fields = None
+        if params.get('fields'):
+            fields = []
+            for name in params['fields'].split(','):
+                name = name.strip().lower()
+                if name not in columns:
+                    raise ValueError(f"Unknown field: {name}")
+                if columns[name] not in fields:
+                    fields.append(columns[name])
+
+        filters = []
+        for key in params:
+            name = key.lower()
+            if name in RESERVED_PARAMETERS:
+                continue
+            operator = '='
+            if name.startswith(('min_', 'max_')) and name[4:] in columns:
+                operator = '>=' if name.startswith('min_') else '<='
+                name = name[4:]
+                if df[columns[name]].dtype.kind not in 'iuf':
+                    raise ValueError(f"{key}: min_/max_ filters only apply to numeric fields")
+            if name not in columns:
+                raise ValueError(f"Unknown filter: {key}")
+            column = columns[name]
+            values = params.getlist(key)
+            if df[column].dtype.kind in 'iuf':
+                try:
+                    values = [float(value) for value in values]
+                except ValueError:
+                    raise ValueError(f"Invalid number for {key}: {', '.join(values)}")
+            if operator == '=':
+                # Repeating a column matches any of the values
+                filters.append((column, operator, values))
+            else:
+                filters.extend((column, operator, value) for value in values)
+
+        after = None
+        if params.get('cursor'):
+            after = decode_cursor(params['cursor'], dataset.version)
+
+        limit = None
+        if params.get('limit'):
+            try:
+                limit = int(params['limit'])
+            except ValueError:
+                raise ValueError(f"Invalid limit: {params['limit']}")
+            if not 1 <= limit <= EXPORT_MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {EXPORT_MAX_PAGE_SIZE}")
+
+        return cls(fmt, fields, filters, after, limit)
+
+
+def encode_cursor(version, row):
+    """Opaque cursor for the rows after `row` of a dataset version."""
+    return base64.urlsafe_b64encode(f"{version}:{row}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, version):
+    """
+    Decode a cursor made by encode_cursor().
+
+    Returns:
+        int: The last row number of the previous page
+
+    Raises:
+        StaleCursor: If the cursor belongs to another dataset version
+        ValueError: If the cursor is malformed
+    """
+    try:
+        cursor_version, row = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split(':')
+        row = int(row)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if cursor_version != version:
+        raise StaleCursor("The dataset changed since this cursor was issued, restart the export")
+    return row
+
+
+def select_rows(df, query):
+    """
+    Find the rows of an export page.
+
+    Returns:
+        tuple: (row numbers of the page, number of rows matching the filters,
+            whether more matching rows follow the page)
+    """
+    if query.filters:
+        mask = np.ones(len(df), dtype=bool)
+        for column, operator, value in query.filters:
+            values = df[column]
+            if operator == '>=':
+                mask &= (values >= value).to_numpy()
+            elif operator == '<=':
+                mask &= (values <= value).to_numpy()
+            else:
+                mask &= values.isin(value).to_numpy()
+        matching = np.flatnonzero(mask)
+    else:
+        matching = np.arange(len(df))
+
+    start = 0 if query.after is None else int(np.searchsorted(matching, query.after, side='right'))
+    end = len(matching) if query.limit is None else min(len(matching), start + query.limit)
+    return matching[start:end], len(matching), end < len(matching)
+
+
+def iter_text(df, rows, fields, fmt):
+    """
+    Serialize export rows, EXPORT_CHUNK_ROWS at a time.
+
+    Each chunk is taken from the typed columns and serialized on its own, so
+    only one chunk's text is in memory at a time, whatever the dataset size.
+
+    Args:
+        df (DataFrame): The dataset's rows
+        rows (ndarray): Row numbers to include
+        fields (list): Columns to include, in order
+        fmt (str): One of CONTENT_TYPES
+
+    Returns:
+        iterator: Consecutive str pieces of the document
+    """
+    serialize = _csv_values if fmt == 'csv' else _json_values
+    chunks = ([serialize(df[field].take(rows[start:start + EXPORT_CHUNK_ROWS])) for field in fields]
+              for start in range(0, len(rows), EXPORT_CHUNK_ROWS))
+    return _text_chunks(chunks, fields, fmt)
+
+
+def _text_chunks(chunks, fields, fmt):
+    if fmt == 'csv':
+        yield ','.join(_csv_value(field) for field in fields) + '\r\n'
+        for columns in chunks:
+            yield ''.join(','.join(values) + '\r\n' for values in zip(*columns))
+        return
+
+    keys = [json.dumps(field) + ': ' for field in fields]
+    if fmt == 'ndjson':
+        for columns in chunks:
+            yield ''.join('{' + ', '.join(map(str.__add__, keys, values)) + '}\n' for values in zip(*columns))
+        return
+
+    # A JSON array, formatted like JsonResponse would
+    yield '['
+    for i, columns in enumerate(chunks):
+        yield (', ' if i else '') + ', '.join('{' + ', '.join(map(str.__add__, keys, values)) + '}'
+                                            for values in zip(*columns))
+    yield ']'
+
+
+def iter_encoded(chunks, compress):
+    """Encode text pieces as UTF-8, gzip-compressing them as a stream if asked to."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_file(path, chunk_size=64 * 1024):
+    with open(path, 'rb') as file:
+        while True:
+            data = file.read(chunk_size)
+            if not data:
+                break
+            yield data
+
+
+def iter_decompressed(path):
+    """Stream a gzip file's content, decompressed as it is read."""
+    decompressor = zlib.decompressobj(31)
+    for data in iter_file(path):
+        data = decompressor.decompress(data)
+        if data:
+            yield data
+    yield decompressor.flush()
+
+
+class ExportCache:
+    """
+    Compressed full exports, per dataset version.
+
+    The gzip-compressed full export in each format is written once per version
+    to EXPORT_CACHE_DIR (a chunk at a time), so every worker then streams it
+    straight from the file, decompressing it for clients that don't accept
+    gzip. Nothing is kept in memory. Preparation is single-flight, as in ChartCache.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            for stale in [stale for stale in self._locks if stale[1] != key[1]]:
+                del self._locks[stale]
+            return self._locks.setdefault(key, threading.Lock())
+
+    def path(self, version, fmt):
+        """File the compressed full export is stored in."""
+        return os.path.join(self.directory, f"{version}.{fmt}.gz")
+
+    def full_export(self, dataset, fmt):
+        """
+        Get the gzip-compressed full export of a dataset version, writing it the first time.
+
+        Returns:
+            str: Path of the file, or None if it couldn't be written
+        """
+        path = self.path(dataset.version, fmt)
+        if os.path.exists(path):
+            return path
+        with self._lock_for((fmt, dataset.version)):
+            if os.path.exists(path):
+                return path
+            rows = np.arange(len(dataset.df))
+            chunks = iter_encoded(iter_text(dataset.df, rows, list(dataset.df.columns), fmt), True)
+            # Write then rename, so other workers never read a partial file
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as file:
+                    for data in chunks:
+                        file.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error saving export {path}: {str(e)}")
+                return None
+        return path
+
+
+export_cache = ExportCache(EXPORT_CACHE_DIR)
+
+
+def accepts_gzip(request):
+    return 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '').lower()
+
+
+def export_response(request, dataset=None, asynchronous=False):
+    """
+    Stream (a page of) the dataset in the format the request asks for.
+
+    Args:
+        request (HttpRequest): The export request (see views.education_data_api for its parameters)
+        dataset (EducationDataset): Snapshot to export, defaults to the current one
+        asynchronous (bool): Stream with an async iterator, for async views
+
+    Returns:
+        StreamingHttpResponse: The rows; when the page is not the last one, the
+            X-Next-Cursor and Link headers point to the next page
+
+    Raises:
+        StaleCursor: If the cursor was issued for another dataset version
+        ValueError: If a parameter is invalid
+    """
+    dataset = dataset or get_dataset()
+    query = ExportQuery.from_params(request.GET, dataset)
+    compress = accepts_gzip(request)
+
+    next_cursor = None
+    path = export_cache.full_export(dataset, query.format) if query.is_full_export else None
+    if path is not None:
+        chunks = iter_file(path) if compress else iter_decompressed(path)
+        total = len(dataset.df)
+    else:
+        rows, total, more = select_rows(dataset.df, query)
+        if more:
+            next_cursor = encode_cursor(dataset.version, int(rows[-1]))
+        fields = query.fields or list(dataset.df.columns)
+        chunks = iter_encoded(iter_text(dataset.df, rows, fields, query.format), compress)
+
+    if asynchronous:
+        chunks = _aiter(chunks)
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[query.format])
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    response['X-Dataset-Version'] = dataset.version
+    response['X-Total-Count'] = str(total)
+    if next_cursor is not None:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        response['X-Next-Cursor'] = next_cursor
+        response['Link'] = f'<{request.path}?{params.urlencode()}>; rel="next"'
+    return response
+
+
+async def _aiter(chunks):
+    # Each chunk is a bounded amount of work, so the event loop is only held briefly at a time
+    for chunk in chunks:
+        yield chunk
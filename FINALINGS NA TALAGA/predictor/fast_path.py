@@ -0,0 +1,440 @@
+import json
+
+import numpy as np
+
+# Batches of at least this many rows go to the booster as a CSR matrix of their stored entries
+# (sparse_output pipelines only); below it, the dense row fill is faster
+SPARSE_MIN_ROWS = 64
+
+# Objectives whose prediction is the raw sum of the trees (no link function), so that
+# the contributions add up to it
+IDENTITY_OBJECTIVES = ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror')
+
+
+class FastPathPredictor:
+    """
+    Low-latency inference compiled from the fitted sklearn Pipeline.
+
+    The ColumnTransformer/OneHotEncoder step is replaced by precomputed
+    category -> column index maps, and each request is written straight into
+    a NumPy row that goes to the XGBoost booster's inplace_predict. This skips
+    the DataFrame construction, the transformer and sklearn's input validation.
+
+    When the pipeline produces sparse matrices, XGBoost treats the entries a
+    sparse matrix doesn't store (zeros and unknown categories) as missing. The
+    row is therefore filled with NaN (XGBoost's missing value) and only the
+    stored entries are set, so predictions are identical to the pipeline's.
+    """
+
+    def __init__(self, booster, feature_columns, numeric_features, categorical_features, categories,
+                 sparse_output, iteration_range=(0, 0)):
+        """
+        Args:
+            booster (xgboost.Booster): The trained booster
+            feature_columns (list): Order of the features in the rows passed to predict()
+            numeric_features (list): Passthrough numeric columns, in transformer order
+            categorical_features (list): One-hot encoded columns, in transformer order
+            categories (list): The encoder's categories_ for each categorical column
+            sparse_output (bool): Whether the pipeline fed the booster sparse matrices
+            iteration_range (tuple): Trees to use, as XGBRegressor.predict would
+        """
+        self.booster = booster
+        self.sparse_output = sparse_output
+        self.iteration_range = iteration_range
+        self.fill_value = np.nan if sparse_output else 0.0
+
+        # Positions of the model inputs within a row
+        self.feature_columns = list(feature_columns)
+        self.numeric_positions = [self.feature_columns.index(column) for column in numeric_features]
+        self.categorical_positions = [self.feature_columns.index(column) for column in categorical_features]
+
+        # Category -> output column maps, laid out after the numeric block
+        self.category_columns = []
+        offset = len(numeric_features)
+        for values in categories:
+            self.category_columns.append({str(value): offset + i for i, value in enumerate(values)})
+            offset += len(values)
+        self.n_features = offset
+
+        # Model feature (position in feature_columns) each output column was encoded from
+        self.column_features = np.empty(self.n_features, dtype=np.intp)
+        self.column_features[:len(numeric_features)] = self.numeric_positions
+        for columns, position in zip(self.category_columns, self.categorical_positions):
+            self.column_features[list(columns.values())] = position
+        self._tree_contributions = None
+
+    @classmethod
+    def from_pipeline(cls, pipeline, feature_columns):
+        """
+        Compile a fast path from the app's Pipeline(preprocessor, model).
+
+        Args:
+            pipeline (Pipeline): The fitted pipeline
+            feature_columns (list): Order of the features in the rows passed to predict()
+
+        Raises:
+            ValueError: If the pipeline doesn't have the expected structure
+        """
+        try:
+            preprocessor = pipeline.named_steps['preprocessor']
+            estimator = pipeline.named_steps['model']
+            transformers = {name: (transformer, list(columns))
+                            for name, transformer, columns in preprocessor.transformers_}
+            numeric_transformer, numeric_features = transformers['num']
+            encoder, categorical_features = transformers['cat']
+        except (AttributeError, KeyError, TypeError) as e:
+            raise ValueError(f"Unsupported pipeline structure: {str(e)}")
+
+        # Only an identity numeric step and a plain one-hot encoder can be compiled
+        identity = numeric_transformer == 'passthrough' or (
+            type(numeric_transformer).__name__ == 'FunctionTransformer' and numeric_transformer.func is None)
+        if not identity:
+            raise ValueError("Numeric features must be passed through unchanged")
+        if type(encoder).__name__ != 'OneHotEncoder' or encoder.drop_idx_ is not None:
+            raise ValueError("Categorical features must use a OneHotEncoder without dropped categories")
+        if getattr(encoder, 'infrequent_categories_', None) is not None and any(
+                c is not None for c in encoder.infrequent_categories_):
+            raise ValueError("Encoders with infrequent categories are not supported")
+        if preprocessor.output_indices_['remainder'].stop or (
+                sorted(numeric_features + categorical_features) != sorted(feature_columns)):
+            raise ValueError("The pipeline must use exactly the app's model features")
+
+        try:
+            iteration_range = (0, estimator.best_iteration + 1)
+        except AttributeError:
+            iteration_range = (0, 0)
+
+        return cls(estimator.get_booster(), feature_columns, numeric_features, categorical_features,
+                   encoder.categories_, preprocessor.sparse_output_, iteration_range)
+
+    def encode(self, rows):
+        """
+        Encode rows the way the pipeline's preprocessor would.
+
+        Args:
+            rows (list): Tuples of the features in feature_columns order
+                (categories as str, numbers as float), e.g. from make_cache_key()
+
+        Returns:
+            ndarray: (len(rows), n_features) float32 matrix for the booster
+        """
+        matrix = np.full((len(rows), self.n_features), self.fill_value, dtype=np.float32)
+        for i, row in enumerate(rows):
+            for column, position in enumerate(self.numeric_positions):
+                value = row[position]
+                if value != 0 or not self.sparse_output:
+                    matrix[i, column] = value
+            for columns, position in zip(self.category_columns, self.categorical_positions):
+                column = columns.get(row[position])
+                if column is not None:
+                    matrix[i, column] = 1.0
+        return matrix
+
+    def codes(self, rows):
+        """
+        Reduce rows to their compact numeric form: the one-hot column of each
+        category and the numeric features.
+
+        Args:
+            rows (list): Tuples of the features in feature_columns order
+
+        Returns:
+            tuple: (int32 (len(rows), n_categorical) output columns, -1 for unknown
+                categories, float64 (len(rows), n_numeric) numeric features)
+        """
+        categories = np.empty((len(rows), len(self.categorical_positions)), dtype=np.int32)
+        numerics = np.empty((len(rows), len(self.numeric_positions)), dtype=np.float64)
+        for i, row in enumerate(rows):
+            categories[i] = [columns.get(row[position], -1)
+                             for columns, position in zip(self.category_columns, self.categorical_positions)]
+            numerics[i] = [row[position] for position in self.numeric_positions]
+        return categories, numerics
+
+    def codes_frame(self, df):
+        """Like codes(), for a DataFrame with (at least) the feature columns, vectorized per column."""
+        categories = np.empty((len(df), len(self.categorical_positions)), dtype=np.int32)
+        numerics = np.empty((len(df), len(self.numeric_positions)), dtype=np.float64)
+        for k, (columns, position) in enumerate(zip(self.category_columns, self.categorical_positions)):
+            indices = df[self.feature_columns[position]].astype(str).map(columns).to_numpy(dtype=np.float64)
+            categories[:, k] = np.where(np.isnan(indices), -1, indices)
+        for k, position in enumerate(self.numeric_positions):
+            numerics[:, k] = df[self.feature_columns[position]].to_numpy(dtype=np.float64)
+        return categories, numerics
+
+    def encode_codes(self, categories, numerics):
+        """
+        Encode rows from their compact form (see codes()) the way the pipeline's preprocessor would.
+
+        Returns:
+            ndarray: (len(categories), n_features) float32 matrix for the booster
+        """
+        matrix = np.full((len(categories), self.n_features), self.fill_value, dtype=np.float32)
+        if self.sparse_output:
+            matrix[:, :numerics.shape[1]] = np.where(numerics != 0, numerics, np.nan)
+        else:
+            matrix[:, :numerics.shape[1]] = numerics
+        rows, known = np.nonzero(categories >= 0)
+        matrix[rows, categories[rows, known]] = 1.0
+        return matrix
+
+    def encode_sparse(self, categories, numerics):
+        """
+        Like encode_codes(), as a CSR matrix holding only the entries the pipeline's sparse
+        matrix would store. XGBoost then skips the missing entries instead of scanning every
+        one-hot column of every row, which halves the prediction time of large batches.
+
+        Returns:
+            scipy.sparse.csr_matrix: (len(categories), n_features) float32 matrix for the booster
+        """
+        from scipy.sparse import csr_matrix
+
+        rows, n_numeric = numerics.shape
+        columns = np.hstack([np.broadcast_to(np.arange(n_numeric, dtype=np.int32), (rows, n_numeric)),
+                             categories])
+        values = np.hstack([numerics.astype(np.float32), np.ones(categories.shape, dtype=np.float32)])
+        stored = np.hstack([numerics != 0, categories >= 0])
+        indptr = np.zeros(rows + 1, dtype=np.int64)
+        np.cumsum(stored.sum(axis=1), out=indptr[1:])
+        return csr_matrix((values[stored], columns[stored], indptr), shape=(rows, self.n_features))
+
+    def encode_frame(self, df):
+        """
+        Encode a DataFrame with the model's feature columns, vectorized per column.
+
+        Args:
+            df (DataFrame): Frame with (at least) the feature columns
+
+        Returns:
+            ndarray: (len(df), n_features) float32 matrix for the booster
+        """
+        return self.encode_codes(*self.codes_frame(df))
+
+    def predict_codes(self, categories, numerics):
+        """Predict tuition for rows in their compact form (see codes())."""
+        if self.sparse_output and len(categories) >= SPARSE_MIN_ROWS:
+            matrix = self.encode_sparse(categories, numerics)
+        else:
+            matrix = self.encode_codes(categories, numerics)
+        return self.booster.inplace_predict(matrix, iteration_range=self.iteration_range, missing=np.nan)
+
+    def predict_frame(self, df):
+        """Predict tuition for every row of a DataFrame (see encode_frame())."""
+        return self.predict_codes(*self.codes_frame(df))
+
+    def explain_codes(self, categories, numerics, exact=False):
+        """
+        Predict tuition for rows in their compact form (see codes()) and split each
+        prediction into the contributions of the model features.
+
+        By default the contributions are the booster's approximate ones (Saabas, as
+        booster.predict(..., pred_contribs=True, approx_contribs=True) returns them):
+        each split on a row's path credits its feature with the change of the
+        expected prediction. They only depend on the leaf the row reaches in each
+        tree, so they are precomputed per leaf (see TreeContributions) and a batch
+        only needs the leaves, which also give the prediction: the leaf values summed
+        in the booster's order, so it is identical to predict_codes().
+
+        With exact=True they are the booster's TreeSHAP values (pred_contribs=True),
+        which take several times longer per row than the prediction.
+
+        Either way the one-hot columns of a categorical feature are summed, so there is
+        one contribution per feature, and base value + contributions = prediction
+        (up to float32 rounding).
+
+        Returns:
+            tuple: (float32 predicted tuition of each row, (rows, len(feature_columns))
+                float64 contributions in feature_columns order, float base value)
+
+        Raises:
+            ValueError: If the model's trees or objective can't be explained this way
+        """
+        import xgboost
+
+        rows = len(categories)
+        if self.sparse_output and rows >= SPARSE_MIN_ROWS:
+            matrix = self.encode_sparse(categories, numerics)
+        else:
+            matrix = self.encode_codes(categories, numerics)
+
+        if exact:
+            contributions = self.booster.predict(
+                xgboost.DMatrix(matrix, missing=np.nan), pred_contribs=True,
+                iteration_range=self.iteration_range).reshape(rows, -1)
+            features = np.zeros((self.n_features, len(self.feature_columns)))
+            features[np.arange(self.n_features), self.column_features] = 1.0
+            by_feature = contributions[:, :-1].astype(np.float64) @ features
+            base_value = float(contributions[0, -1]) if rows else 0.0
+            return self.predict_codes(categories, numerics), by_feature, base_value
+
+        trees = self.tree_contributions()
+        if rows < SPARSE_MIN_ROWS:
+            # Walking a few rows down the trees here is cheaper than building a DMatrix
+            nodes = trees.leaves(matrix)
+        else:
+            nodes = self.booster.predict(
+                xgboost.DMatrix(matrix, missing=np.nan), pred_leaf=True,
+                iteration_range=self.iteration_range).reshape(rows, -1).astype(np.intp)
+            nodes += trees.offsets
+        return trees.predict(nodes), trees.contributions(nodes), trees.base_value
+
+    def tree_contributions(self):
+        """
+        The TreeContributions of the booster, built on first use.
+
+        Concurrent first calls may both build it, with the same result.
+        """
+        if self._tree_contributions is None:
+            self._tree_contributions = TreeContributions(self.booster, self.column_features,
+                                                         len(self.feature_columns), self.iteration_range)
+        return self._tree_contributions
+
+    def predict(self, rows):
+        """
+        Predict tuition for rows of features.
+
+        Args:
+            rows (list): Tuples of the features in feature_columns order
+
+        Returns:
+            ndarray: Predicted tuition (float32, as the pipeline returns it)
+        """
+        return self.booster.inplace_predict(
+            self.encode(rows), iteration_range=self.iteration_range, missing=np.nan)
+
+    def predict_one(self, features):
+        """Predict tuition for a single tuple of features."""
+        return self.predict([features])[0]
+
+
+class TreeContributions:
+    """
+    The trees of a booster as flat node arrays, with the approximate (Saabas)
+    contributions of the model features to reaching each node.
+
+    A node's expected value is the cover-weighted mean of its leaves' values;
+    the path to a leaf credits each split's feature with the expected value of
+    the child taken minus that of the node, as the booster's approx_contribs does.
+    The contributions of a row are then those of the leaves it reaches.
+    """
+
+    def __init__(self, booster, column_features, n_model_features, iteration_range=(0, 0)):
+        """
+        Args:
+            booster (xgboost.Booster): The trained booster
+            column_features (ndarray): The model feature each input column was encoded from
+            n_model_features (int): Number of model features
+            iteration_range (tuple): Trees to use, as in FastPathPredictor
+
+        Raises:
+            ValueError: If the model's trees or objective can't be explained this way
+        """
+        model = json.loads(booster.save_raw('json'))['learner']
+        objective = model['objective']['name']
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Explanations are not supported for the {objective} objective")
+        if model['learner_model_param'].get('num_class', '0') != '0' or (
+                model['learner_model_param'].get('num_target', '1') != '1'):
+            raise ValueError("Explanations are only supported for single-output regression")
+        trees = model['gradient_booster']['model']['trees']
+        start, end = iteration_range
+        if end:
+            # One tree per boosting round, as checked above
+            trees = trees[start:end]
+        self.base_score = np.float32(float(model['learner_model_param']['base_score'].strip('[]')))
+
+        offsets, tables, values, lefts, rights, splits, defaults = [], [], [], [], [], [], []
+        self.base_value = float(self.base_score)
+        self.depth = 0
+        offset = 0
+        for tree in trees:
+            left = np.asarray(tree['left_children'], dtype=np.intp)
+            right = np.asarray(tree['right_children'], dtype=np.intp)
+            split = tree['split_indices']
+            cover = tree['sum_hessian']
+            value = np.asarray(tree['split_conditions'], dtype=np.float32)
+            if any(tree['split_type']):
+                raise ValueError("Explanations are not supported for categorical splits")
+            # Nodes from the root down, so parents come before their children
+            order = [0]
+            depth = {0: 0}
+            for node in order:
+                if left[node] != -1:
+                    order.extend((left[node], right[node]))
+                    depth[left[node]] = depth[right[node]] = depth[node] + 1
+            mean = value.astype(np.float64)
+            for node in reversed(order):
+                if left[node] != -1:
+                    mean[node] = (mean[left[node]] * cover[left[node]]
+                                  + mean[right[node]] * cover[right[node]]) / cover[node]
+            table = np.zeros((len(left), n_model_features))
+            for node in order:
+                if left[node] != -1:
+                    feature = column_features[split[node]]
+                    for child in (left[node], right[node]):
+                        table[child] = table[node]
+                        table[child, feature] += mean[child] - mean[node]
+            self.base_value += mean[0]
+            self.depth = max(self.depth, max(depth.values()))
+
+            # Leaves point to themselves, so walking further down keeps rows on their leaf
+            leaf = left == -1
+            nodes = np.arange(len(left)) + offset
+            offsets.append(offset)
+            tables.append(table)
+            values.append(value)
+            lefts.append(np.where(leaf, nodes, left + offset))
+            rights.append(np.where(leaf, nodes, right + offset))
+            splits.append(np.where(leaf, 0, split))
+            defaults.append(np.asarray(tree['default_left'], dtype=bool))
+            offset += len(left)
+
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+        self.table = np.vstack(tables)
+        # Thresholds of the splits, outputs of the leaves
+        self.values = np.concatenate(values)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.split = np.concatenate(splits)
+        self.default_left = np.concatenate(defaults)
+
+    def leaves(self, matrix):
+        """
+        Find the leaf each row reaches in each tree, as the booster does: a row goes
+        left when its value is below the threshold, or when it's missing (NaN) and
+        the split's default is left.
+
+        Args:
+            matrix (ndarray): Dense float32 rows, as FastPathPredictor.encode_codes() returns them
+
+        Returns:
+            ndarray: (rows, trees) leaf node indices in the flat node arrays
+        """
+        nodes = np.tile(self.offsets, (len(matrix), 1))
+        rows = np.arange(len(matrix))[:, None]
+        for _ in range(self.depth):
+            value = matrix[rows, self.split[nodes]]
+            go_left = np.where(np.isnan(value), self.default_left[nodes], value < self.values[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict(self, nodes):
+        """The prediction of each row from its leaves (see leaves()), identical to the booster's."""
+        # The booster adds the trees to the base score one by one, in float32: a
+        # cumulative sum reproduces it bit for bit
+        values = np.empty((len(nodes), len(self.offsets) + 1), dtype=np.float32)
+        values[:, 0] = self.base_score
+        values[:, 1:] = self.values[nodes]
+        return np.cumsum(values, axis=1, dtype=np.float32)[:, -1]
+
+    def contributions(self, nodes):
+        """The (rows, model features) contributions of each row from its leaves (see leaves())."""
+        if len(nodes) < SPARSE_MIN_ROWS:
+            return self.table[nodes].sum(axis=1)
+        from scipy.sparse import csr_matrix
+
+        # A batch sums its rows' leaves as a product with a 0/1 (rows, nodes) matrix, which
+        # doesn't hold the (rows, trees, features) gather in memory
+        rows, trees = nodes.shape
+        reached = csr_matrix((np.ones(nodes.size), nodes.ravel(), np.arange(0, nodes.size + 1, trees)),
+                             shape=(rows, len(self.table)))
+        return reached @ self.table
@@ -1,9 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-import pandas as pd
-import os
-from django.conf import settings
+
+from .choices import CatalogChoices, SELECT_CITY_FIRST, SELECT_COUNTRY_FIRST, get_choice_catalog
+from .repository import get_repository
 
 class UserRegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -14,32 +14,21 @@ class UserRegistrationForm(UserCreationForm):
 
 def get_csv_choices(field_name):
     """Get unique values from the CSV file for dropdown choices"""
-    csv_path = os.path.join(settings.BASE_DIR, 'model and data', 'International_Education_Costs.csv')
     try:
-        df = pd.read_csv(csv_path)
-        # Get unique values and sort them
-        unique_values = sorted(df[field_name].unique())
-        # Convert to choice tuples (value, label)
-        choices = [(str(val), str(val)) for val in unique_values]
-        return choices
+        return list(get_choice_catalog().column(field_name))
     except Exception as e:
         print(f"Error loading choices from CSV: {e}")
         return []
 
 def get_filtered_choices(field_name, filters=None):
     """Get choices filtered by other field values"""
-    csv_path = os.path.join(settings.BASE_DIR, 'model and data', 'International_Education_Costs.csv')
     try:
-        df = pd.read_csv(csv_path)
-        
-        # Apply filters
-        if filters:
-            for key, value in filters.items():
-                if value:
-                    df = df[df[key] == value]
+        choices = get_choice_catalog().filtered(field_name, filters)
+        if choices is not None:
+            return list(choices)
         
-        # Get unique values and sort them
-        unique_values = sorted(df[field_name].unique())
+        # Not one of the pre-filtered cascade keys, query the dataset instead
+        unique_values = get_repository().distinct(field_name, filters)
         # Convert to choice tuples (value, label)
         choices = [(str(val), str(val)) for val in unique_values]
         return choices
@@ -47,47 +36,68 @@ def get_filtered_choices(field_name, filters=None):
         print(f"Error loading filtered choices from CSV: {e}")
         return []
 
+class CatalogChoiceField(forms.ChoiceField):
+    """ChoiceField that validates catalog choices with a set lookup instead of a linear scan."""
+    
+    def valid_value(self, value):
+        if isinstance(self.choices, CatalogChoices):
+            return str(value) in self.choices.values
+        return super().valid_value(value)
+
 class EducationCostPredictionForm(forms.Form):
-    # Load choices from CSV
+    # Load choices from the shared choice catalog
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.catalog = catalog = get_choice_catalog()
         
-        # Set choices for all dropdown fields from CSV
-        self.fields['country'].choices = get_csv_choices('Country')
-        self.fields['city'].choices = [('', '-- Select Country First --')]
-        self.fields['university'].choices = [('', '-- Select City First --')]
-        self.fields['program'].choices = get_csv_choices('Program')
-        self.fields['level'].choices = get_csv_choices('Level')
-        self.fields['duration_years'].choices = get_csv_choices('Duration_Years')
+        # Attach the catalog's choice lists for all dropdown fields
+        self.fields['country'].choices = catalog.column('Country')
+        self.fields['city'].choices = SELECT_COUNTRY_FIRST
+        self.fields['university'].choices = SELECT_CITY_FIRST
+        self.fields['program'].choices = catalog.column('Program')
+        self.fields['level'].choices = catalog.column('Level')
+        self.fields['duration_years'].choices = catalog.column('Duration_Years')
         
         # Load choices for numeric fields
-        self.fields['living_cost_index'].choices = [('', '-- Auto-filled --')] + get_csv_choices('Living_Cost_Index')
-        self.fields['rent_usd'].choices = [('', '-- Auto-filled --')] + get_csv_choices('Rent_USD')
-        self.fields['visa_fee_usd'].choices = [('', '-- Auto-filled --')] + get_csv_choices('Visa_Fee_USD')
-        self.fields['insurance_usd'].choices = [('', '-- Auto-filled --')] + get_csv_choices('Insurance_USD')
-        self.fields['exchange_rate'].choices = [('', '-- Auto-filled --')] + get_csv_choices('Exchange_Rate')
+        self.fields['living_cost_index'].choices = catalog.column('Living_Cost_Index', auto_filled=True)
+        self.fields['rent_usd'].choices = catalog.column('Rent_USD', auto_filled=True)
+        self.fields['visa_fee_usd'].choices = catalog.column('Visa_Fee_USD', auto_filled=True)
+        self.fields['insurance_usd'].choices = catalog.column('Insurance_USD', auto_filled=True)
+        self.fields['exchange_rate'].choices = catalog.column('Exchange_Rate', auto_filled=True)
+        
+        # Narrow the dependent dropdowns to the submitted country, city and university
+        if self.is_bound:
+            country = self.data.get('country')
+            city = self.data.get('city')
+            university = self.data.get('university')
+            if country:
+                self.fields['city'].choices = catalog.city_choices(country)
+                if city:
+                    self.fields['university'].choices = catalog.university_choices(country, city)
+                    if university:
+                        self.fields['program'].choices = catalog.program_choices(country, city, university)
         
         # Option to use manual values 
         self.fields['use_manual_values'].initial = False
     
     # Country selection field
-    country = forms.ChoiceField(required=True)
+    country = CatalogChoiceField(required=True)
     
     # City field as dropdown
-    city = forms.ChoiceField(required=True)
+    city = CatalogChoiceField(required=True)
     
     # University field as dropdown
-    university = forms.ChoiceField(required=True)
+    university = CatalogChoiceField(required=True)
     
     # Program field
-    program = forms.ChoiceField(required=True)
+    program = CatalogChoiceField(required=True)
     other_program = forms.CharField(max_length=100, required=False, help_text="If you selected 'Other', please specify")
     
     # Level field
-    level = forms.ChoiceField(required=True)
+    level = CatalogChoiceField(required=True)
     
     # Duration in years as dropdown
-    duration_years = forms.ChoiceField(required=True)
+    duration_years = CatalogChoiceField(required=True)
     
     # Toggle for manual entry vs dropdown selection
     use_manual_values = forms.BooleanField(
@@ -97,7 +107,7 @@ class EducationCostPredictionForm(forms.Form):
     )
     
     # Living Cost Index - converted to ChoiceField with fallback to FloatField
-    living_cost_index = forms.ChoiceField(
+    living_cost_index = CatalogChoiceField(
         required=True,
         help_text="Living cost index (0-100 scale)"
     )
@@ -110,7 +120,7 @@ class EducationCostPredictionForm(forms.Form):
     )
     
     # Monthly rent in USD
-    rent_usd = forms.ChoiceField(
+    rent_usd = CatalogChoiceField(
         required=True, 
         help_text="Monthly rent in USD"
     )
@@ -122,7 +132,7 @@ class EducationCostPredictionForm(forms.Form):
     )
     
     # Visa fee in USD
-    visa_fee_usd = forms.ChoiceField(
+    visa_fee_usd = CatalogChoiceField(
         required=True, 
         help_text="Visa fee in USD"
     )
@@ -134,7 +144,7 @@ class EducationCostPredictionForm(forms.Form):
     )
     
     # Annual insurance in USD
-    insurance_usd = forms.ChoiceField(
+    insurance_usd = CatalogChoiceField(
         required=True, 
         help_text="Annual insurance cost in USD"
     )
@@ -146,7 +156,7 @@ class EducationCostPredictionForm(forms.Form):
     )
     
     # Exchange rate to USD
-    exchange_rate = forms.ChoiceField(
+    exchange_rate = CatalogChoiceField(
         required=True,
         help_text="Exchange rate to USD (e.g., 0.85 for EUR, 1.35 for CAD)"
     )
@@ -166,20 +176,12 @@ class EducationCostPredictionForm(forms.Form):
         other_program = cleaned_data.get('other_program')
         use_manual = cleaned_data.get('use_manual_values')
         
-        # Update the city choices based on the selected country
-        if country:
-            self.fields['city'].choices = get_filtered_choices('City', {'Country': country})
-            
-            # Update the university choices based on the selected country and city
-            if city:
-                self.fields['university'].choices = get_filtered_choices('University', 
-                                                  {'Country': country, 'City': city})
-        
-        # Now validate the city and university fields with the updated choices
-        if city and city not in [choice[0] for choice in self.fields['city'].choices]:
+        # Validate the city and university against the catalog's membership sets
+        if country and city and city not in self.catalog.city_choices(country).values:
             self.add_error('city', f"Select a valid choice. {city} is not one of the available choices.")
             
-        if university and university not in [choice[0] for choice in self.fields['university'].choices]:
+        if (country and city and university and
+                university not in self.catalog.university_choices(country, city).values):
             self.add_error('university', f"Select a valid choice. {university} is not one of the available choices.")
         
         if program == 'Other' and not other_program:
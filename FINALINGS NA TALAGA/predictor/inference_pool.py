@@ -0,0 +1,449 @@
+import atexit
+import hashlib
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .artifact import NativeModel
+from .fast_path import FastPathPredictor
+
+
+class PoolUnavailable(Exception):
+    """Raised when the inference pool can't score a request, so the caller should score it in-process."""
+
+
+def load_fast_path(source, feature_columns):
+    """
+    Load a model in a pool worker, the way EducationCostPredictor._read_model() does.
+
+    Args:
+        source (tuple): ('artifact', directory) or ('pickle', path)
+        feature_columns (list): Order of the features in prediction rows
+
+    Returns:
+        tuple: (version, FastPathPredictor)
+    """
+    kind, path = source
+    if kind == 'artifact':
+        model = NativeModel(path)
+        return model.version, model.fast_path
+    with open(path, 'rb') as file:
+        raw = file.read()
+    return hashlib.sha256(raw).hexdigest()[:16], FastPathPredictor.from_pipeline(pickle.loads(raw), feature_columns)
+
+
+def _buffers(buf, slot_rows, n_categorical, n_numeric):
+    """Lay out a worker's shared memory as its request (categories, numerics) and response arrays."""
+    numerics = np.ndarray((slot_rows, n_numeric), dtype=np.float64, buffer=buf)
+    offset = numerics.nbytes
+    categories = np.ndarray((slot_rows, n_categorical), dtype=np.int32, buffer=buf, offset=offset)
+    offset += categories.nbytes
+    predictions = np.ndarray((slot_rows,), dtype=np.float32, buffer=buf, offset=offset)
+    return categories, numerics, predictions
+
+
+def _buffer_size(slot_rows, n_categorical, n_numeric):
+    return slot_rows * (8 * n_numeric + 4 * n_categorical + 4)
+
+
+def _worker_main(conn, shm_name, slot_rows, source, version, feature_columns, threads):
+    """
+    Serve predictions in a pool worker process until told to stop or the parent goes away.
+
+    Requests are ('predict', n) for the first n rows of the shared buffers and
+    answered with ('ok', n) once the predictions are written back, or
+    ('error', message); ('ping',) is answered with ('pong', pid).
+    """
+    shm = None
+    try:
+        loaded_version, fast_path = load_fast_path(source, feature_columns)
+        if loaded_version != version:
+            conn.send(('error', f"expected model version {version}, loaded {loaded_version}"))
+            return
+        fast_path.booster.set_param({'nthread': threads})
+        shm = shared_memory.SharedMemory(name=shm_name)
+        categories, numerics, predictions = _buffers(
+            shm.buf, slot_rows, len(fast_path.categorical_positions), len(fast_path.numeric_positions))
+        conn.send(('ready', os.getpid()))
+    except Exception as e:
+        conn.send(('error', str(e)))
+        return
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == 'predict':
+                n = message[1]
+                try:
+                    predictions[:n] = fast_path.predict_codes(categories[:n], numerics[:n])
+                    conn.send(('ok', n))
+                except Exception as e:
+                    conn.send(('error', str(e)))
+            elif message[0] == 'ping':
+                conn.send(('pong', os.getpid()))
+            else:
+                break
+    finally:
+        del categories, numerics, predictions
+        shm.close()
+
+
+class _Worker:
+    """One worker process of the pool and the parent's end of its pipe and shared buffers."""
+
+    def __init__(self, context, generation, slot_rows, source, version, fast_path, threads):
+        self.generation = generation
+        self.source = source
+        self.version = version
+        self.fast_path = fast_path
+        n_categorical, n_numeric = len(fast_path.categorical_positions), len(fast_path.numeric_positions)
+        self.shm = shared_memory.SharedMemory(create=True, size=_buffer_size(slot_rows, n_categorical, n_numeric))
+        self.categories, self.numerics, self.predictions = _buffers(self.shm.buf, slot_rows, n_categorical, n_numeric)
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, name='inference-worker', daemon=True,
+            args=(child_conn, self.shm.name, slot_rows, source, version, fast_path.feature_columns, threads))
+        self.process.start()
+        child_conn.close()
+        self.pid = self.process.pid
+        self._stop_lock = threading.Lock()
+
+    def wait_ready(self, timeout):
+        """Wait for the worker to load its model, raising RuntimeError if it doesn't."""
+        if not self.conn.poll(timeout):
+            raise RuntimeError(f"worker didn't start within {timeout:g} s")
+        status, detail = self.conn.recv()
+        if status != 'ready':
+            raise RuntimeError(detail)
+
+    def call(self, message, timeout):
+        """Send a request and wait for the answer, raising OSError/EOFError if the worker is gone or hung."""
+        self.conn.send(message)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"worker {self.pid} didn't answer within {timeout:g} s")
+        return self.conn.recv()
+
+    def stop(self):
+        """Stop the process and release the shared memory (once, whoever calls it first)."""
+        with self._stop_lock:
+            if self.conn.closed:
+                return
+            try:
+                self.conn.send(('stop',))
+            except (OSError, ValueError):
+                pass
+            self.process.join(1)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+            self.conn.close()
+            del self.categories, self.numerics, self.predictions
+            self.shm.close()
+            self.shm.unlink()
+
+
+class InferencePool:
+    """
+    Runs predictions in a pool of model-holding worker processes.
+
+    XGBoost inference and the preprocessing around it hold the GIL, so threads
+    of one server process can't score requests on more than one core at a time.
+    The pool's workers are separate processes, each with its own copy of the
+    model, so a threaded server scores up to `size` requests in parallel.
+
+    Rows are not pickled: the parent reduces them to their compact numeric form
+    (FastPathPredictor.codes()) and writes them to shared memory owned by the
+    worker it picked; the worker writes its predictions back there. Only tiny
+    control messages go over the worker's pipe.
+
+    Workers are spawned in the background the first time a model version is
+    used (and again for every new version after a hot reload). predict() raises
+    PoolUnavailable while no worker is ready, or if the one it picked crashed or
+    hung, and the caller scores the rows in-process instead. Crashed or hung
+    workers are replaced, and idle workers are pinged every health_interval
+    seconds.
+
+    The parent owns the shared memory: a worker only attaches to (and closes)
+    its buffers, which the parent unlinks when it stops the worker, and at exit
+    for any worker still running.
+    """
+
+    def __init__(self, size, slot_rows=1024, timeout=5.0, health_interval=5.0, start_timeout=120.0, threads=1):
+        """
+        Args:
+            size (int): Number of worker processes
+            slot_rows (int): Rows each worker's shared buffers hold; larger requests are sent in chunks
+            timeout (float): Seconds to wait for a free worker, and for a worker's answer
+            health_interval (float): Seconds between health checks of idle workers, 0 to disable them
+            start_timeout (float): Seconds a new worker may take to load the model
+            threads (int): XGBoost threads per worker
+        """
+        self.size = size
+        self.slot_rows = slot_rows
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.start_timeout = start_timeout
+        self.threads = threads
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._reset()
+        atexit.register(self._shutdown)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._version = None
+        self._generation = 0
+        self._idle = queue.Queue()
+        self._workers = set()
+        # Every started worker whose shared memory isn't unlinked yet, busy and retired ones included
+        self._running = set()
+        self._closed = False
+        self._starting = 0
+        self._monitor = None
+        self.requests = 0
+        self.rows = 0
+        self.fallbacks = 0
+        self.restarts = 0
+        self.failed_starts = 0
+
+    def predict(self, active, rows):
+        """
+        Predict tuition for feature rows on a worker.
+
+        Args:
+            active (LoadedModel): The model to use; workers load the same version from its source
+            rows (list): Tuples of the features in FEATURE_COLUMNS order
+
+        Returns:
+            ndarray: One predicted tuition per row
+
+        Raises:
+            PoolUnavailable: If the rows should be scored in-process instead
+        """
+        fast_path = self._prepare(active)
+        return self._run(*fast_path.codes(rows))
+
+    def predict_frame(self, active, df):
+        """Like predict(), for a DataFrame with (at least) the feature columns."""
+        fast_path = self._prepare(active)
+        return self._run(*fast_path.codes_frame(df))
+
+    def _prepare(self, active):
+        """Start workers for the model's version if needed, and return its fast path for encoding."""
+        fast_path = active.fast_path
+        if isinstance(fast_path, NativeModel):
+            fast_path = fast_path.fast_path
+        if fast_path is None or getattr(active, 'source', None) is None:
+            raise PoolUnavailable("the model has no fast path to run in the pool")
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked child doesn't inherit the workers (or their pipes), it starts its own
+                self._reset()
+            if self._version != active.version:
+                self._start_generation(active, fast_path)
+        return fast_path
+
+    def _start_generation(self, active, fast_path):
+        """Replace the workers with ones for a new model version (called with the lock held)."""
+        self._version = active.version
+        self._retire()
+        for _ in range(self.size):
+            self._spawn(self._generation, active.source, active.version, fast_path)
+        if self._monitor is None and self.health_interval:
+            self._monitor = threading.Thread(target=self._check_health, name='inference-pool-health', daemon=True)
+            self._monitor.start()
+
+    def _spawn(self, generation, source, version, fast_path):
+        """Start a worker in the background; it joins the idle queue once its model is loaded."""
+        self._starting += 1
+        threading.Thread(target=self._start_worker, args=(generation, source, version, fast_path),
+                         name='inference-pool-start', daemon=True).start()
+
+    def _start_worker(self, generation, source, version, fast_path):
+        worker = None
+        try:
+            worker = _Worker(self._context, generation, self.slot_rows, source, version, fast_path, self.threads)
+            with self._lock:
+                self._running.add(worker)
+                if self._closed:
+                    raise RuntimeError("the pool was shut down")
+            worker.wait_ready(self.start_timeout)
+        except Exception as e:
+            if not self._closed:
+                print(f"Inference worker failed to start: {str(e)}")
+            if worker is not None:
+                self._stop(worker)
+            worker = None
+        with self._lock:
+            self._starting -= 1
+            if worker is None:
+                self.failed_starts += 1
+                return
+            if generation == self._generation:
+                self._workers.add(worker)
+        self._release(worker)
+
+    def _stop(self, worker):
+        """Stop a worker and release its shared memory."""
+        worker.stop()
+        with self._lock:
+            self._running.discard(worker)
+
+    def _retire(self):
+        """
+        Start a new generation: stop the idle workers now, busy ones when they're released (lock held).
+
+        Returns:
+            list: The threads stopping the idle workers
+        """
+        self._generation += 1
+        self._workers.clear()
+        stopping = []
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            stopping.append(threading.Thread(target=self._stop, args=(worker,), daemon=True))
+            stopping[-1].start()
+        return stopping
+
+    def _release(self, worker):
+        """Return a worker to the idle queue, or stop it if its generation was retired."""
+        if worker.generation == self._generation and not self._closed:
+            self._idle.put(worker)
+        else:
+            self._stop(worker)
+
+    def _replace(self, worker):
+        """Stop a crashed or hung worker and start another in its place."""
+        with self._lock:
+            current = worker in self._workers
+            self._workers.discard(worker)
+            if current:
+                self.restarts += 1
+                self._spawn(worker.generation, worker.source, worker.version, worker.fast_path)
+        self._stop(worker)
+
+    def _acquire(self):
+        """Take an idle worker of the current generation."""
+        with self._lock:
+            if not self._workers:
+                raise PoolUnavailable("no inference worker is ready")
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolUnavailable("all inference workers are busy")
+        if worker.generation != self._generation:
+            self._stop(worker)
+            raise PoolUnavailable("the inference workers are being replaced")
+        return worker
+
+    def _run(self, categories, numerics):
+        try:
+            worker = self._acquire()
+        except PoolUnavailable:
+            self._count(fallbacks=1)
+            raise
+        predictions = np.empty(len(categories), dtype=np.float32)
+        try:
+            for start in range(0, len(categories), self.slot_rows):
+                n = min(self.slot_rows, len(categories) - start)
+                worker.categories[:n] = categories[start:start + n]
+                worker.numerics[:n] = numerics[start:start + n]
+                status, detail = worker.call(('predict', n), self.timeout)
+                if status != 'ok':
+                    raise RuntimeError(detail)
+                predictions[start:start + n] = worker.predictions[:n]
+        except (OSError, EOFError) as e:
+            print(f"Inference worker {worker.pid} failed, replacing it: {str(e)}")
+            self._count(fallbacks=1)
+            self._replace(worker)
+            raise PoolUnavailable(str(e))
+        except RuntimeError as e:
+            self._count(fallbacks=1)
+            self._release(worker)
+            raise PoolUnavailable(str(e))
+        self._release(worker)
+        self._count(requests=1, rows=len(categories))
+        return predictions
+
+    def _count(self, requests=0, rows=0, fallbacks=0):
+        with self._lock:
+            self.requests += requests
+            self.rows += rows
+            self.fallbacks += fallbacks
+
+    def _check_health(self):
+        """Ping idle workers and replace those that died or stopped answering (runs in a background thread)."""
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.health_interval)
+            checked = []
+            while len(checked) < self.size:
+                try:
+                    checked.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            for worker in checked:
+                try:
+                    if not worker.process.is_alive():
+                        raise EOFError("process exited")
+                    worker.call(('ping',), self.timeout)
+                except (OSError, EOFError) as e:
+                    print(f"Inference worker {worker.pid} failed a health check, replacing it: {str(e)}")
+                    self._replace(worker)
+                    continue
+                self._release(worker)
+
+    def close(self):
+        """Stop every worker (busy ones once they finish); the next prediction starts new ones."""
+        with self._lock:
+            self._version = None
+            stopping = self._retire()
+        for thread in stopping:
+            thread.join()
+
+    def _shutdown(self):
+        """Stop every worker, busy and starting ones too, and unlink their shared memory (at exit)."""
+        if self._pid != os.getpid():
+            # A forked child's copy of the pool doesn't own the parent's workers
+            return
+        with self._lock:
+            self._closed = True
+        self.close()
+        with self._lock:
+            running = list(self._running)
+        for worker in running:
+            self._stop(worker)
+
+    def stats(self):
+        """
+        Get the pool's state and counters.
+
+        Returns:
+            dict: Size, ready/starting workers and their pids, model version, requests,
+                rows, in-process fallbacks, restarts and failed starts
+        """
+        with self._lock:
+            return {
+                'size': self.size,
+                'ready': len(self._workers),
+                'starting': self._starting,
+                'pids': sorted(worker.pid for worker in self._workers),
+                'model_version': self._version,
+                'requests': self.requests,
+                'rows': self.rows,
+                'fallbacks': self.fallbacks,
+                'restarts': self.restarts,
+                'failed_starts': self.failed_starts,
+            }
@@ -0,0 +1,35 @@
+import hashlib
+import os
+from io import BytesIO
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor.compact import compact_path, read_columns, write_compact
+from predictor.dataset import CSV_PATH
+from predictor.snapshot import snapshot_path, write_snapshot
+
+
+class Command(BaseCommand):
+    help = ("Write the typed columnar snapshot of the dataset CSV that the app loads instead of parsing it, "
+            "and its compact file mapped with DATASET_BACKEND = 'compact'.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', default=CSV_PATH, help="Dataset CSV to snapshot")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv'], 'rb') as file:
+                raw = file.read()
+            version = hashlib.sha256(raw).hexdigest()[:16]
+            path = snapshot_path(version)
+            write_snapshot(pd.read_csv(BytesIO(raw)), path)
+            compact = compact_path(version)
+            write_compact(read_columns(raw), compact)
+        except Exception as e:
+            raise CommandError(f"Error building dataset snapshot: {str(e)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved the snapshot of dataset {version} to {path} ({os.path.getsize(path) / 1024:.0f} KB) "
+            f"and its compact file to {compact} ({os.path.getsize(compact) / 1024:.0f} KB)"
+        ))
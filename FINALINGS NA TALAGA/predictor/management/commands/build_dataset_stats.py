@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from predictor.dataset import get_dataset
+from predictor.stats import stats_path, stats_store
+
+
+class Command(BaseCommand):
+    help = "Compute the dashboard statistics snapshot of the current dataset and save it next to the data."
+
+    def handle(self, *args, **options):
+        dataset = get_dataset()
+        stats = stats_store.build(dataset)
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved stats for {stats['total_records']} records (dataset {dataset.version}) "
+            f"to {stats_path(dataset.version)}"
+        ))
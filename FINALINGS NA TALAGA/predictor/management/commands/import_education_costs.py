@@ -0,0 +1,92 @@
+import csv
+import hashlib
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+
+from predictor.dataset import CSV_PATH
+from predictor.models import EducationCost, EducationCostImport
+
+
+class Command(BaseCommand):
+    help = "Load the education costs CSV into the EducationCost table, replacing its rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', default=CSV_PATH, help="Dataset CSV to import")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk INSERT")
+        parser.add_argument('--force', action='store_true', help="Import even if this CSV version is already loaded")
+
+    def handle(self, *args, **options):
+        path = options['csv']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        try:
+            version = file_version(path)
+        except OSError as e:
+            raise CommandError(f"Error reading {path}: {e}")
+
+        latest = EducationCostImport.objects.first()
+        if latest and latest.version == version and not options['force']:
+            self.stdout.write(f"Dataset {version} is already imported ({latest.rows} rows), use --force to reload it")
+            return
+
+        # Readers keep seeing the previous rows until the whole import commits
+        with open(path, newline='', encoding='utf-8') as file, transaction.atomic():
+            reader = csv.reader(file)
+            converters = row_converters(next(reader, []))
+            EducationCost.objects.all().delete()
+            rows = 0
+            while True:
+                batch = [EducationCost(**{name: convert(value) for (name, convert), value in zip(converters, row)})
+                         for row in islice(reader, batch_size)]
+                if not batch:
+                    break
+                EducationCost.objects.bulk_create(batch, batch_size=batch_size)
+                rows += len(batch)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"  {rows} rows")
+            EducationCostImport.objects.create(version=version, source=path, rows=rows)
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {rows} rows of dataset {version} from {path}"))
+
+
+def file_version(path):
+    """Content hash of a dataset file, computed as DatasetStore does."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def row_converters(header):
+    """
+    Match the CSV columns to the EducationCost fields.
+
+    Args:
+        header (list): The CSV's column names
+
+    Returns:
+        list: (field name, converter) per column
+
+    Raises:
+        CommandError: If the columns don't match the model's fields
+    """
+    fields = {field.name: field for field in EducationCost._meta.concrete_fields if not field.primary_key}
+    names = [column.strip().lower() for column in header]
+    if sorted(names) != sorted(fields):
+        raise CommandError(f"CSV columns {header} don't match the EducationCost fields {list(fields)}")
+
+    converters = []
+    for name in names:
+        field = fields[name]
+        if isinstance(field, models.IntegerField):
+            converters.append((name, int))
+        elif isinstance(field, models.FloatField):
+            converters.append((name, float))
+        else:
+            converters.append((name, str))
+    return converters
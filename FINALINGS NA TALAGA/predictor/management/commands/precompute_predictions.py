@@ -0,0 +1,32 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor.budget import dataset_features, dataset_predictions
+from predictor.ml_model import EducationCostPredictor
+from predictor.precomputed import feature_keys, table_path, write_table
+from predictor.stats import stats_source
+
+
+class Command(BaseCommand):
+    help = ("Price every row of the current dataset with one batched model call and save the table of "
+            "predictions by feature hash that EducationCostPredictor.predict answers from.")
+
+    def handle(self, *args, **options):
+        predictor = EducationCostPredictor()
+        if not predictor.model_loaded:
+            raise CommandError("Model not loaded. Please check the model file.")
+
+        dataset = stats_source()
+        try:
+            # The same predictions as the budget search's, which reads them from the same file
+            tuition, model_version = dataset_predictions(dataset, predictor)
+            path = table_path(dataset.version, model_version)
+            rows = write_table(feature_keys(dataset_features(dataset)), tuition, path)
+        except Exception as e:
+            raise CommandError(f"Error precomputing predictions: {str(e)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {rows} precomputed predictions ({len(dataset)} dataset rows) of dataset {dataset.version} "
+            f"by model {model_version} to {path} ({os.path.getsize(path) / 1024:.0f} KB)"
+        ))
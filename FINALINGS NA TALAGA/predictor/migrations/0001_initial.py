@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EducationCostImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(help_text='Content hash of the imported CSV', max_length=16)),
+                ('source', models.CharField(max_length=500)),
+                ('rows', models.PositiveIntegerField()),
+                ('imported_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-imported_at', '-id'],
+                'get_latest_by': ['imported_at', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EducationCost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100)),
+                ('city', models.CharField(max_length=100)),
+                ('university', models.CharField(max_length=200)),
+                ('program', models.CharField(max_length=200)),
+                ('level', models.CharField(max_length=50)),
+                ('duration_years', models.FloatField()),
+                ('tuition_usd', models.IntegerField()),
+                ('living_cost_index', models.FloatField()),
+                ('rent_usd', models.IntegerField()),
+                ('visa_fee_usd', models.IntegerField()),
+                ('insurance_usd', models.IntegerField()),
+                ('exchange_rate', models.FloatField()),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['country', 'city', 'university', 'program'], name='education_cost_hierarchy'), models.Index(fields=['city'], name='education_cost_city'), models.Index(fields=['university'], name='education_cost_university'), models.Index(fields=['program'], name='education_cost_program')],
+            },
+        ),
+    ]
@@ -1,45 +1,477 @@
+import hashlib
 import os
 import pickle
+import threading
+import time
+import numpy as np
 import pandas as pd
 from django.conf import settings
 
+from .artifact import MANIFEST_NAME, NativeModel, has_artifact
+from .batching import MicroBatcher
+from .cache import PredictionCache, make_cache_key
+from .dataset import get_dataset
+from .fast_path import FastPathPredictor
+from .inference_pool import InferencePool, PoolUnavailable
+from .precomputed import PrecomputedPredictions
+from .stats import get_dataset_stats
+
+# Model input columns, in the order the pipeline was trained on
+CATEGORICAL_FEATURES = ['Country', 'City', 'University', 'Program', 'Level']
+NUMERIC_FEATURES = ['Duration_Years', 'Living_Cost_Index', 'Rent_USD', 'Visa_Fee_USD', 'Insurance_USD', 'Exchange_Rate']
+FEATURE_COLUMNS = CATEGORICAL_FEATURES + NUMERIC_FEATURES
+
+# Pickled sklearn Pipeline, and the native artifact exported from it (preferred when present)
+MODEL_PATH = getattr(settings, 'MODEL_PATH', os.path.join(settings.BASE_DIR, 'trained_model.pkl'))
+MODEL_ARTIFACT_DIR = getattr(settings, 'MODEL_ARTIFACT_DIR', os.path.join(settings.BASE_DIR, 'model_artifact'))
+
+# Seconds between checks for a new model file (0 disables hot reload)
+MODEL_RELOAD_INTERVAL = getattr(settings, 'MODEL_RELOAD_INTERVAL', 10)
+# Number of dataset rows a new model must predict sensibly before it is swapped in
+MODEL_CANARY_ROWS = getattr(settings, 'MODEL_CANARY_ROWS', 50)
+
+# Explain predictions with the booster's exact TreeSHAP values instead of its approximate
+# (Saabas) contributions, which cost a fraction of the time
+PREDICTION_EXPLAIN_EXACT = getattr(settings, 'PREDICTION_EXPLAIN_EXACT', False)
+
+
+def compute_costs(tuition, rent_usd, insurance_usd, visa_fee_usd, duration_years):
+    """
+    Calculate living expenses and total cost for one or many predictions.
+
+    Args:
+        tuition: Predicted tuition (scalar or array)
+        rent_usd: Monthly rent in USD
+        insurance_usd: Annual insurance cost in USD
+        visa_fee_usd: One-time visa fee in USD
+        duration_years: Program duration in years
+
+    Returns:
+        tuple: (tuition, living_expenses, total_cost) as float64 arrays rounded to cents
+    """
+    tuition = np.asarray(tuition, dtype=np.float64)
+    duration_years = np.asarray(duration_years, dtype=np.float64)
+    living_expenses = (np.asarray(rent_usd, dtype=np.float64) * 12 * duration_years
+                       + np.asarray(insurance_usd, dtype=np.float64) * duration_years
+                       + np.asarray(visa_fee_usd, dtype=np.float64))
+    total_cost = tuition + living_expenses
+    return np.round(tuition, 2), np.round(living_expenses, 2), np.round(total_cost, 2)
+
+def predict_rows(active, rows):
+    """
+    Predict tuition for many normalized feature rows with one model call.
+    
+    Args:
+        active (LoadedModel): The model to use
+        rows (list): Tuples of the features in FEATURE_COLUMNS order, from make_cache_key()
+        
+    Returns:
+        ndarray: One predicted tuition per row
+    """
+    fast_path = active.fast_path
+    if fast_path is None:
+        return active.model.predict(pd.DataFrame(rows, columns=FEATURE_COLUMNS))
+    if isinstance(fast_path, NativeModel):
+        fast_path = fast_path.fast_path
+    return fast_path.predict(rows)
+
+def prepare_features(df):
+    """
+    Convert rows keyed by the form field names to the model's typed feature columns.
+    
+    Args:
+        df (DataFrame): Rows with lowercase columns (country, city, university, program, level,
+            duration_years, living_cost_index, rent_usd, visa_fee_usd, insurance_usd,
+            exchange_rate and optionally other_program)
+        
+    Returns:
+        tuple: (DataFrame with the FEATURE_COLUMNS, categories as stripped str and numbers
+               as float64, dict of the validation error of each invalid row by index)
+        
+    Raises:
+        ValueError: If a required column is missing
+    """
+    missing = [column.lower() for column in FEATURE_COLUMNS if column.lower() not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    
+    features = pd.DataFrame(index=df.index)
+    for column in CATEGORICAL_FEATURES:
+        values = df[column.lower()]
+        features[column] = values.where(values.notna(), '').astype(str).str.strip()
+    if 'other_program' in df.columns:
+        other = df['other_program'].where(df['other_program'].notna(), '').astype(str).str.strip()
+        use_other = (features['Program'] == 'Other') & (other != '')
+        features['Program'] = features['Program'].where(~use_other, other)
+    for column in NUMERIC_FEATURES:
+        values = df[column.lower()]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = values.astype(str).str.strip()
+        features[column] = pd.to_numeric(values, errors='coerce').astype(np.float64)
+    
+    errors = {}
+    for column in CATEGORICAL_FEATURES:
+        for i in features.index[features[column] == '']:
+            errors.setdefault(int(i), f"Missing value for {column.lower()}")
+    for column in NUMERIC_FEATURES:
+        for i in features.index[features[column].isna()]:
+            errors.setdefault(int(i), f"Invalid value for {column.lower()}: {df.at[i, column.lower()]}")
+    return features, errors
+
+def explainer(active):
+    """
+    The FastPathPredictor that explains a loaded model's predictions (see FastPathPredictor.explain_codes).
+    
+    Raises:
+        ValueError: If the model has none (a Pipeline with PREDICTION_FAST_PATH disabled
+            or that the fast path can't compile)
+    """
+    if isinstance(active.model, NativeModel):
+        return active.model.fast_path
+    if isinstance(active.fast_path, FastPathPredictor):
+        return active.fast_path
+    raise ValueError("Explanations are only available with the fast path")
+
+def format_explanations(fast_path, contributions, base_value):
+    """
+    Build the explanation of each row from FastPathPredictor.explain_codes() results.
+    
+    Args:
+        fast_path (FastPathPredictor): The explainer
+        contributions (ndarray): (rows, features) contributions, in its feature_columns order
+        base_value (float): The expected tuition every prediction starts from
+        
+    Returns:
+        list: One dict per row, with the 'base_value' and the 'contributions' keyed by
+              form field name, largest first (by absolute value), rounded to cents
+    """
+    base_value = round(float(base_value), 2)
+    fields = [column.lower() for column in fast_path.feature_columns]
+    order = np.argsort(-np.abs(contributions), axis=1, kind='stable').tolist()
+    contributions = np.round(contributions, 2).tolist()
+    return [{'base_value': base_value, 'contributions': {fields[k]: row[k] for k in ranks}}
+            for row, ranks in zip(contributions, order)]
+
+def copy_result(result, explain):
+    """Copy a (cached) prediction result, with its explanation if explain is set, else without."""
+    result = dict(result)
+    explanation = result.pop('explanation', None)
+    if explain and explanation is not None:
+        result['explanation'] = dict(explanation, contributions=dict(explanation['contributions']))
+    return result
+
+def model_source_signature():
+    """
+    Identify the model files on disk: the artifact's manifest, if one was exported, and the pickle.
+    
+    Both are watched, since a retrained pickle makes the artifact stale (see _read_model()).
+    
+    Returns:
+        tuple: (path, modification time in ns, size) of each file that exists
+        
+    Raises:
+        OSError: If there is neither
+    """
+    signature = []
+    for path in (os.path.join(MODEL_ARTIFACT_DIR, MANIFEST_NAME), MODEL_PATH):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    if not signature:
+        raise FileNotFoundError(f"No model found at {MODEL_PATH} or in {MODEL_ARTIFACT_DIR}")
+    return tuple(signature)
+
+class LoadedModel:
+    """
+    One loaded version of the model.
+    
+    The predictor holds a single reference to it and replaces it as a whole
+    on reload, so a prediction that started on one version finishes on it.
+    """
+    
+    def __init__(self, model, version, fast_path, source=None):
+        """
+        Args:
+            model: The Pipeline or NativeModel
+            version (str): Content hash of the model file, or the artifact's version
+            fast_path: FastPathPredictor (or NativeModel) for single rows, or None
+            source (tuple): Where it was loaded from, ('artifact', directory) or ('pickle', path),
+                so inference pool workers can load the same model
+        """
+        self.model = model
+        self.version = version
+        self.fast_path = fast_path
+        self.source = source
+
 class EducationCostPredictor:
     """
     A class for predicting international education costs using the trained ML model.
     """
     _instance = None
+    _lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(EducationCostPredictor, cls).__new__(cls)
-            cls._instance._load_model()
+            with cls._lock:
+                # Checked again under the lock, so concurrent first requests load the model once
+                if cls._instance is None:
+                    instance = super(EducationCostPredictor, cls).__new__(cls)
+                    instance.active = None
+                    instance._signature = None
+                    instance._rejected_signature = None
+                    instance._next_check = time.monotonic() + MODEL_RELOAD_INTERVAL
+                    instance._reload_lock = threading.Lock()
+                    instance.cache = PredictionCache(
+                        maxsize=getattr(settings, 'PREDICTION_CACHE_SIZE', 1024),
+                        ttl=getattr(settings, 'PREDICTION_CACHE_TTL', 3600),
+                    )
+                    instance.batcher = MicroBatcher(
+                        instance._score_rows,
+                        max_batch_size=getattr(settings, 'PREDICTION_BATCH_MAX_SIZE', 64),
+                        max_wait=getattr(settings, 'PREDICTION_BATCH_MAX_WAIT', 0.002),
+                        max_queue=getattr(settings, 'PREDICTION_BATCH_MAX_QUEUE', 1024),
+                    ) if getattr(settings, 'PREDICTION_BATCHING', False) else None
+                    instance.pool = InferencePool(
+                        getattr(settings, 'INFERENCE_POOL_SIZE', 0),
+                        slot_rows=getattr(settings, 'INFERENCE_POOL_SLOT_ROWS', 1024),
+                        timeout=getattr(settings, 'INFERENCE_POOL_TIMEOUT', 5.0),
+                        health_interval=getattr(settings, 'INFERENCE_POOL_HEALTH_INTERVAL', 5.0),
+                    ) if getattr(settings, 'INFERENCE_POOL_SIZE', 0) else None
+                    instance.precomputed = PrecomputedPredictions()
+                    instance._load_model()
+                    # Published only once fully loaded, other threads never see a half-built instance
+                    cls._instance = instance
         return cls._instance
     
+    @classmethod
+    def preload(cls):
+        """
+        Load the model completely, instead of on the first request.
+        
+        Called before a pre-forking server forks its workers, so that they all
+        share the parent's copy of the model.
+        
+        Returns:
+            EducationCostPredictor: The loaded predictor
+        """
+        predictor = cls()
+        if predictor.model_loaded and isinstance(predictor.model, NativeModel):
+            # The native artifact parses its booster on first use, do it now
+            predictor.model.fast_path
+        return predictor
+    
+    @property
+    def model_loaded(self):
+        return self.active is not None
+    
+    @property
+    def model(self):
+        return self.active.model if self.active is not None else None
+    
+    @property
+    def model_version(self):
+        return self.active.version if self.active is not None else None
+    
     def _load_model(self):
-        """Load the trained model from the file."""
+        """Load the trained model, from the native artifact if one was exported, else the pickle."""
         try:
-            model_path = os.path.join(settings.BASE_DIR, 'trained_model.pkl')
-            with open(model_path, 'rb') as file:
-                self.model = pickle.load(file)
-            self.model_loaded = True
+            signature = model_source_signature()
+            self.active = self._read_model()
+            self._signature = signature
             print("Model loaded successfully!")
         except Exception as e:
-            self.model_loaded = False
             print(f"Error loading model: {str(e)}")
     
-    def predict(self, data):
+    def _read_model(self):
+        """
+        Read the model from disk.
+        
+        Returns:
+            LoadedModel: The model with its version and fast path
+        """
+        use_fast_path = getattr(settings, 'PREDICTION_FAST_PATH', True)
+        if has_artifact(MODEL_ARTIFACT_DIR):
+            # Only the manifest is read here, the booster loads on first prediction
+            model = NativeModel(MODEL_ARTIFACT_DIR)
+            if model.matches_source(MODEL_PATH):
+                return LoadedModel(model, model.version, model if use_fast_path else None,
+                                   ('artifact', MODEL_ARTIFACT_DIR))
+            print(f"Model artifact in {MODEL_ARTIFACT_DIR} is stale ({MODEL_PATH} changed since it was "
+                  f"exported), loading the pickle; run manage.py convert_model_artifact to update it")
+        
+        with open(MODEL_PATH, 'rb') as file:
+            raw = file.read()
+        model = pickle.loads(raw)
+        # Content hash of the artifact, used to tag cached predictions
+        version = hashlib.sha256(raw).hexdigest()[:16]
+        return LoadedModel(model, version, self._compile_fast_path(model) if use_fast_path else None,
+                           ('pickle', MODEL_PATH))
+    
+    def _compile_fast_path(self, model):
+        """Compile the native single-row inference path for a Pipeline, or None if unsupported."""
+        try:
+            return FastPathPredictor.from_pipeline(model, FEATURE_COLUMNS)
+        except ValueError as e:
+            print(f"Fast path disabled: {str(e)}")
+            return None
+    
+    def check_for_update(self):
+        """
+        Start a background reload if the model file changed.
+        
+        The file is looked at most once every MODEL_RELOAD_INTERVAL seconds, and
+        the caller never waits for the reload: it keeps using the current model
+        until the new one has been loaded, validated and swapped in.
+        """
+        if not MODEL_RELOAD_INTERVAL or time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + MODEL_RELOAD_INTERVAL
+        try:
+            signature = model_source_signature()
+        except OSError:
+            return
+        if signature in (self._signature, self._rejected_signature):
+            return
+        if self._reload_lock.acquire(blocking=False):
+            threading.Thread(target=self._reload, args=(signature,), name='model-reload', daemon=True).start()
+    
+    def _reload(self, signature):
+        """Load, validate and swap in a new model (runs in a background thread)."""
+        try:
+            candidate = self._read_model()
+            if self.active is None or candidate.version != self.active.version:
+                self._validate(candidate)
+                # A single reference assignment: requests in flight keep their LoadedModel
+                self.active = candidate
+                print(f"Model reloaded: version {candidate.version}")
+            self._signature = signature
+        except Exception as e:
+            self._rejected_signature = signature
+            print(f"Model reload rejected, keeping version {self.model_version}: {str(e)}")
+        finally:
+            self._reload_lock.release()
+    
+    def _validate(self, candidate):
+        """
+        Check a newly loaded model on a canary set of dataset rows.
+        
+        Raises:
+            ValueError: If its predictions are missing, not finite or negative, or if
+                its fast path disagrees with the model
+        """
+        df = get_dataset().df
+        canary = df[FEATURE_COLUMNS].iloc[::max(1, len(df) // MODEL_CANARY_ROWS)].head(MODEL_CANARY_ROWS)
+        predictions = np.asarray(candidate.model.predict(canary), dtype=np.float64)
+        if predictions.shape != (len(canary),):
+            raise ValueError(f"expected {len(canary)} canary predictions, got shape {predictions.shape}")
+        if not np.isfinite(predictions).all() or (predictions < 0).any():
+            raise ValueError("canary predictions are not finite, non-negative numbers")
+        if candidate.fast_path is not None and candidate.fast_path is not candidate.model:
+            fast = np.asarray(candidate.fast_path.predict_frame(canary), dtype=np.float64)
+            if not np.allclose(fast, predictions, rtol=1e-6):
+                raise ValueError("the fast path disagrees with the model on the canary rows")
+    
+    def predict(self, data, explain=False):
         """
         Make a prediction based on input data.
         
         Args:
             data (dict): Dictionary containing the input data
+            explain (bool): Also return how much each input moved the estimated tuition,
+                when the model can be explained
             
         Returns:
-            dict: Prediction results including tuition cost, living expenses, and total cost
+            dict: Prediction results including tuition cost, living expenses, total cost
+                  and the version of the model that made the prediction, and with explain
+                  an 'explanation' (see format_explanations())
         """
-        if not self.model_loaded:
+        self.check_for_update()
+        # The whole prediction uses this version, even if a reload swaps in another meanwhile
+        active = self.active
+        if active is None:
             return {"error": "Model not loaded. Please check the model file."}
+        
+        # Serve repeated requests from the result cache
+        cache_key = make_cache_key(data) if isinstance(data, dict) else None
+        result = None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key, active.version)
+            if cached is not None:
+                result = copy_result(cached, explain)
+                # An explained result also answers a plain request; a plain one only needs explaining
+                if not explain or 'explanation' in result:
+                    return result
+        
+        if result is None:
+            # Dataset combinations priced ahead of time (manage.py precompute_predictions) skip the model
+            tuition = self.precomputed.get(cache_key, active.version) if cache_key is not None else None
+            fast = cache_key is not None and (active.fast_path is not None or self.batcher is not None)
+            if tuition is not None or fast:
+                result = self._predict_fast(cache_key, active, tuition)
+            else:
+                result = self._predict(data, active)
+            if 'error' in result:
+                return result
+            result['model_version'] = active.version
+        
+        # The explanation is an extra: without it (e.g. no fast path) the prediction is still returned
+        if explain and cache_key is not None:
+            explanations = self._explain(active, [cache_key])
+            if explanations is not None:
+                result['explanation'] = explanations[0]
+        if cache_key is not None:
+            self.cache.set(cache_key, copy_result(result, True), active.version)
+        return result
+    
+    def _explain(self, active, features):
+        """
+        Explain predictions already made, in process (see FastPathPredictor.explain_codes).
+        
+        Args:
+            active (LoadedModel): The model that made them
+            features (list or DataFrame): Feature tuples from make_cache_key(), or a frame
+                with the FEATURE_COLUMNS as prepare_features() returns them
             
+        Returns:
+            list: The explanation of each row (see format_explanations()), or None if the
+                  model can't be explained
+        """
+        try:
+            fast_path = explainer(active)
+            if isinstance(features, pd.DataFrame):
+                codes = fast_path.codes_frame(features)
+            else:
+                codes = fast_path.codes(features)
+            _, contributions, base_value = fast_path.explain_codes(*codes, exact=PREDICTION_EXPLAIN_EXACT)
+        except Exception as e:
+            print(f"Explanation error: {str(e)}")
+            return None
+        return format_explanations(fast_path, contributions, base_value)
+    
+    def _predict_fast(self, features, active, tuition=None):
+        """Run one prediction from normalized features (and its precomputed tuition, if any), micro-batched and/or through the fast path."""
+        try:
+            values = dict(zip(FEATURE_COLUMNS, features))
+            if tuition is None and self.batcher is not None:
+                # Scored together with the concurrent requests in one model call
+                tuition = self.batcher.predict(features, active)
+            elif tuition is None:
+                tuition = self._score_rows(active, [features])[0]
+            tuition, living_expenses, total_cost = compute_costs(
+                tuition, values['Rent_USD'], values['Insurance_USD'],
+                values['Visa_Fee_USD'], values['Duration_Years'])
+            return {
+                'estimated_tuition_usd': float(tuition),
+                'living_expenses_usd': float(living_expenses),
+                'total_cost_usd': float(total_cost)
+            }
+        except Exception as e:
+            return {"error": f"Prediction error: {str(e)}"}
+    
+    def _predict(self, data, active):
+        """Run the model for one prediction request (see predict())."""
         try:
             # Convert input data to DataFrame
             if isinstance(data, dict):
@@ -77,7 +509,7 @@ class EducationCostPredictor:
             })
                 
             # Make prediction (estimated tuition)
-            tuition = self.model.predict(prediction_data)[0]
+            tuition = active.model.predict(prediction_data)[0]
             
             # Convert all values to appropriate types for calculations
             monthly_rent = float(str(data['rent_usd']).strip())
@@ -85,20 +517,234 @@ class EducationCostPredictor:
             visa_fee = float(str(data['visa_fee_usd']).strip())
             duration_years = float(str(data['duration_years']).strip())
             
-            # Calculate living expenses for the entire duration
-            living_expenses = (monthly_rent * 12 * duration_years) + (annual_insurance * duration_years) + visa_fee
-            
-            # Calculate total cost
-            total_cost = tuition + living_expenses
+            # Calculate living expenses for the entire duration and the total cost
+            tuition, living_expenses, total_cost = compute_costs(
+                tuition, monthly_rent, annual_insurance, visa_fee, duration_years)
             
             return {
-                'estimated_tuition_usd': round(tuition, 2),
-                'living_expenses_usd': round(living_expenses, 2),
-                'total_cost_usd': round(total_cost, 2)
+                'estimated_tuition_usd': float(tuition),
+                'living_expenses_usd': float(living_expenses),
+                'total_cost_usd': float(total_cost)
             }
         except Exception as e:
             return {"error": f"Prediction error: {str(e)}"}
     
+    def predict_batch(self, rows, explain=False):
+        """
+        Make predictions for many rows with a single vectorized model call.
+        
+        Args:
+            rows (list or DataFrame): Rows keyed by the form field names (country, city,
+                university, program, level, duration_years, living_cost_index, rent_usd,
+                visa_fee_usd, insurance_usd, exchange_rate and optionally other_program).
+                Dataset column names such as 'Rent_USD' are accepted too.
+            explain (bool): Also return the explanation of each result (see predict()),
+                when the model can be explained
+            
+        Returns:
+            dict: 'results' with the costs of every valid row, 'errors' with the reason
+                  each invalid row was rejected, both keyed by row index, and 'model_version'
+        """
+        self.check_for_update()
+        active = self.active
+        if active is None:
+            return {"error": "Model not loaded. Please check the model file."}
+        
+        errors = {}
+        if isinstance(rows, pd.DataFrame):
+            df = rows.reset_index(drop=True)
+        else:
+            rows = list(rows)
+            for i, row in enumerate(rows):
+                if not isinstance(row, dict):
+                    errors[i] = "Row must be an object"
+            df = pd.DataFrame.from_records([row if isinstance(row, dict) else {} for row in rows],
+                                           index=pd.RangeIndex(len(rows)))
+        df.columns = [str(column).lower() for column in df.columns]
+        
+        # Build one column-typed frame for the model, and collect per-row validation errors
+        try:
+            features, row_errors = prepare_features(df)
+        except ValueError as e:
+            return {"error": str(e)}
+        for i, error in row_errors.items():
+            errors.setdefault(i, error)
+        
+        valid = ~features.index.isin(list(errors))
+        results = []
+        if valid.any():
+            scored = features[valid]
+            try:
+                tuition = self._score_frame(active, scored[FEATURE_COLUMNS])
+            except Exception as e:
+                return {"error": f"Prediction error: {str(e)}"}
+            tuition, living_expenses, total_cost = compute_costs(
+                tuition, scored['Rent_USD'], scored['Insurance_USD'],
+                scored['Visa_Fee_USD'], scored['Duration_Years'])
+            for i, t, l, c in zip(scored.index.tolist(), tuition.tolist(),
+                                  living_expenses.tolist(), total_cost.tolist()):
+                results.append({
+                    'row': i,
+                    'estimated_tuition_usd': t,
+                    'living_expenses_usd': l,
+                    'total_cost_usd': c,
+                })
+            explanations = self._explain(active, scored) if explain else None
+            if explanations is not None:
+                for result, explanation in zip(results, explanations):
+                    result['explanation'] = explanation
+        
+        return {
+            'results': results,
+            'errors': [{'row': i, 'error': errors[i]} for i in sorted(errors)],
+            'model_version': active.version,
+        }
+    
+    def predict_sweep(self, base, axes):
+        """
+        Price every combination of new values for one or two fields of a scenario, with a
+        single vectorized model call.
+        
+        Args:
+            base (dict): The scenario, keyed by the form field names (see predict_batch());
+                the swept fields may be left out
+            axes (list): (field, values) pairs, one per swept field (a model input such as
+                duration_years, rent_usd or level); the first field varies slowest
+            
+        Returns:
+            dict: 'axes' with the field and the normalized values of each axis, the
+                  'estimated_tuition_usd', 'living_expenses_usd' and 'total_cost_usd'
+                  surfaces (one list level per axis, in axis order) and 'model_version'
+        """
+        self.check_for_update()
+        active = self.active
+        if active is None:
+            return {"error": "Model not loaded. Please check the model file."}
+        
+        columns = {column.lower(): column for column in FEATURE_COLUMNS}
+        fields = [str(field).lower() for field, _ in axes]
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            return {"error": f"Cannot sweep {', '.join(unknown)}, expected one of: {', '.join(columns)}"}
+        if len(set(fields)) != len(fields):
+            return {"error": "Each field can only be swept once"}
+        if not all(len(values) for _, values in axes):
+            return {"error": "Each swept field needs at least one value"}
+        
+        # Validate the scenario and every axis value once, as a small batch: the scenario with
+        # the first value of each axis, then with each value of each axis in turn
+        scenario = {str(key).lower(): value for key, value in base.items()}
+        scenario.update((field, values[0]) for field, (_, values) in zip(fields, axes))
+        rows = [scenario] + [dict(scenario, **{field: value})
+                             for field, (_, values) in zip(fields, axes) for value in values]
+        try:
+            features, errors = prepare_features(pd.DataFrame.from_records(rows))
+        except ValueError as e:
+            return {"error": str(e)}
+        if errors:
+            return {"error": errors[min(errors)]}
+        
+        # Repeat the scenario over the grid and lay each axis' values out along it
+        shape = [len(values) for _, values in axes]
+        grid = features.iloc[np.zeros(int(np.prod(shape)), dtype=np.intp)].reset_index(drop=True)
+        swept = []
+        start = 1
+        for k, field in enumerate(fields):
+            values = features[columns[field]].to_numpy()[start:start + shape[k]]
+            start += shape[k]
+            grid[columns[field]] = np.tile(np.repeat(values, int(np.prod(shape[k + 1:]))), int(np.prod(shape[:k])))
+            swept.append({'field': field, 'values': values.tolist()})
+        
+        try:
+            tuition = self._score_frame(active, grid[FEATURE_COLUMNS])
+        except Exception as e:
+            return {"error": f"Prediction error: {str(e)}"}
+        tuition, living_expenses, total_cost = compute_costs(
+            tuition, grid['Rent_USD'], grid['Insurance_USD'], grid['Visa_Fee_USD'], grid['Duration_Years'])
+        return {
+            'axes': swept,
+            'estimated_tuition_usd': tuition.reshape(shape).tolist(),
+            'living_expenses_usd': living_expenses.reshape(shape).tolist(),
+            'total_cost_usd': total_cost.reshape(shape).tolist(),
+            'model_version': active.version,
+        }
+    
+    def predict_frame(self, features):
+        """
+        Predict the tuition of many rows of model features with one vectorized model call.
+        
+        Args:
+            features (DataFrame): Rows with (at least) the FEATURE_COLUMNS, typed as
+                prepare_features() returns them or as the dataset has them
+            
+        Returns:
+            dict: 'tuition' with one prediction per row (ndarray) and 'model_version'
+        """
+        self.check_for_update()
+        active = self.active
+        if active is None:
+            return {"error": "Model not loaded. Please check the model file."}
+        try:
+            tuition = self._score_frame(active, features[FEATURE_COLUMNS])
+        except Exception as e:
+            return {"error": f"Prediction error: {str(e)}"}
+        return {'tuition': np.asarray(tuition), 'model_version': active.version}
+    
+    def _score_rows(self, active, rows):
+        """Predict tuition for normalized feature rows, on the inference pool if one is running."""
+        if self.pool is not None:
+            try:
+                return self.pool.predict(active, rows)
+            except PoolUnavailable:
+                # Starting, busy or replacing a crashed worker: score in this process
+                pass
+        return predict_rows(active, rows)
+    
+    def _score_frame(self, active, features):
+        """Predict tuition for a DataFrame of model features, on the inference pool if one is running."""
+        if self.pool is not None:
+            try:
+                return self.pool.predict_frame(active, features)
+            except PoolUnavailable:
+                pass
+        return active.model.predict(features)
+    
+    def get_cache_stats(self):
+        """
+        Get the prediction result cache counters.
+        
+        Returns:
+            dict: Cache size, limits and hit/miss counters
+        """
+        return self.cache.stats()
+    
+    def get_batching_stats(self):
+        """
+        Get the micro-batching tunables and counters.
+        
+        Returns:
+            dict: Batch sizes, queue depth and waiting time, or None if batching is disabled
+        """
+        return self.batcher.stats() if self.batcher is not None else None
+    
+    def get_pool_stats(self):
+        """
+        Get the inference pool's state and counters.
+        
+        Returns:
+            dict: Workers, requests, fallbacks and restarts, or None if the pool is disabled
+        """
+        return self.pool.stats() if self.pool is not None else None
+    
+    def get_precomputed_stats(self):
+        """
+        Get the precomputed prediction table's state and counters.
+        
+        Returns:
+            dict: Whether a table is in use, its rows and its hits and misses
+        """
+        return self.precomputed.stats()
+    
     def get_model_info(self):
         """
         Get information about the model.
@@ -106,19 +752,24 @@ class EducationCostPredictor:
         Returns:
             dict: Information about the model
         """
-        if not self.model_loaded:
+        self.check_for_update()
+        active = self.active
+        if active is None:
             return {"error": "Model not loaded"}
+        
+        if isinstance(active.model, NativeModel):
+            return dict(active.model.describe(), model_accuracy="95.68%", model_version=active.version)
             
         try:
             # For a scikit-learn Pipeline with XGBoost, we can get info like this
-            model_type = type(self.model).__name__
+            model_type = type(active.model).__name__
             
             # Get the estimator (XGBoost model) from the pipeline
-            estimator = self.model.named_steps['model']
+            estimator = active.model.named_steps['model']
             estimator_type = type(estimator).__name__
             
             # Get feature information
-            preprocessor = self.model.named_steps['preprocessor']
+            preprocessor = active.model.named_steps['preprocessor']
             feature_info = {}
             
             try:
@@ -145,7 +796,8 @@ class EducationCostPredictor:
                 "estimator_type": estimator_type,
                 "feature_info": feature_info,
                 "parameters": important_params,
-                "model_accuracy": "95.68%"  # This was the accuracy from the Jupyter notebook
+                "model_accuracy": "95.68%",  # This was the accuracy from the Jupyter notebook
+                "model_version": active.version
             }
         except Exception as e:
             return {"error": f"Error getting model info: {str(e)}"}
@@ -158,31 +810,7 @@ class EducationCostPredictor:
             dict: Statistics about the dataset
         """
         try:
-            # Try to load the CSV file
-            try:
-                data_path = os.path.join(settings.BASE_DIR, 'International_Education_Costs.csv')
-                df = pd.read_csv(data_path)
-            except FileNotFoundError:
-                # Try alternative path
-                data_path = os.path.join(settings.BASE_DIR, 'model and data', 'International_Education_Costs.csv')
-                df = pd.read_csv(data_path)
-            
-            # Calculate statistics
-            stats = {
-                "total_records": len(df),
-                "countries": df['Country'].nunique(),
-                "universities": df['University'].nunique(),
-                "programs": df['Program'].nunique(),
-                "levels": df['Level'].nunique(),
-                "avg_tuition": round(df['Tuition_USD'].mean(), 2),
-                "median_tuition": round(df['Tuition_USD'].median(), 2),
-                "min_tuition": round(df['Tuition_USD'].min(), 2),
-                "max_tuition": round(df['Tuition_USD'].max(), 2),
-                "avg_duration": round(df['Duration_Years'].mean(), 2),
-                "countries_distribution": df['Country'].value_counts().head(10).to_dict(),
-                "levels_distribution": df['Level'].value_counts().to_dict(),
-                "tuition_by_level": df.groupby('Level')['Tuition_USD'].mean().to_dict(),
-            }
-            return stats
+            # Read the precomputed snapshot for the current dataset version
+            return dict(get_dataset_stats())
         except Exception as e:
             return {"error": f"Error getting dataset stats: {str(e)}"} 
\ No newline at end of file
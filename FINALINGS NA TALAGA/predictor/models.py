@@ -0,0 +1,50 @@
+from django.db import models
+
+
+class EducationCost(models.Model):
+    """
+    One row of the education costs dataset, loaded by `manage.py import_education_costs`.
+
+    Field names are the dataset's column names in lowercase. The composite index
+    on (country, city, university, program) serves every level of the cascade
+    lookups: each is an equality match on a prefix of it.
+    """
+    country = models.CharField(max_length=100)
+    city = models.CharField(max_length=100)
+    university = models.CharField(max_length=200)
+    program = models.CharField(max_length=200)
+    level = models.CharField(max_length=50)
+    duration_years = models.FloatField()
+    tuition_usd = models.IntegerField()
+    living_cost_index = models.FloatField()
+    rent_usd = models.IntegerField()
+    visa_fee_usd = models.IntegerField()
+    insurance_usd = models.IntegerField()
+    exchange_rate = models.FloatField()
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['country', 'city', 'university', 'program'], name='education_cost_hierarchy'),
+            models.Index(fields=['city'], name='education_cost_city'),
+            models.Index(fields=['university'], name='education_cost_university'),
+            models.Index(fields=['program'], name='education_cost_program'),
+        ]
+
+    def __str__(self):
+        return f"{self.university} ({self.city}, {self.country}) - {self.program}"
+
+
+class EducationCostImport(models.Model):
+    """A completed import of the dataset CSV into the EducationCost table."""
+    version = models.CharField(max_length=16, help_text="Content hash of the imported CSV")
+    source = models.CharField(max_length=500)
+    rows = models.PositiveIntegerField()
+    imported_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-imported_at', '-id']
+        get_latest_by = ['imported_at', 'id']
+
+    def __str__(self):
+        return f"{self.version} ({self.rows} rows, {self.imported_at:%Y-%m-%d %H:%M})"
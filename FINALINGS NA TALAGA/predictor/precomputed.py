@@ -0,0 +1,203 @@
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .cache import CATEGORICAL_FIELDS
+from .dataset import get_dataset_stamp
+
+# Predictions of every dataset row, per dataset and model version: the budget search's
+# per-row predictions and the precomputed prediction tables keyed by feature hash
+PREDICTIONS_DIR = getattr(settings, 'DATASET_PREDICTIONS_DIR',
+                          os.path.join(settings.BASE_DIR, 'cache', 'predictions'))
+
+# Whether predict() answers from the precomputed table, and how often (seconds) it looks
+# for the table of a new dataset or model version that wasn't built yet
+PRECOMPUTED_PREDICTIONS = getattr(settings, 'PRECOMPUTED_PREDICTIONS', True)
+PRECOMPUTED_CHECK_INTERVAL = getattr(settings, 'PRECOMPUTED_CHECK_INTERVAL', 10)
+
+
+def feature_hash(key):
+    """64-bit hash of a prediction's features, a key from make_cache_key()."""
+    return int.from_bytes(hashlib.blake2b(repr(key).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def feature_keys(features):
+    """
+    The make_cache_key() keys of rows of model features.
+
+    Args:
+        features (DataFrame): The FEATURE_COLUMNS, in order (e.g. budget.dataset_features())
+
+    Returns:
+        list: One key tuple per row
+    """
+    columns = []
+    for i, column in enumerate(features.columns):
+        if i < len(CATEGORICAL_FIELDS):
+            columns.append(features[column].astype(str).str.strip().tolist())
+        else:
+            columns.append(features[column].astype(np.float64).tolist())
+    return list(zip(*columns))
+
+
+def table_path(dataset_version, model_version):
+    """File the precomputed prediction table of a dataset version and model version is kept in."""
+    return os.path.join(PREDICTIONS_DIR, f"{dataset_version}.{model_version}.table.npy")
+
+
+def write_table(keys, tuition, path):
+    """
+    Write a precomputed prediction table.
+
+    The table is a (2, n) uint64 array: the sorted feature hashes, and the
+    predicted tuition (float64 bits) of each.
+
+    Args:
+        keys (list): make_cache_key() keys, e.g. of every dataset row
+        tuition (ndarray): The predicted tuition of each key
+        path (str): The file to write
+
+    Returns:
+        int: Number of distinct keys in the table
+    """
+    hashes = np.fromiter((feature_hash(key) for key in keys), dtype=np.uint64, count=len(keys))
+    hashes, first = np.unique(hashes, return_index=True)
+    table = np.empty((2, len(hashes)), dtype=np.uint64)
+    table[0] = hashes
+    table[1] = np.asarray(tuition, dtype=np.float64)[first].view(np.uint64)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so other workers never map a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        np.save(file, table)
+    os.replace(tmp_path, path)
+    return len(hashes)
+
+
+class PredictionTable:
+    """
+    A precomputed prediction table (see write_table), memory-mapped.
+
+    Every worker maps the same file, so the table is in memory once. A lookup
+    hashes the features and binary-searches the sorted hashes: about 20
+    probes of the mapped array at a million rows, a few microseconds.
+    """
+
+    def __init__(self, path, version):
+        """
+        Args:
+            path (str): The table file
+            version (tuple): (dataset version, model version) it was computed for
+        """
+        self.path = path
+        self.version = version
+        table = np.load(path, mmap_mode='r')
+        self._hashes = table[0]
+        self._tuition = table[1].view(np.float64)
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def get(self, key):
+        """
+        Look up the predicted tuition of a make_cache_key() key.
+
+        Returns:
+            float: The prediction, or None if the features aren't in the table
+        """
+        target = np.uint64(feature_hash(key))
+        i = int(np.searchsorted(self._hashes, target))
+        if i < len(self._hashes) and self._hashes[i] == target:
+            return float(self._tuition[i])
+        return None
+
+
+class PrecomputedPredictions:
+    """
+    The precomputed prediction table of the current dataset and model versions.
+
+    A table is only used for the versions it was computed for: when the
+    dataset CSV or the model changes it goes stale, and predictions fall back
+    to the model until `manage.py precompute_predictions` is run for the new
+    versions (their table is looked for every PRECOMPUTED_CHECK_INTERVAL
+    seconds).
+    """
+
+    def __init__(self, enabled=PRECOMPUTED_PREDICTIONS, check_interval=PRECOMPUTED_CHECK_INTERVAL):
+        """
+        Args:
+            enabled (bool): Whether to answer from the table at all
+            check_interval (float): Seconds between looks for a table that wasn't built yet
+        """
+        self.enabled = enabled
+        self.check_interval = check_interval
+        # (version, table or None, monotonic time of the next look for a missing table)
+        self._state = (None, None, 0.0)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, model_version):
+        """
+        Look up the precomputed tuition of a prediction's features.
+
+        Args:
+            key (tuple): Key from make_cache_key()
+            model_version (str): Version of the model currently in use
+
+        Returns:
+            float: The predicted tuition, or None if there is no (current) table or the
+                   features aren't in it
+        """
+        if not self.enabled:
+            return None
+        table = self._table((get_dataset_stamp()[0], model_version))
+        if table is None:
+            return None
+        tuition = table.get(key)
+        if tuition is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return tuition
+
+    def _table(self, version):
+        """The table of a (dataset version, model version), mapping it if it's new."""
+        current, table, next_check = self._state
+        if current == version and (table is not None or time.monotonic() < next_check):
+            return table
+        with self._lock:
+            current, table, next_check = self._state
+            if current != version or (table is None and time.monotonic() >= next_check):
+                path = table_path(*version)
+                try:
+                    table = PredictionTable(path, version)
+                except FileNotFoundError:
+                    table = None
+                except (OSError, ValueError) as e:
+                    print(f"Error reading precomputed predictions {path}: {str(e)}")
+                    table = None
+                self._state = (version, table, time.monotonic() + self.check_interval)
+        return table
+
+    def stats(self):
+        """
+        Get the table's state and counters.
+
+        Returns:
+            dict: Whether a table is in use, its rows and the lookups it answered or not
+        """
+        _, table, _ = self._state
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'loaded': table is not None,
+            'rows': len(table) if table is not None else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(100 * self.hits / lookups, 1) if lookups else 0.0,
+        }
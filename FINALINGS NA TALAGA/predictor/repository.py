@@ -0,0 +1,193 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .cache import PredictionCache
+from .dataset import DatasetLookups, DatasetStore, get_dataset, get_dataset_stamp
+from .models import EducationCost, EducationCostImport
+
+# Where the dropdown APIs and the prediction form look the dataset up: 'memory' (the
+# snapshot of the CSV parsed by DatasetStore), 'compact' (the dictionary-encoded file
+# of the CSV, memory-mapped and shared by every worker) or 'database' (indexed queries
+# on the EducationCost table, loaded by `manage.py import_education_costs`)
+DATASET_BACKEND = getattr(settings, 'DATASET_BACKEND', 'memory')
+
+# Results of this many database lookups are kept per process, and a new import is
+# picked up within this many seconds
+DATASET_QUERY_CACHE_SIZE = getattr(settings, 'DATASET_QUERY_CACHE_SIZE', 4096)
+DATASET_VERSION_CHECK_INTERVAL = getattr(settings, 'DATASET_VERSION_CHECK_INTERVAL', 1.0)
+
+# Dataset columns, in file order; each is the lowercase name of an EducationCost field
+COLUMNS = [
+    'Country', 'City', 'University', 'Program', 'Level', 'Duration_Years', 'Tuition_USD',
+    'Living_Cost_Index', 'Rent_USD', 'Visa_Fee_USD', 'Insurance_USD', 'Exchange_Rate',
+]
+FIELDS = [column.lower() for column in COLUMNS]
+
+# Version of the EducationCost table before anything was imported
+EMPTY_VERSION = 'empty'
+
+
+class DatabaseRepository(DatasetLookups):
+    """
+    Lookups of one imported dataset version, as queries on the EducationCost table.
+
+    It answers the same calls as an EducationDataset snapshot, each with an
+    equality match on a prefix of the (country, city, university, program)
+    index, so a lookup reads only the matching index entries. A version's rows
+    never change, so results are kept in a shared LRU cache keyed by the
+    version: only the first lookup of a key runs its query.
+    """
+    cache = PredictionCache(maxsize=DATASET_QUERY_CACHE_SIZE, ttl=None)
+
+    def __init__(self, version, mtime=None):
+        """
+        Args:
+            version (str): Content hash of the imported CSV
+            mtime (int): When it was imported (ns)
+        """
+        self.version = version
+        self.mtime = mtime
+
+    def countries(self):
+        """Sorted list of all countries."""
+        return self.distinct('Country')
+
+    def cities(self, country=None):
+        """Sorted cities of a country, or of the whole dataset if no country is given."""
+        return self.distinct('City', {'Country': country})
+
+    def universities(self, country=None, city=None):
+        """Sorted universities for a country and city, a country, or the whole dataset."""
+        return self.distinct('University', {'Country': country, 'City': city if country else None})
+
+    def programs(self, country=None, city=None, university=None):
+        """Sorted programs offered by a university, or of the whole dataset."""
+        if country and city and university:
+            return self.distinct('Program', {'Country': country, 'City': city, 'University': university})
+        return self.distinct('Program')
+
+    def locations(self):
+        """Sorted (country, city, university) of every university, in one query."""
+        return self._cached(('locations',), lambda: list(
+            EducationCost.objects.order_by('country', 'city', 'university')
+            .values_list('country', 'city', 'university').distinct()))
+
+    def university_records(self, country, city, university):
+        """All dataset records for one university, in file order."""
+        return self._records(country=country, city=city, university=university)
+
+    def program_records(self, country, city, university, program):
+        """All dataset records for one program at a university, in file order."""
+        return self._records(country=country, city=city, university=university, program=program)
+
+    def distinct(self, column, filters=None):
+        """
+        Sorted unique values of a column among the rows matching some filters.
+
+        Args:
+            column (str): Dataset column to get the values of
+            filters (dict): Column -> value equality filters; empty values are ignored
+
+        Returns:
+            list: The values
+        """
+        lookups = {key.lower(): value for key, value in (filters or {}).items() if value}
+        field = column.lower()
+        return self._cached(('distinct', field, *sorted(lookups.items())), lambda: list(
+            EducationCost.objects.filter(**lookups).order_by(field).values_list(field, flat=True).distinct()))
+
+    def _records(self, **lookups):
+        """Matching rows as dictionaries keyed by dataset column, like the snapshot's records."""
+        def query():
+            rows = EducationCost.objects.filter(**lookups).order_by('id').values_list(*FIELDS)
+            return [dict(zip(COLUMNS, row)) for row in rows]
+        return self._cached(('records', *sorted(lookups.items())), query)
+
+    def _cached(self, key, query):
+        """The cached result of a lookup, running its query on a miss."""
+        result = self.cache.get(key, self.version)
+        if result is None:
+            result = query()
+            self.cache.set(key, result, self.version)
+        return result
+
+
+_repository = None
+_repository_lock = threading.Lock()
+_stamp = None
+
+
+def database_stamp():
+    """
+    Version and import time of the dataset in the EducationCost table.
+
+    The latest import is queried at most once per DATASET_VERSION_CHECK_INTERVAL.
+
+    Returns:
+        tuple: (version, imported at in ns), (EMPTY_VERSION, 0) if nothing was imported
+    """
+    global _stamp
+    now = time.monotonic()
+    checked = _stamp
+    if checked is not None and now - checked[0] < DATASET_VERSION_CHECK_INTERVAL:
+        return checked[1]
+
+    latest = EducationCostImport.objects.values_list('version', 'imported_at').first()
+    if latest is None:
+        stamp = (EMPTY_VERSION, 0)
+    else:
+        version, imported_at = latest
+        stamp = (version, int(imported_at.timestamp() * 1e9))
+    _stamp = (now, stamp)
+    return stamp
+
+
+def get_repository():
+    """
+    Get the dataset lookups of the configured DATASET_BACKEND.
+
+    Returns:
+        EducationDataset, CompactDataset or DatabaseRepository: The current snapshot
+            or compact file of the CSV, or the repository of the dataset version last
+            imported into the database
+    """
+    global _repository
+    if DATASET_BACKEND == 'compact':
+        from .compact import get_compact_dataset
+        return get_compact_dataset()
+    if DATASET_BACKEND != 'database':
+        return get_dataset()
+
+    version, mtime = database_stamp()
+    repository = _repository
+    if repository is None or (repository.version, repository.mtime) != (version, mtime):
+        with _repository_lock:
+            if _repository is None or (_repository.version, _repository.mtime) != (version, mtime):
+                _repository = DatabaseRepository(version, mtime)
+            repository = _repository
+    return repository
+
+
+def repository_is_current():
+    """
+    Whether get_repository() would return without loading anything: the current version
+    of the CSV snapshot or compact file is already in memory.
+
+    Returns:
+        bool: Always False with DATASET_BACKEND = 'database', whose lookups are queries
+    """
+    if DATASET_BACKEND == 'compact':
+        from .compact import CompactStore
+        return CompactStore().is_current()
+    if DATASET_BACKEND != 'database':
+        return DatasetStore().is_current()
+    return False
+
+
+def get_repository_stamp():
+    """(version, mtime in ns) of the configured DATASET_BACKEND's data, without loading it."""
+    if DATASET_BACKEND != 'database':
+        return get_dataset_stamp()
+    return database_stamp()
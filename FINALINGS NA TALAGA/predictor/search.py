@@ -0,0 +1,334 @@
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from itertools import chain
+
+import numpy as np
+from django.conf import settings
+
+from .repository import get_repository, repository_is_current
+
+# Number of /api/search/ results by default, and at most
+SEARCH_DEFAULT_RESULTS = getattr(settings, 'SEARCH_DEFAULT_RESULTS', 10)
+SEARCH_MAX_RESULTS = getattr(settings, 'SEARCH_MAX_RESULTS', 50)
+
+# A query word that starts no word of a name still matches the words whose
+# trigram similarity (Dice coefficient) to it is at least this
+SEARCH_FUZZY_THRESHOLD = getattr(settings, 'SEARCH_FUZZY_THRESHOLD', 0.5)
+
+# Kinds of search results, in the order they rank when their names tie
+KINDS = ['university', 'city', 'program']
+
+# Query words after this many are ignored
+MAX_TERMS = 8
+
+# Sorts after any character of a word, so (prefix, prefix + MAX_CHAR) spans the words starting with it
+MAX_CHAR = '\U0010ffff'
+
+# Runs of letters and digits
+WORD = re.compile(r'[^\W_]+')
+
+
+def words_of(text):
+    """The normalized words of a text: case-folded, without accents and split on anything but letters and digits."""
+    text = str(text)
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return WORD.findall(text.casefold())
+
+
+def trigrams(word):
+    """The trigrams of a word padded with a space on each side (as many as it has letters)."""
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Type-ahead search over the universities, cities and programs of a dataset version.
+
+    Names are split into normalized words. The sorted array of distinct words
+    serves as a trie: the words starting with a prefix are one contiguous
+    range of it, found by binary search. Entries are numbered in rank order
+    (shortest name first), and the postings (entry numbers) of every word are
+    stored one word after the other in a single array, so the entries of a
+    prefix are one slice of it. A query takes the entries of its rarest word
+    and keeps those in the masks of the others' entries, which leaves them in
+    rank order, so the top matches are the first ones. A query word that
+    starts no word is matched to similar words through a trigram index
+    instead, for typos.
+
+    The index is built once per dataset version and never modified, so every
+    thread can search it without locking.
+    """
+
+    def __init__(self, entries, version=None):
+        """
+        Index search entries.
+
+        Args:
+            entries (iterable): (kind, name, country, city) tuples, kind one of KINDS;
+                country and city are None where they don't apply
+            version (str): Version of the dataset the entries come from
+        """
+        self.version = version
+        ranked = []
+        for kind, name, country, city in set(entries):
+            words = words_of(name) if isinstance(name, str) else []
+            if words:
+                key = (len(' '.join(words)), name.casefold(), KINDS.index(kind), country or '', city or '')
+                ranked.append((key, (kind, name, country, city), words))
+        ranked.sort(key=lambda item: item[0])
+        self.entries = [entry for _, entry, _ in ranked]
+        self._kinds = np.array([KINDS.index(entry[0]) for entry in self.entries], dtype=np.uint8)
+
+        self._words = sorted({word for _, _, words in ranked for word in words})
+        ids = {word: i for i, word in enumerate(self._words)}
+        entry_words = [sorted({ids[word] for word in words}) for _, _, words in ranked]
+        # Words of each entry: entry i has _entry_words[_entry_offsets[i]:_entry_offsets[i + 1]]
+        self._entry_offsets = np.cumsum([0] + [len(words) for words in entry_words], dtype=np.int64)
+        self._entry_words = np.fromiter(chain.from_iterable(entry_words), dtype=np.int32,
+                                        count=int(self._entry_offsets[-1]))
+        # Entries of each word, in rank order: word i is in _postings[_offsets[i]:_offsets[i + 1]]
+        order = np.argsort(self._entry_words, kind='stable')
+        entry_of = np.repeat(np.arange(len(entry_words), dtype=np.int32), np.diff(self._entry_offsets))
+        self._postings = entry_of[order]
+        self._offsets = np.concatenate(([0], np.cumsum(np.bincount(self._entry_words, minlength=len(self._words)))))
+
+        grams = {}
+        gram_counts = []
+        for i, word in enumerate(self._words):
+            word_grams = trigrams(word)
+            gram_counts.append(len(word_grams))
+            for gram in word_grams:
+                grams.setdefault(gram, array('i')).append(i)
+        # The words having each trigram
+        self._trigrams = {gram: np.frombuffer(words, dtype=np.int32) for gram, words in grams.items()}
+        self._gram_counts = np.array(gram_counts, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=SEARCH_DEFAULT_RESULTS, kinds=None):
+        """
+        Find the entries matching what has been typed so far.
+
+        Every query word must start a word of the name, in any order ("univ
+        munich" finds "Technical University of Munich"). Those prefix matches
+        come first, best ranked first; if there are fewer than `limit`, names
+        whose words are similar to the query words (ranked by similarity)
+        fill the rest.
+
+        Args:
+            query (str): The text typed
+            limit (int): Maximum number of results
+            kinds (list): Kinds of entries to return, defaults to all KINDS
+
+        Returns:
+            list: Results as dictionaries with the type, name, country and city
+                of the entry and 'match' ('prefix' or 'fuzzy')
+        """
+        terms = words_of(query)[:MAX_TERMS]
+        if not terms or limit < 1:
+            return []
+        kinds = [KINDS.index(kind) for kind in kinds] if kinds else None
+
+        ranges = [self._prefix_range(term) for term in terms]
+        found = self._prefix_matches(ranges, limit, kinds)
+        results = [self._result(entry, 'prefix') for entry in found]
+        if len(found) < limit:
+            fuzzy = self._fuzzy_matches(terms, ranges, limit - len(found), kinds, found)
+            results.extend(self._result(entry, 'fuzzy') for entry in fuzzy)
+        return results
+
+    def _result(self, entry, match):
+        kind, name, country, city = self.entries[entry]
+        return {'type': kind, 'name': name, 'country': country, 'city': city, 'match': match}
+
+    def _prefix_range(self, prefix):
+        """Ids (start, end) of the words starting with a prefix."""
+        start = bisect_left(self._words, prefix)
+        return start, bisect_left(self._words, prefix + MAX_CHAR, start)
+
+    def _entries(self, start, end):
+        """Postings of a range of words: sorted per word, but not across them (an entry can repeat)."""
+        return self._postings[self._offsets[start]:self._offsets[end]]
+
+    def _mask(self, postings):
+        """Boolean mask of the entries in some postings."""
+        mask = np.zeros(len(self.entries), dtype=bool)
+        mask[postings] = True
+        return mask
+
+    def _distinct(self, postings, one_word):
+        """The distinct entries of some postings, in rank order."""
+        if one_word or not len(postings):
+            return postings
+        # Sorting is cheaper than a full-size mask only for a small part of the entries
+        if len(postings) * 16 < len(self.entries):
+            postings = np.sort(postings)
+            return postings[np.concatenate(([True], postings[1:] != postings[:-1]))]
+        return np.flatnonzero(self._mask(postings))
+
+    def _first(self, candidates, limit, kinds, masks):
+        """The first `limit` of some entries that are of the kinds and in every mask."""
+        for mask in masks:
+            candidates = candidates[mask[candidates]]
+        if kinds is not None:
+            candidates = candidates[np.isin(self._kinds[candidates], kinds)]
+        return candidates[:limit].tolist()
+
+    def _prefix_matches(self, ranges, limit, kinds):
+        """The best `limit` entries having a word starting with every query word."""
+        # Candidates are the entries of the query word with the fewest postings, kept if the others have them
+        ranges = sorted(ranges, key=lambda word_range: len(self._entries(*word_range)))
+        start, end = ranges[0]
+        candidates = self._distinct(self._entries(start, end), end - start == 1)
+        return self._first(candidates, limit, kinds, [self._mask(self._entries(*other)) for other in ranges[1:]])
+
+    def _similar_words(self, term):
+        """Ids of the words similar enough to a query word, with their similarity."""
+        if len(term) < 3:
+            return {}
+        grams = trigrams(term)
+        words = [self._trigrams[gram] for gram in grams if gram in self._trigrams]
+        if not words:
+            return {}
+        shared = np.bincount(np.concatenate(words), minlength=len(self._words))
+        scores = 2 * shared / (len(grams) + self._gram_counts)
+        similar = np.flatnonzero(scores >= SEARCH_FUZZY_THRESHOLD)
+        return dict(zip(similar.tolist(), scores[similar].tolist()))
+
+    def _score(self, entry, matchers):
+        """Mean over the query words of their best match in an entry (1 for a prefix), 0 if one has none."""
+        words = self._entry_words[self._entry_offsets[entry]:self._entry_offsets[entry + 1]].tolist()
+        total = 0.0
+        for start, end, similar in matchers:
+            if any(start <= word < end for word in words):
+                total += 1.0
+            else:
+                best = max((similar.get(word, 0.0) for word in words), default=0.0)
+                if not best:
+                    return 0.0
+                total += best
+        return total / len(matchers)
+
+    def _fuzzy_matches(self, terms, ranges, limit, kinds, exclude):
+        """
+        The best `limit` entries matching every query word by prefix or similarity, except `exclude`.
+
+        Candidates come from the query word matching the fewest postings, one
+        level of similarity at a time, best first, taking the first `limit`
+        (in rank order) of each level that the other query words match.
+        Levels stop once none of their entries could score above the
+        results found.
+        """
+        matchers = [(start, end, self._similar_words(term)) for term, (start, end) in zip(terms, ranges)]
+        postings = [np.concatenate([self._entries(start, end)] + [self._entries(word, word + 1) for word in similar])
+                    for start, end, similar in matchers]
+        driver = min(range(len(matchers)), key=lambda i: len(postings[i]))
+        masks = [self._mask(other) for i, other in enumerate(postings) if i != driver]
+        if exclude:
+            allowed = np.ones(len(self.entries), dtype=bool)
+            allowed[exclude] = False
+            masks.append(allowed)
+
+        start, end, similar = matchers[driver]
+        levels = {}
+        for word, score in similar.items():
+            levels.setdefault(score, []).append(word)
+        groups = ([(1.0, [range(start, end)])] if start < end else []) + [
+            (score, [range(word, word + 1) for word in words]) for score, words in sorted(levels.items(), reverse=True)]
+
+        scored = {}
+        for bound, word_ranges in groups:
+            # The other query words can at best match by prefix
+            best_possible = (bound + len(matchers) - 1) / len(matchers)
+            if len(scored) >= limit and best_possible <= sorted(scored.values(), reverse=True)[limit - 1]:
+                break
+            level = np.concatenate([self._entries(words.start, words.stop) for words in word_ranges])
+            one_word = len(word_ranges) == 1 and len(word_ranges[0]) == 1
+            for entry in self._first(self._distinct(level, one_word), limit, kinds, masks):
+                if entry not in scored:
+                    scored[entry] = self._score(entry, matchers)
+        return sorted(scored, key=lambda entry: (-scored[entry], entry))[:limit]
+
+
+def search_entries(dataset):
+    """
+    The search entries of a dataset: its universities (with their country and
+    city), its cities (with their country) and its programs.
+
+    Args:
+        dataset (DatasetLookups): The dataset lookups of any DATASET_BACKEND
+
+    Returns:
+        list: (kind, name, country, city) tuples
+    """
+    locations = dataset.locations()
+    entries = [('university', university, country, city) for country, city, university in locations]
+    entries.extend(('city', city, country, None)
+                   for country, city in dict.fromkeys((country, city) for country, city, _ in locations))
+    entries.extend(('program', program, None, None) for program in dataset.programs())
+    return entries
+
+
+def parse_search_params(params):
+    """
+    Read the parameters of a search request.
+
+    Args:
+        params (QueryDict): q, and optionally limit and type (comma-separated KINDS)
+
+    Returns:
+        tuple: (query, limit, kinds or None for all)
+
+    Raises:
+        ValueError: If limit or type is invalid
+    """
+    limit = SEARCH_DEFAULT_RESULTS
+    if params.get('limit'):
+        try:
+            limit = int(params['limit'])
+        except ValueError:
+            raise ValueError(f"Invalid limit: {params['limit']}")
+        if not 1 <= limit <= SEARCH_MAX_RESULTS:
+            raise ValueError(f"limit must be between 1 and {SEARCH_MAX_RESULTS}")
+
+    kinds = None
+    if params.get('type'):
+        kinds = [kind.strip() for kind in params['type'].split(',') if kind.strip()]
+        unknown = [kind for kind in kinds if kind not in KINDS]
+        if unknown:
+            raise ValueError(f"Unknown type: {', '.join(unknown)} (expected {', '.join(KINDS)})")
+    return params.get('q', ''), limit, kinds
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def search_index_is_current():
+    """Whether get_search_index() would return without loading or building anything."""
+    index = _index
+    return repository_is_current() and index is not None and index.version == get_repository().version
+
+
+def get_search_index():
+    """
+    Get the search index of the current dataset version of the DATASET_BACKEND.
+
+    Returns:
+        SearchIndex: The shared index, rebuilt only when the dataset changes
+    """
+    global _index
+    dataset = get_repository()
+    index = _index
+    if index is None or index.version != dataset.version:
+        with _index_lock:
+            if _index is None or _index.version != dataset.version:
+                _index = SearchIndex(search_entries(dataset), dataset.version)
+            index = _index
+    return index
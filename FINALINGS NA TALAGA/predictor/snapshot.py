@@ -0,0 +1,118 @@
+import os
+import threading
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+# Typed snapshots of the dataset CSV are stored here, one .npz file per content hash
+SNAPSHOT_DIR = getattr(settings, 'DATASET_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'cache', 'datasets'))
+
+# Layout of the snapshot files; files of another format are rebuilt
+SNAPSHOT_FORMAT = 2
+
+
+def snapshot_path(version, directory=None):
+    """File the snapshot of a dataset version is stored in."""
+    return os.path.join(directory or SNAPSHOT_DIR, f"dataset.{version}.npz")
+
+
+def write_snapshot(df, path):
+    """
+    Save a DataFrame as a columnar snapshot.
+
+    Numeric and boolean columns are stored as their arrays. Other columns are
+    dictionary-encoded: each unique value is stored once, in one UTF-8 buffer
+    with the offsets of the values in it, and every row as a code into them
+    (-1 for a missing value) of the smallest integer type that fits.
+
+    Args:
+        df (DataFrame): The dataset
+        path (str): File to write; it is replaced atomically
+    """
+    arrays = {
+        'format': np.array(SNAPSHOT_FORMAT),
+        'columns': np.array(df.columns.tolist(), dtype=str),
+    }
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            arrays[f'values.{i}'] = series.to_numpy()
+        else:
+            codes, categories = pd.factorize(series)
+            categories = [str(value) for value in categories]
+            arrays[f'codes.{i}'] = codes.astype(np.min_scalar_type(-max(len(categories), 1)))
+            # Offsets count characters, so the decoded buffer can be sliced directly
+            arrays[f'offsets.{i}'] = np.cumsum([0] + [len(value) for value in categories], dtype=np.int64)
+            arrays[f'text.{i}'] = np.frombuffer(''.join(categories).encode('utf-8'), dtype=np.uint8)
+
+    # Write then rename, so other workers never read a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        np.savez(file, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """
+    Load a snapshot written by write_snapshot().
+
+    Rows of a dictionary-encoded column share one string object per unique
+    value, so nothing is parsed and each string is built once.
+
+    Args:
+        path (str): The snapshot file
+
+    Returns:
+        DataFrame: The dataset, with the dtypes pd.read_csv gives it
+
+    Raises:
+        OSError: If the file can't be read
+        ValueError: If it isn't a snapshot of the current format
+    """
+    with np.load(path, allow_pickle=False) as snapshot:
+        if 'format' not in snapshot or int(snapshot['format']) != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a format {SNAPSHOT_FORMAT} dataset snapshot")
+        data = {}
+        for i, column in enumerate(snapshot['columns'].tolist()):
+            if f'values.{i}' in snapshot:
+                data[column] = snapshot[f'values.{i}']
+            else:
+                text = snapshot[f'text.{i}'].tobytes().decode('utf-8')
+                offsets = snapshot[f'offsets.{i}'].tolist()
+                categories = np.empty(len(offsets), dtype=object)
+                categories[:-1] = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+                # The last slot stays None, which is what the -1 code of missing values picks
+                data[column] = pd.Series(categories.take(snapshot[f'codes.{i}']), dtype='str')
+    # The arrays are new, so the frame can use them as they are rather than copying them into blocks
+    return pd.DataFrame(data, copy=False)
+
+
+def load_dataset_frame(raw, version, directory=None):
+    """
+    Get the DataFrame of a dataset version from its snapshot, building the snapshot if needed.
+
+    Args:
+        raw (bytes): Content of the dataset CSV
+        version (str): Its content hash
+        directory (str): Where snapshots are stored, defaults to SNAPSHOT_DIR
+
+    Returns:
+        DataFrame: The parsed dataset
+    """
+    path = snapshot_path(version, directory)
+    try:
+        return read_snapshot(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading dataset snapshot {path}, rebuilding it: {str(e)}")
+
+    df = pd.read_csv(BytesIO(raw))
+    try:
+        write_snapshot(df, path)
+    except OSError as e:
+        print(f"Error saving dataset snapshot {path}: {str(e)}")
+    return df
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from .dataset import CSV_PATH, get_dataset, get_dataset_stamp
+
+# Stats snapshots are stored next to the dataset, one JSON file per content hash
+STATS_DIR = getattr(settings, 'DATASET_STATS_DIR', os.path.dirname(CSV_PATH))
+
+
+def compute_dataset_stats(df):
+    """
+    Compute every dashboard statistic of a dataset.
+
+    Args:
+        df (DataFrame): The dataset
+
+    Returns:
+        dict: Plain (JSON serializable) statistics
+    """
+    avg_living_costs = (df.groupby('Country')[['Living_Cost_Index', 'Rent_USD']].mean()
+                        .sort_values(by='Living_Cost_Index', ascending=False).head(5))
+    stats = {
+        "total_records": len(df),
+        "countries": df['Country'].nunique(),
+        "universities": df['University'].nunique(),
+        "programs": df['Program'].nunique(),
+        "levels": df['Level'].nunique(),
+        "avg_tuition": round(df['Tuition_USD'].mean(), 2),
+        "median_tuition": round(df['Tuition_USD'].median(), 2),
+        "min_tuition": round(df['Tuition_USD'].min(), 2),
+        "max_tuition": round(df['Tuition_USD'].max(), 2),
+        "avg_duration": round(df['Duration_Years'].mean(), 2),
+        "countries_distribution": df['Country'].value_counts().head(10).to_dict(),
+        "levels_distribution": df['Level'].value_counts().to_dict(),
+        "tuition_by_level": df.groupby('Level')['Tuition_USD'].mean().to_dict(),
+        # Used by the dashboard's additional statistics
+        "popular_programs": df['Program'].value_counts().head(5).to_dict(),
+        "avg_living_costs": avg_living_costs.to_dict(),
+    }
+    # Round-trip through JSON so NumPy scalars become plain Python values
+    return json.loads(json.dumps(stats, default=float))
+
+
+def _value_counts(compact, column, limit=None):
+    """Counts of a string column's values, ordered like Series.value_counts() (ties in order of appearance)."""
+    codes = compact.codes(column)
+    counts = np.bincount(codes[codes >= 0], minlength=compact.vocabulary_size(column))
+    present, first = np.unique(codes, return_index=True)
+    appearance = np.full(len(counts), len(codes))
+    appearance[present[present >= 0]] = first[present >= 0]
+    order = np.lexsort((appearance, -counts))
+    order = order[counts[order] > 0][:limit]
+    return dict(zip(compact.decode(column, order), counts[order].tolist()))
+
+
+def _group_means(compact, column, by):
+    """Means of a numeric column per value of a string column, and the codes of the values that have one."""
+    codes = compact.codes(by)
+    values = compact.values(column)
+    valid = (codes >= 0) & ~np.isnan(values)
+    size = compact.vocabulary_size(by)
+    counts = np.bincount(codes[valid], minlength=size)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=size)
+    groups = np.flatnonzero(counts)
+    return groups, sums[groups] / counts[groups]
+
+
+def compute_compact_stats(compact):
+    """
+    Compute every dashboard statistic of a CompactDataset, on its codes and numeric arrays.
+
+    The statistics are those compute_dataset_stats() gives for the same data
+    (group means can differ in the last digits, from the summation order).
+
+    Args:
+        compact (CompactDataset): The dataset
+
+    Returns:
+        dict: Plain (JSON serializable) statistics
+    """
+    tuition = compact.values('Tuition_USD')
+    levels, tuition_by_level = _group_means(compact, 'Tuition_USD', 'Level')
+    countries, living_cost = _group_means(compact, 'Living_Cost_Index', 'Country')
+    rent_countries, rent = _group_means(compact, 'Rent_USD', 'Country')
+    rent = dict(zip(rent_countries.tolist(), rent.tolist()))
+    top = np.argsort(-living_cost, kind='stable')[:5]
+    top_names = compact.decode('Country', countries[top])
+    stats = {
+        "total_records": len(compact),
+        "countries": compact.vocabulary_size('Country'),
+        "universities": compact.vocabulary_size('University'),
+        "programs": compact.vocabulary_size('Program'),
+        "levels": compact.vocabulary_size('Level'),
+        "avg_tuition": round(np.nanmean(tuition), 2),
+        "median_tuition": round(np.nanmedian(tuition), 2),
+        "min_tuition": round(np.nanmin(tuition), 2),
+        "max_tuition": round(np.nanmax(tuition), 2),
+        "avg_duration": round(np.nanmean(compact.values('Duration_Years')), 2),
+        "countries_distribution": _value_counts(compact, 'Country', 10),
+        "levels_distribution": _value_counts(compact, 'Level'),
+        "tuition_by_level": dict(zip(compact.decode('Level', levels), tuition_by_level.tolist())),
+        # Used by the dashboard's additional statistics
+        "popular_programs": _value_counts(compact, 'Program', 5),
+        "avg_living_costs": {
+            'Living_Cost_Index': dict(zip(top_names, living_cost[top].tolist())),
+            'Rent_USD': {name: rent.get(code, float('nan')) for name, code in zip(top_names, countries[top].tolist())},
+        },
+    }
+    # Round-trip through JSON so NumPy scalars become plain Python values
+    return json.loads(json.dumps(stats, default=float))
+
+
+def stats_path(version):
+    """File the stats snapshot of a dataset version is persisted in."""
+    name = os.path.splitext(os.path.basename(CSV_PATH))[0]
+    return os.path.join(STATS_DIR, f"{name}.{version}.stats.json")
+
+
+class DatasetStatsStore:
+    """
+    Statistics snapshots of the dataset, keyed by its content hash.
+
+    A snapshot is computed once per dataset version and persisted as JSON,
+    so other workers and restarts read it instead of recomputing it, and
+    every later lookup is a dictionary read.
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def get(self, dataset=None):
+        """
+        Get the statistics of a dataset version.
+
+        Args:
+            dataset (EducationDataset): Snapshot to get stats for, defaults to the current one
+
+        Returns:
+            dict: The statistics (shared, do not modify)
+        """
+        # The current version comes from the file, so stats already computed don't load the dataset
+        version = dataset.version if dataset is not None else get_dataset_stamp()[0]
+        stats = self._snapshots.get(version)
+        if stats is None:
+            with self._lock:
+                stats = self._snapshots.get(version)
+                if stats is None:
+                    stats = self._load(version) or self.build(dataset or stats_source())
+                    self._snapshots = {version: stats}
+        return stats
+
+    def _load(self, version):
+        try:
+            with open(stats_path(version)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def build(self, dataset):
+        """
+        Compute and persist the statistics of a dataset version.
+
+        Args:
+            dataset (EducationDataset or CompactDataset): The dataset to compute stats for
+
+        Returns:
+            dict: The statistics
+        """
+        from .compact import CompactDataset
+        if isinstance(dataset, CompactDataset):
+            stats = compute_compact_stats(dataset)
+        else:
+            stats = compute_dataset_stats(dataset.df)
+        path = stats_path(dataset.version)
+        try:
+            # Write then rename, so other workers never read a partial file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump(stats, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error saving dataset stats: {str(e)}")
+        return stats
+
+
+stats_store = DatasetStatsStore()
+
+
+def stats_source():
+    """The current dataset to compute stats from: the compact one with DATASET_BACKEND = 'compact'."""
+    from .repository import DATASET_BACKEND
+    if DATASET_BACKEND == 'compact':
+        from .compact import get_compact_dataset
+        return get_compact_dataset()
+    return get_dataset()
+
+
+def get_dataset_stats(dataset=None):
+    """Shortcut for the statistics snapshot of the current (or given) dataset."""
+    return stats_store.get(dataset)
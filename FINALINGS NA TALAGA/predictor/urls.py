@@ -1,22 +1,34 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 from django.contrib.auth import views as auth_views
 
+# Under ASGI the dropdown APIs, predictions and charts are served by async views
+api = async_views if getattr(settings, 'ASYNC_VIEWS', False) else views
+
 urlpatterns = [
     path('', views.home, name='home'),
     path('signup/', views.signup, name='signup'),
-    path('predict/', views.predict, name='predict'),
+    path('predict/', api.predict, name='predict'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/charts/<str:name>.png', api.dashboard_chart, name='dashboard_chart'),
     
     # Authentication URLs
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     
     # API endpoints for dynamic dropdowns
-    path('api/education_data/', views.education_data_api, name='education_data_api'),
-    path('api/cities/', views.cities_api, name='cities_api'),
-    path('api/universities/', views.universities_api, name='universities_api'),
-    path('api/university_data/', views.university_data_api, name='university_data_api'),
-    path('api/programs/', views.programs_api, name='programs_api'),
-    path('api/program_details/', views.program_details_api, name='program_details_api'),
+    path('api/cascade/', api.cascade_api, name='cascade_api'),
+    path('api/education_data/', api.education_data_api, name='education_data_api'),
+    path('api/cities/', api.cities_api, name='cities_api'),
+    path('api/universities/', api.universities_api, name='universities_api'),
+    path('api/university_data/', api.university_data_api, name='university_data_api'),
+    path('api/programs/', api.programs_api, name='programs_api'),
+    path('api/program_details/', api.program_details_api, name='program_details_api'),
+    path('api/search/', api.search_api, name='search_api'),
+    path('api/search/budget/', api.budget_search_api, name='budget_search_api'),
+    
+    # API endpoints for batch predictions
+    path('api/predict/batch/', api.predict_batch_api, name='predict_batch_api'),
+    path('api/predict/sweep/', api.predict_sweep_api, name='predict_sweep_api'),
 ] 
\ No newline at end of file
@@ -1,24 +1,116 @@
 import os
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-import base64
+import functools
+from datetime import datetime, timezone
 from io import BytesIO
-import numpy as np
+
+from asgiref.sync import iscoroutinefunction
 
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_POST
+
+from .forms import UserRegistrationForm, EducationCostPredictionForm
+from .dataset import get_dataset, get_dataset_stamp
+from .repository import get_repository, get_repository_stamp
+
+# pandas, numpy (the search index), matplotlib and the model libraries
+# (sklearn/xgboost) are imported inside the views that use them, so that worker
+# start-up, manage.py commands and light pages like login/home don't pay for them
+
+# Limits for the batch prediction API
+BATCH_PREDICTION_MAX_ROWS = getattr(settings, 'BATCH_PREDICTION_MAX_ROWS', 10000)
+BATCH_PREDICTION_MAX_BYTES = getattr(settings, 'BATCH_PREDICTION_MAX_BYTES', 16 * 1024 * 1024)
+
+# Limits for the what-if sweep API: swept fields per request, and grid points (combinations of their values)
+SWEEP_MAX_AXES = 2
+SWEEP_MAX_POINTS = getattr(settings, 'SWEEP_MAX_POINTS', 10000)
+
+# Browser cache lifetime of dashboard charts (seconds)
+CHART_CACHE_MAX_AGE = getattr(settings, 'CHART_CACHE_MAX_AGE', 365 * 24 * 60 * 60)
+
+# Cache-Control of the dataset APIs, as patch_cache_control() keyword arguments
+DATASET_CACHE_CONTROL = getattr(settings, 'DATASET_CACHE_CONTROL', {'public': True, 'no_cache': True})
+
+def dataset_etag(request, *args, **kwargs):
+    """ETag of a dataset API response: the data only changes with the dataset."""
+    return get_dataset_stamp()[0]
 
-from .forms import UserRegistrationForm, EducationCostPredictionForm, get_filtered_choices
-from .ml_model import EducationCostPredictor
+def dataset_last_modified(request, *args, **kwargs):
+    """Last-Modified of a dataset API response: when the dataset file last changed."""
+    return datetime.fromtimestamp(get_dataset_stamp()[1] / 1e9, tz=timezone.utc)
+
+def repository_etag(request, *args, **kwargs):
+    """ETag of a dataset lookup response: the version of the DATASET_BACKEND's data."""
+    return get_repository_stamp()[0]
+
+def repository_last_modified(request, *args, **kwargs):
+    """Last-Modified of a dataset lookup response: when the DATASET_BACKEND's data last changed."""
+    return datetime.fromtimestamp(get_repository_stamp()[1] / 1e9, tz=timezone.utc)
+
+def dataset_api(view=None, etag_func=dataset_etag, last_modified_func=dataset_last_modified):
+    """
+    Decorator for views serving data derived from the dataset only.
+    
+    Responses get an ETag (the dataset version), a Last-Modified and the
+    DATASET_CACHE_CONTROL policy. A request whose If-None-Match or
+    If-Modified-Since still matches is answered 304 without calling the
+    view, from get_dataset_stamp() (or get_repository_stamp()): the dataset
+    isn't parsed, read or queried.
+    
+    Args:
+        view: The sync or async view (or None, to use with arguments)
+        etag_func (callable): Computes the ETag, for views whose body depends on more than the dataset
+        last_modified_func (callable): Computes the Last-Modified, for views reading another copy of the dataset
+    """
+    if view is None:
+        return functools.partial(dataset_api, etag_func=etag_func, last_modified_func=last_modified_func)
+    conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+    
+    def add_cache_control(response):
+        if response.status_code in (200, 304):
+            patch_cache_control(response, **DATASET_CACHE_CONTROL)
+        return response
+    
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            return add_cache_control(await conditional(request, *args, **kwargs))
+    else:
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return add_cache_control(conditional(request, *args, **kwargs))
+    return wrapper
 
-# Constants
-CSV_PATH = os.path.join(settings.BASE_DIR, 'model and data', 'International_Education_Costs.csv')
+# The dropdown lookups read the DATASET_BACKEND (the CSV snapshot or the database), so they
+# are validated against its version
+lookup_api = dataset_api(etag_func=repository_etag, last_modified_func=repository_last_modified)
+
+def budget_etag(request, *args, **kwargs):
+    """ETag of a budget search response, which depends on the model as well as the dataset."""
+    from .ml_model import EducationCostPredictor
+    return f"{dataset_etag(request)}-{EducationCostPredictor().model_version}"
+
+def export_etag(request, *args, **kwargs):
+    """ETag of a dataset export, which is also gzip-encoded or not depending on the request."""
+    from .export import accepts_gzip
+    return f"{dataset_etag(request)}-gzip" if accepts_gzip(request) else dataset_etag(request)
+
+def apply_manual_values(data):
+    """Use the manually entered cost values of a cleaned prediction form, if it asks for them."""
+    if data.get('use_manual_values'):
+        # Replace values with manual entries
+        data['living_cost_index'] = data.get('living_cost_index_manual')
+        data['rent_usd'] = data.get('rent_usd_manual')
+        data['visa_fee_usd'] = data.get('visa_fee_usd_manual')
+        data['insurance_usd'] = data.get('insurance_usd_manual')
+        data['exchange_rate'] = data.get('exchange_rate_manual')
+    return data
 
 def home(request):
     """Home page view."""
@@ -46,45 +138,18 @@ def predict(request):
         # Get the form data
         post_data = request.POST.copy()
         
-        # If the form is going to be invalid because of city/university not being in choices,
-        # update the form choices before validation
-        if 'country' in post_data and post_data.get('country'):
-            country = post_data.get('country')
-            city = post_data.get('city')
-            
-            # Pre-populate the form with the city choices based on the country
-            form = EducationCostPredictionForm(post_data)
-            form.fields['city'].choices = get_filtered_choices('City', {'Country': country}) 
-            
-            # If city is provided, update university choices based on country and city
-            if city:
-                form.fields['university'].choices = get_filtered_choices('University', 
-                                                    {'Country': country, 'City': city})
-                
-                # If university is provided, update program choices
-                university = post_data.get('university')
-                if university:
-                    form.fields['program'].choices = get_filtered_choices('Program', 
-                                                     {'Country': country, 'City': city, 'University': university})
-        else:
-            form = EducationCostPredictionForm(post_data)
+        # The form narrows the city, university and program choices to the
+        # submitted country, city and university using the choice catalog
+        form = EducationCostPredictionForm(post_data)
         
         if form.is_valid():
-            # Get form data
-            data = form.cleaned_data
-            
-            # Check if using manual values
-            if data.get('use_manual_values'):
-                # Replace values with manual entries
-                data['living_cost_index'] = data.get('living_cost_index_manual')
-                data['rent_usd'] = data.get('rent_usd_manual')
-                data['visa_fee_usd'] = data.get('visa_fee_usd_manual')
-                data['insurance_usd'] = data.get('insurance_usd_manual')
-                data['exchange_rate'] = data.get('exchange_rate_manual')
+            # Get form data, with the manual values if the user entered them
+            data = apply_manual_values(form.cleaned_data)
             
             # Initialize predictor and make prediction
+            from .ml_model import EducationCostPredictor
             predictor = EducationCostPredictor()
-            prediction_result = predictor.predict(data)
+            prediction_result = predictor.predict(data, explain=True)
             
             if 'error' in prediction_result:
                 messages.error(request, f"Prediction Error: {prediction_result['error']}")
@@ -103,274 +168,146 @@ def predict(request):
 @login_required
 def dashboard(request):
     """Dashboard view showing model information and statistics."""
+    from .charts import CHARTS
+    from .ml_model import EducationCostPredictor
+    
     predictor = EducationCostPredictor()
     model_info = predictor.get_model_info()
     dataset_stats = predictor.get_sample_data_stats()
+    cache_stats = predictor.get_cache_stats()
+    batching_stats = predictor.get_batching_stats()
+    pool_stats = predictor.get_pool_stats()
+    precomputed_stats = predictor.get_precomputed_stats()
     
-    # Generate visualizations
-    visualizations = generate_visualizations(dataset_stats)
+    # Link the charts, which are rendered once per dataset version by dashboard_chart
+    version = get_dataset_stamp()[0]
+    visualizations = {
+        f'{name}_chart': f"{reverse('dashboard_chart', args=[name])}?v={version}" for name in CHARTS
+    }
     
-    # Add additional statistics for popular programs
-    try:
-        df = pd.read_csv(CSV_PATH)
-        
-        # Get top programs by popularity
-        popular_programs = df['Program'].value_counts().head(5).to_dict()
-        
-        # Get average living costs by country
-        avg_living_costs = df.groupby('Country')[['Living_Cost_Index', 'Rent_USD']].mean().sort_values(by='Living_Cost_Index', ascending=False).head(5).to_dict()
-        
-        # Add new statistics to context
-        additional_stats = {
-            'popular_programs': popular_programs,
-            'avg_living_costs': avg_living_costs
-        }
-    except Exception as e:
-        print(f"Error generating additional stats: {str(e)}")
-        additional_stats = {}
+    # Additional statistics come from the same precomputed snapshot
+    additional_stats = {
+        'popular_programs': dataset_stats.get('popular_programs', {}),
+        'avg_living_costs': dataset_stats.get('avg_living_costs', {})
+    }
     
     context = {
         'model_info': model_info,
         'dataset_stats': dataset_stats,
         'visualizations': visualizations,
-        'additional_stats': additional_stats
+        'additional_stats': additional_stats,
+        'cache_stats': cache_stats,
+        'batching_stats': batching_stats,
+        'pool_stats': pool_stats,
+        'precomputed_stats': precomputed_stats
     }
     
     return render(request, 'predictor/dashboard.html', context)
 
-def generate_visualizations(stats):
-    """Generate visualization charts for the dashboard."""
-    visualizations = {}
+def chart_etag(request, name):
+    """ETag of a dashboard chart: charts only change with the dataset."""
+    return f"{get_dataset_stamp()[0]}-{name}"
+
+@login_required
+@condition(etag_func=chart_etag)
+def dashboard_chart(request, name):
+    """Serve one dashboard chart as a PNG, rendered once per dataset version."""
+    from .charts import CHARTS, chart_cache
     
-    try:
-        # 1. Top Countries Bar Chart
-        countries_data = stats.get('countries_distribution', {})
-        if countries_data:
-            fig = Figure(figsize=(10, 6))
-            ax = fig.add_subplot(111)
-            countries = list(countries_data.keys())[:8]  # Top 8 countries
-            counts = [countries_data[country] for country in countries]
-            ax.bar(countries, counts, color='skyblue')
-            ax.set_title('Most Common Countries in Dataset')
-            ax.set_ylabel('Number of Programs')
-            ax.tick_params(axis='x', rotation=45)
-            fig.tight_layout()
-            
-            # Convert plot to base64 string
-            buf = BytesIO()
-            FigureCanvas(fig).print_png(buf)
-            visualizations['countries_chart'] = base64.b64encode(buf.getvalue()).decode('utf-8')
-        
-        # 2. Education Levels Pie Chart
-        levels_data = stats.get('levels_distribution', {})
-        if levels_data:
-            fig = Figure(figsize=(8, 8))
-            ax = fig.add_subplot(111)
-            labels = list(levels_data.keys())
-            sizes = list(levels_data.values())
-            ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, 
-                   shadow=True, explode=[0.1 if l == max(labels, key=levels_data.get) else 0 for l in labels])
-            ax.axis('equal')
-            ax.set_title('Distribution of Education Levels')
-            fig.tight_layout()
-            
-            # Convert plot to base64 string
-            buf = BytesIO()
-            FigureCanvas(fig).print_png(buf)
-            visualizations['levels_chart'] = base64.b64encode(buf.getvalue()).decode('utf-8')
-        
-        # 3. Tuition by Level Bar Chart
-        tuition_data = stats.get('tuition_by_level', {})
-        if tuition_data:
-            fig = Figure(figsize=(10, 6))
-            ax = fig.add_subplot(111)
-            levels = list(tuition_data.keys())
-            tuitions = [tuition_data[level] for level in levels]
-            ax.bar(levels, tuitions, color='lightgreen')
-            ax.set_title('Average Tuition by Education Level')
-            ax.set_ylabel('Average Tuition (USD)')
-            ax.tick_params(axis='x', rotation=45)
-            
-            # Add data labels on bars
-            for i, v in enumerate(tuitions):
-                ax.text(i, v + 500, f"${v:,.0f}", ha='center')
-                
-            fig.tight_layout()
-            
-            # Convert plot to base64 string
-            buf = BytesIO()
-            FigureCanvas(fig).print_png(buf)
-            visualizations['tuition_chart'] = base64.b64encode(buf.getvalue()).decode('utf-8')
-        
-        # 4. Cost Factors Breakdown (NEW)
-        try:
-            # Load the CSV to calculate cost factors
-            df = pd.read_csv(CSV_PATH)
-            
-            # Calculate average costs by component
-            avg_tuition = df['Tuition_USD'].mean()
-            avg_rent = df['Rent_USD'].mean() * 12 * df['Duration_Years'].mean()  # Annual rent for average duration
-            avg_insurance = df['Insurance_USD'].mean() * df['Duration_Years'].mean()  # Insurance for average duration
-            avg_visa = df['Visa_Fee_USD'].mean()
-            
-            # Create pie chart of cost components
-            fig = Figure(figsize=(8, 8))
-            ax = fig.add_subplot(111)
-            components = ['Tuition', 'Rent', 'Insurance', 'Visa Fee']
-            values = [avg_tuition, avg_rent, avg_insurance, avg_visa]
-            colors = ['#4e73df', '#1cc88a', '#36b9cc', '#f6c23e']
-            
-            # Filter out components with very small values
-            total = sum(values)
-            labels = []
-            filtered_values = []
-            filtered_colors = []
-            
-            for i, (comp, val, color) in enumerate(zip(components, values, colors)):
-                percentage = (val / total) * 100
-                if percentage >= 1.0:  # Only include components that are at least 1% of total
-                    labels.append(f"{comp} (${val:,.0f})")
-                    filtered_values.append(val)
-                    filtered_colors.append(color)
-            
-            wedges, texts, autotexts = ax.pie(
-                filtered_values, 
-                labels=None,  # We'll add custom legend instead
-                autopct='%1.1f%%', 
-                startangle=90, 
-                colors=filtered_colors,
-                shadow=False,
-                wedgeprops={'edgecolor': 'white', 'linewidth': 1.5},
-                textprops={'fontsize': 12, 'fontweight': 'bold', 'color': 'white'}
-            )
-            
-            # Add a legend
-            ax.legend(
-                wedges, 
-                labels,
-                title="Cost Components",
-                loc="center left",
-                bbox_to_anchor=(0.85, 0, 0.5, 1)
-            )
-            
-            ax.axis('equal')
-            ax.set_title('Average Education Cost Breakdown', fontsize=16, pad=20)
-            fig.tight_layout()
-            
-            # Convert plot to base64 string
-            buf = BytesIO()
-            FigureCanvas(fig).print_png(buf)
-            visualizations['cost_factors_chart'] = base64.b64encode(buf.getvalue()).decode('utf-8')
-            
-            # 5. Living Cost Index vs. Tuition Scatter Plot (NEW)
-            fig = Figure(figsize=(10, 6))
-            ax = fig.add_subplot(111)
-            
-            # Filter out outliers for better visualization
-            q_low = df['Tuition_USD'].quantile(0.01)
-            q_high = df['Tuition_USD'].quantile(0.99)
-            filtered_df = df[(df['Tuition_USD'] >= q_low) & (df['Tuition_USD'] <= q_high)]
-            
-            scatter = ax.scatter(
-                filtered_df['Living_Cost_Index'], 
-                filtered_df['Tuition_USD'], 
-                alpha=0.6,
-                c=filtered_df['Living_Cost_Index'],
-                cmap='viridis',
-                s=50
-            )
-            
-            # Add a color bar using the figure's colorbar method
-            cbar = fig.colorbar(scatter, ax=ax)
-            cbar.set_label('Living Cost Index')
-            
-            # Add a trend line
-            z = np.polyfit(filtered_df['Living_Cost_Index'], filtered_df['Tuition_USD'], 1)
-            p = np.poly1d(z)
-            x_range = np.linspace(filtered_df['Living_Cost_Index'].min(), filtered_df['Living_Cost_Index'].max(), 100)
-            ax.plot(x_range, p(x_range), "r--", linewidth=2)
-            
-            ax.set_title('Relationship Between Living Cost Index and Tuition', fontsize=16)
-            ax.set_xlabel('Living Cost Index', fontsize=12)
-            ax.set_ylabel('Tuition (USD)', fontsize=12)
-            ax.grid(True, linestyle='--', alpha=0.7)
-            
-            # Format y-axis with dollar signs
-            from matplotlib.ticker import FuncFormatter
-            def currency_formatter(x, pos):
-                return '${:,.0f}'.format(x)
-            ax.yaxis.set_major_formatter(FuncFormatter(currency_formatter))
-            
-            fig.tight_layout()
-            
-            # Convert plot to base64 string
-            buf = BytesIO()
-            FigureCanvas(fig).print_png(buf)
-            visualizations['cost_index_tuition_chart'] = base64.b64encode(buf.getvalue()).decode('utf-8')
-            
-        except Exception as e:
-            print(f"Error generating additional visualizations: {str(e)}")
-            
-    except Exception as e:
-        print(f"Error generating visualizations: {str(e)}")
-        
-    return visualizations
+    if name not in CHARTS:
+        raise Http404("Unknown chart")
+    return chart_response(chart_cache.get(name))
+
+def chart_response(png):
+    """Build the response for a rendered chart."""
+    if png is None:
+        raise Http404("Chart not available")
+    
+    response = HttpResponse(png, content_type='image/png')
+    # The dashboard links charts with the dataset version in the URL, so they can be cached for long
+    patch_cache_control(response, private=True, max_age=CHART_CACHE_MAX_AGE)
+    return response
 
 # API endpoints for dynamic dropdown data
+@dataset_api(etag_func=export_etag)
 def education_data_api(request):
-    """API endpoint to get all education data."""
+    """
+    API endpoint to export the education data, streamed.
+    
+    Query parameters (all optional):
+        format: json (an array of records, the default), ndjson or csv
+        fields: Comma-separated columns to include, e.g. country,city,tuition_usd
+        <column>=value: Only rows with this value, e.g. country=Germany (repeat for several)
+        min_<column>, max_<column>: Bounds for numeric columns, e.g. max_tuition_usd=20000
+        limit: Rows per page; a page that isn't the last one has X-Next-Cursor and Link headers
+        cursor: The X-Next-Cursor of the previous page (with the same parameters otherwise)
+    
+    The response is gzip-encoded when the client accepts it.
+    """
+    return education_data_response(request)
+
+def education_data_response(request, asynchronous=False):
+    """Parse an export request and stream it (see education_data_api)."""
+    from .export import StaleCursor, export_response
+    try:
+        return export_response(request, get_dataset(), asynchronous=asynchronous)
+    except StaleCursor as e:
+        return JsonResponse({'error': str(e)}, status=410)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+@lookup_api
+def cascade_api(request):
+    """
+    API endpoint for the prediction form's dropdowns and auto-filled values in one request.
+    
+    Given any prefix of country, city, university and program, returns the options
+    of the next level and the selected university's (and program's) default form
+    values (see DatasetLookups.cascade).
+    """
     try:
-        df = pd.read_csv(CSV_PATH)
-        data = df.to_dict(orient='records')
-        return JsonResponse(data, safe=False)
+        return JsonResponse(get_repository().cascade(
+            request.GET.get('country', ''),
+            request.GET.get('city', ''),
+            request.GET.get('university', ''),
+            request.GET.get('program', ''),
+        ))
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@lookup_api
 def cities_api(request):
     """API endpoint to get cities for a specific country."""
     try:
         country = request.GET.get('country', '')
-        df = pd.read_csv(CSV_PATH)
-        
-        if country:
-            cities = df[df['Country'] == country]['City'].unique().tolist()
-        else:
-            cities = df['City'].unique().tolist()
-            
-        return JsonResponse(sorted(cities), safe=False)
+        cities = get_repository().cities(country)
+        return JsonResponse(cities, safe=False)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@lookup_api
 def universities_api(request):
     """API endpoint to get universities for a specific country and city."""
     try:
         country = request.GET.get('country', '')
         city = request.GET.get('city', '')
-        df = pd.read_csv(CSV_PATH)
-        
-        if country and city:
-            universities = df[(df['Country'] == country) & (df['City'] == city)]['University'].unique().tolist()
-        elif country:
-            universities = df[df['Country'] == country]['University'].unique().tolist()
-        else:
-            universities = df['University'].unique().tolist()
-            
-        return JsonResponse(sorted(universities), safe=False)
+        universities = get_repository().universities(country, city)
+        return JsonResponse(universities, safe=False)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@lookup_api
 def university_data_api(request):
     """API endpoint to get data for a specific university."""
     try:
         country = request.GET.get('country', '')
         city = request.GET.get('city', '')
         university = request.GET.get('university', '')
-        df = pd.read_csv(CSV_PATH)
         
         if country and city and university:
-            university_data = df[(df['Country'] == country) & 
-                                 (df['City'] == city) & 
-                                 (df['University'] == university)].to_dict(orient='records')
+            university_data = get_repository().university_records(country, city, university)
         else:
             university_data = []
             
@@ -378,25 +315,19 @@ def university_data_api(request):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@lookup_api
 def programs_api(request):
     """API endpoint to get available programs for a specific university."""
     try:
         country = request.GET.get('country', '')
         city = request.GET.get('city', '')
         university = request.GET.get('university', '')
-        df = pd.read_csv(CSV_PATH)
-        
-        if country and city and university:
-            programs = df[(df['Country'] == country) & 
-                          (df['City'] == city) & 
-                          (df['University'] == university)]['Program'].unique().tolist()
-        else:
-            programs = df['Program'].unique().tolist()
-            
-        return JsonResponse(sorted(programs), safe=False)
+        programs = get_repository().programs(country, city, university)
+        return JsonResponse(programs, safe=False)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@lookup_api
 def program_details_api(request):
     """API endpoint to get details for a specific program at a university."""
     try:
@@ -404,16 +335,190 @@ def program_details_api(request):
         city = request.GET.get('city', '')
         university = request.GET.get('university', '')
         program = request.GET.get('program', '')
-        df = pd.read_csv(CSV_PATH)
         
         if country and city and university and program:
-            program_data = df[(df['Country'] == country) & 
-                             (df['City'] == city) & 
-                             (df['University'] == university) &
-                             (df['Program'] == program)].to_dict(orient='records')
+            program_data = get_repository().program_records(country, city, university, program)
         else:
             program_data = []
             
         return JsonResponse(program_data, safe=False)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500) 
\ No newline at end of file
+        return JsonResponse({'error': str(e)}, status=500)
+
+@lookup_api
+def search_api(request):
+    """
+    API endpoint for type-ahead search of universities, cities and programs.
+    
+    Query parameters:
+        q: The text typed so far; each of its words must start a word of the name
+            (or, failing that, be close to one), e.g. "tech univ mun"
+        limit: Number of results (default SEARCH_DEFAULT_RESULTS, at most SEARCH_MAX_RESULTS)
+        type: Comma-separated kinds of results: university, city and/or program (default all)
+    
+    Returns the best matches first, each with its type, name, country and city
+    (null where they don't apply) and whether it matched by prefix or fuzzily.
+    """
+    from .search import get_search_index, parse_search_params
+    try:
+        query, limit, kinds = parse_search_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    try:
+        return JsonResponse(get_search_index().search(query, limit, kinds), safe=False)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+# Not Last-Modified: a new model changes the results without changing the dataset file
+@dataset_api(etag_func=budget_etag, last_modified_func=None)
+def budget_search_api(request):
+    """
+    API endpoint for the cheapest study options within a budget.
+    
+    Query parameters (all optional):
+        max_total: Highest predicted total cost (tuition and living expenses) in USD
+        country, program, level: Only rows with these values, e.g. level=Master&program=Computer+Science
+        limit: Number of results (default BUDGET_DEFAULT_RESULTS, at most BUDGET_MAX_RESULTS)
+    
+    Every dataset row is priced by the model once per dataset and model version
+    (see BudgetIndex); returns the cheapest matching rows first, each with its
+    country, city, university, program, level, duration and predicted costs.
+    """
+    return budget_search_response(request)
+
+def budget_search_response(request):
+    """Parse a budget search request and run it (see budget_search_api)."""
+    from .budget import get_budget_index, parse_budget_params
+    from .ml_model import EducationCostPredictor
+    try:
+        max_total, limit, filters = parse_budget_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    try:
+        if not EducationCostPredictor().model_loaded:
+            return JsonResponse({'error': 'Model not loaded. Please check the model file.'}, status=503)
+        index = get_budget_index()
+        return JsonResponse({
+            'results': index.search(max_total, limit, filters),
+            'model_version': index.version[1],
+        })
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+@login_required
+@require_POST
+def predict_batch_api(request):
+    """
+    API endpoint to price many scenarios in one request.
+    
+    Accepts a JSON array of rows (or {"rows": [...]}) or a CSV body with a header
+    line, using the prediction form field names as keys/columns. All valid rows
+    are scored with a single vectorized model call.
+    
+    With ?explain=1, each result also has an "explanation": the base value and how
+    much each field added to or took off the estimated tuition.
+    
+    A request can cost up to BATCH_PREDICTION_MAX_ROWS model rows, so like the
+    predict page it is only open to logged-in users, and session callers must
+    send the CSRF token (X-CSRFToken header).
+    """
+    return predict_batch_response(request)
+
+def predict_batch_response(request):
+    """Parse a batch prediction request and score it (see predict_batch_api)."""
+    try:
+        if int(request.META.get('CONTENT_LENGTH') or 0) > BATCH_PREDICTION_MAX_BYTES:
+            return JsonResponse({'error': 'Request body too large'}, status=413)
+        
+        # Read the stream directly so the body limit above applies instead of DATA_UPLOAD_MAX_MEMORY_SIZE
+        body = request.read()
+        if request.content_type in ('text/csv', 'application/csv'):
+            import pandas as pd
+            rows = pd.read_csv(BytesIO(body), dtype=str, keep_default_na=False)
+        else:
+            rows = json.loads(body or b'null')
+            if isinstance(rows, dict):
+                rows = rows.get('rows')
+            if not isinstance(rows, list):
+                return JsonResponse({'error': 'Expected a JSON array of rows'}, status=400)
+        
+        if len(rows) > BATCH_PREDICTION_MAX_ROWS:
+            return JsonResponse({'error': f'Too many rows, the limit is {BATCH_PREDICTION_MAX_ROWS}'}, status=413)
+        
+        from .ml_model import EducationCostPredictor
+        predictor = EducationCostPredictor()
+        result = predictor.predict_batch(rows, explain=request.GET.get('explain', '').lower() in ('1', 'true', 'yes'))
+        if 'error' in result:
+            return JsonResponse(result, status=400 if predictor.model_loaded else 503)
+        return JsonResponse(result)
+    except ValueError as e:
+        return JsonResponse({'error': f'Invalid request body: {str(e)}'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+@login_required
+@require_POST
+def predict_sweep_api(request):
+    """
+    API endpoint to see how the cost of a scenario moves with one or two of its inputs.
+    
+    Accepts a JSON object with the scenario under "base" (the prediction form field
+    names as keys) and the swept fields under "axes", e.g.
+    {"base": {...}, "axes": [{"field": "duration_years", "values": [1, 2, 3]},
+                             {"field": "level", "values": ["Bachelor", "Master"]}]}.
+    Every combination of the values is scored with a single vectorized model call,
+    and the tuition, living expenses and total cost are returned as surfaces with
+    one list level per axis, for charting.
+    
+    A grid can have up to SWEEP_MAX_POINTS points, so like the predict page it is
+    only open to logged-in users, and session callers must send the CSRF token
+    (X-CSRFToken header).
+    """
+    return predict_sweep_response(request)
+
+def parse_sweep_request(body):
+    """
+    Parse the body of a sweep request (see predict_sweep_api).
+    
+    Args:
+        body (bytes): The JSON request body
+        
+    Returns:
+        tuple: (base scenario dict, list of (field, values) pairs)
+        
+    Raises:
+        ValueError: If the body isn't a valid sweep request
+    """
+    payload = json.loads(body or b'null')
+    if not isinstance(payload, dict) or not isinstance(payload.get('base', {}), dict):
+        raise ValueError('Expected a JSON object with a "base" scenario object and "axes"')
+    axes = payload.get('axes')
+    if not isinstance(axes, list) or not 1 <= len(axes) <= SWEEP_MAX_AXES:
+        raise ValueError(f'Expected "axes" to be a list of 1 to {SWEEP_MAX_AXES} swept fields')
+    pairs = []
+    for axis in axes:
+        if not isinstance(axis, dict) or not isinstance(axis.get('field'), str) or not isinstance(axis.get('values'), list):
+            raise ValueError('Each axis needs a "field" name and a list of "values"')
+        pairs.append((axis['field'], axis['values']))
+    return payload.get('base', {}), pairs
+
+def predict_sweep_response(request):
+    """Parse a sweep request and score its grid (see predict_sweep_api)."""
+    try:
+        base, axes = parse_sweep_request(request.body)
+        points = 1
+        for _, values in axes:
+            points *= len(values)
+        if points > SWEEP_MAX_POINTS:
+            return JsonResponse({'error': f'Too many grid points, the limit is {SWEEP_MAX_POINTS}'}, status=413)
+        
+        from .ml_model import EducationCostPredictor
+        predictor = EducationCostPredictor()
+        result = predictor.predict_sweep(base, axes)
+        if 'error' in result:
+            return JsonResponse(result, status=400 if predictor.model_loaded else 503)
+        return JsonResponse(result)
+    except ValueError as e:
+        return JsonResponse({'error': f'Invalid request body: {str(e)}'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)